@@ -14,6 +14,7 @@ from api.shared.repo.mixins import RepositoryViewSetMixin
 from services.decorators import torngit_safe
 from services.repo_providers import RepoProviderService
 from services.task import TaskService
+from services.upload_auth_cache import repository_upload_token_key, upload_auth_cache
 
 from .repository_actions import create_webhook_on_provider, delete_webhook_on_provider
 from .serializers import (
@@ -93,6 +94,7 @@ class RepositoryViewSet(
     @action(detail=True, methods=["patch"], url_path="regenerate-upload-token")
     def regenerate_upload_token(self, request, *args, **kwargs):
         repo = self.get_object()
+        upload_auth_cache.invalidate(repository_upload_token_key(repo.upload_token))
         repo.upload_token = uuid.uuid4()
         repo.save()
         return Response(self.get_serializer(repo).data)
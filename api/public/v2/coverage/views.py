@@ -58,6 +58,8 @@ class CoverageViewSet(
             ),
             end_date=self.request.query_params.get("end_date", datetime.now()),
             branch=self.request.query_params.get("branch"),
+            # the filter backend needs a queryset (not the cached rollups list)
+            rollups=False,
         )
 
     def get_measurement_interval(self) -> Interval:
@@ -1,11 +1,13 @@
+from datetime import datetime
 from unittest.mock import patch
 
+import fakeredis
 import pytest
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from codecov_auth.tests.factories import OwnerFactory
-from core.tests.factories import RepositoryFactory
+from core.tests.factories import CommitFactory, RepositoryFactory
 from reports.tests.factories import RepositoryFlagFactory
 from timeseries.models import MeasurementName
 from timeseries.tests.factories import DatasetFactory, MeasurementFactory
@@ -298,3 +300,70 @@ class CoverageViewSetTestCase(TestCase):
             "results": [],
             "total_pages": 1,
         }
+
+
+@override_settings(TIMESERIES_ENABLED=False, COVERAGE_FALLBACK_ROLLUP_ENABLED=True)
+@patch("timeseries.helpers.redis", new_callable=fakeredis.FakeRedis)
+@patch("api.shared.repo.repository_accessors.RepoAccessors.get_repo_permissions")
+class CoverageViewSetFallbackTestCase(TestCase):
+    def setUp(self):
+        self.org = OwnerFactory(username="codecov", service="github")
+        self.repo = RepositoryFactory(
+            author=self.org, name="test-repo", active=True, branch="master"
+        )
+        self.current_owner = OwnerFactory(
+            username="codecov-user",
+            service="github",
+            organizations=[self.org.ownerid],
+            permission=[self.repo.repoid],
+        )
+
+        for timestamp, coverage in [
+            (datetime(2022, 8, 17, 12, 0, 0), 70.0),
+            (datetime(2022, 8, 18, 0, 12, 0), 80.0),
+            (datetime(2022, 8, 18, 0, 13, 0), 90.0),
+            (datetime(2022, 8, 19, 0, 1, 0), 100.0),
+        ]:
+            CommitFactory(
+                repository=self.repo,
+                branch="master",
+                timestamp=timestamp,
+                totals={"c": coverage},
+            )
+
+        self.client = APIClient()
+        self.client.force_login_owner(self.current_owner)
+
+    def test_repo_coverage(self, get_repo_permissions, redis):
+        get_repo_permissions.return_value = (True, True)
+
+        response = self.client.get(
+            f"/api/v2/github/codecov/repos/{self.repo.name}/coverage?interval=1d&start_date=2022-08-18&end_date=2022-08-20"
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "count": 3,
+            "next": None,
+            "previous": None,
+            "results": [
+                {
+                    "timestamp": "2022-08-17T00:00:00Z",
+                    "min": 70.0,
+                    "max": 70.0,
+                    "avg": 70.0,
+                },
+                {
+                    "timestamp": "2022-08-18T00:00:00Z",
+                    "min": 80.0,
+                    "max": 90.0,
+                    "avg": 85.0,
+                },
+                {
+                    "timestamp": "2022-08-19T00:00:00Z",
+                    "min": 100.0,
+                    "max": 100.0,
+                    "avg": 100.0,
+                },
+            ],
+            "total_pages": 1,
+        }
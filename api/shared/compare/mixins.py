@@ -1,6 +1,7 @@
 import logging
 from typing import Optional
 
+from django.conf import settings
 from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound, PermissionDenied
@@ -87,6 +88,8 @@ class CompareViewSetMixin(CompareSlugMixin, viewsets.GenericViewSet):
     @torngit_safe
     def retrieve(self, request, *args, **kwargs):
         comparison = self.get_object()
+        if settings.COMPARISON_PREFETCH_ENABLED:
+            comparison.prefetch()
 
         # Some checks here for pseudo-comparisons. Basically, when pseudo-comparing,
         # we sometimes might need to tweak the base report if the user allows us to
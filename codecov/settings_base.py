@@ -499,6 +499,46 @@ GRAPHQL_PLAYGROUND = True
 UPLOAD_THROTTLING_ENABLED = get_config(
     "setup", "upload_throttling_enabled", default=True
 )
+# Upload views share a pooled Redis client and `dispatch_upload_task` does its Redis
+# bookkeeping with a single script call
+UPLOAD_FAST_DISPATCH_ENABLED = get_config(
+    "setup", "upload_fast_dispatch_enabled", default=False
+)
+# Keep the number of uploads of each commit (see `UploadsPerCommitThrottle`) in Redis
+UPLOAD_COMMIT_COUNTERS_ENABLED = get_config(
+    "setup", "upload_commit_counters_enabled", default=False
+)
+UPLOAD_COMMIT_COUNTER_TTL = int(
+    get_config("setup", "upload_commit_counter_ttl", default=300)
+)
+# Cache the lookups of the repositories/tokens that upload requests authenticate with
+# (see `services.upload_auth_cache`)
+UPLOAD_TOKEN_CACHE_ENABLED = get_config(
+    "setup", "upload_token_cache", "enabled", default=False
+)
+UPLOAD_TOKEN_CACHE_TTL = int(
+    get_config("setup", "upload_token_cache", "ttl", default=60)
+)
+UPLOAD_TOKEN_CACHE_LOCAL_TTL = int(
+    get_config("setup", "upload_token_cache", "local_ttl", default=5)
+)
+UPLOAD_TOKEN_CACHE_MAX_ENTRIES = int(
+    get_config("setup", "upload_token_cache", "max_entries", default=4096)
+)
+# Count the uploads used by owners with daily Redis counters (see `utils.uploads_used`)
+UPLOAD_USAGE_COUNTERS_ENABLED = get_config(
+    "setup", "upload_usage_counters_enabled", default=False
+)
+# Cache the provider lookups of tokenless uploads (see `services.provider_lookup_cache`)
+TOKENLESS_LOOKUP_CACHE_ENABLED = get_config(
+    "setup", "tokenless_lookup_cache_enabled", default=False
+)
+TOKENLESS_PULL_REQUEST_CACHE_TTL = int(
+    get_config("setup", "tokenless_pull_request_cache_ttl", default=300)
+)
+TOKENLESS_BUILD_CACHE_TTL = int(
+    get_config("setup", "tokenless_build_cache_ttl", default=60)
+)
 
 SENTRY_JWT_SHARED_SECRET = get_config(
     "sentry", "jwt_shared_secret", default=None
@@ -531,6 +571,93 @@ SHELTER_SHARED_SECRET = get_config("setup", "shelter_shared_secret", default=Non
 # TODO: we can eventually get rid of this once it's confirmed working well for many repos
 REPORT_BUILDER_REPO_IDS = get_config("setup", "report_builder", "repo_ids", default=[])
 
+# compute file comparison change summaries and segments from compact line arrays
+# (see `services.comparison.CreateLineArraysVisitor`)
+COMPARISON_LINE_ARRAYS_ENABLED = get_config(
+    "setup", "comparison", "line_arrays_enabled", default=False
+)
+
+# load base/head reports and the git comparison concurrently when validating comparisons
+COMPARISON_PREFETCH_ENABLED = get_config(
+    "setup", "comparison", "prefetch_enabled", default=False
+)
+
+# cache of provider compares between two commits (shared by all comparisons)
+GIT_COMPARE_CACHE_ENABLED = get_config(
+    "setup", "git_compare_cache", "enabled", default=False
+)
+GIT_COMPARE_CACHE_MAX_BYTES = int(
+    get_config("setup", "git_compare_cache", "max_bytes", default=64 * 1024 * 1024)
+)
+GIT_COMPARE_CACHE_REDIS_ENABLED = get_config(
+    "setup", "git_compare_cache", "redis_enabled", default=False
+)
+GIT_COMPARE_CACHE_REDIS_TTL = int(
+    get_config("setup", "git_compare_cache", "redis_ttl", default=7 * 24 * 3600)
+)
+
+# maximum number of concurrent archive reads (shared by all batch reads) and the
+# time after which a batch read gives up on the files that haven't been read
+ARCHIVE_READ_CONCURRENCY = int(
+    get_config("setup", "archive", "read_concurrency", default=16)
+)
+ARCHIVE_READ_TIMEOUT = float(get_config("setup", "archive", "read_timeout", default=10))
+# batch the archive reads of the commit reports built for lists of commits
+ARCHIVE_PREFETCH_ENABLED = get_config(
+    "setup", "archive", "prefetch_enabled", default=False
+)
+
+# cache of the codecov.yaml of commits (see `services.yaml.CommitYamlCache`)
+COMMIT_YAML_CACHE_ENABLED = get_config(
+    "setup", "commit_yaml_cache", "enabled", default=False
+)
+COMMIT_YAML_CACHE_MAX_ENTRIES = int(
+    get_config("setup", "commit_yaml_cache", "max_entries", default=1024)
+)
+COMMIT_YAML_CACHE_REDIS_ENABLED = get_config(
+    "setup", "commit_yaml_cache", "redis_enabled", default=False
+)
+COMMIT_YAML_CACHE_TTL = int(
+    get_config("setup", "commit_yaml_cache", "ttl", default=24 * 3600)
+)
+COMMIT_YAML_CACHE_NEGATIVE_TTL = int(
+    get_config("setup", "commit_yaml_cache", "negative_ttl", default=300)
+)
+
+# cache of the data needed to build a commit's report (chunks, files, sessions, totals)
+REPORT_CACHE_ENABLED = get_config("setup", "report_cache", "enabled", default=False)
+REPORT_CACHE_MAX_BYTES = int(
+    get_config("setup", "report_cache", "max_bytes", default=256 * 1024 * 1024)
+)
+REPORT_CACHE_REDIS_ENABLED = get_config(
+    "setup", "report_cache", "redis_enabled", default=False
+)
+REPORT_CACHE_REDIS_TTL = int(
+    get_config("setup", "report_cache", "redis_ttl", default=3600)
+)
+
+# `totalCount` of GraphQL connections that opted into a cached/estimated count
+GRAPHQL_CONNECTION_COUNT_STRATEGIES_ENABLED = get_config(
+    "setup", "graphql", "connection_count", "strategies_enabled", default=False
+)
+GRAPHQL_CONNECTION_COUNT_CACHE_TTL = int(
+    get_config("setup", "graphql", "connection_count", "cache_ttl", default=60)
+)
+GRAPHQL_CONNECTION_COUNT_ESTIMATE_THRESHOLD = int(
+    get_config(
+        "setup", "graphql", "connection_count", "estimate_threshold", default=100000
+    )
+)
+
+# cached per repository/branch rollups of commit coverage for the timeseries
+# fallback (used while the timeseries datasets are being backfilled)
+COVERAGE_FALLBACK_ROLLUP_ENABLED = get_config(
+    "setup", "timeseries", "fallback_rollup_enabled", default=False
+)
+COVERAGE_FALLBACK_ROLLUP_TTL = int(
+    get_config("setup", "timeseries", "fallback_rollup_ttl", default=24 * 3600)
+)
+
 SENTRY_ENV = os.environ.get("CODECOV_ENV", False)
 SENTRY_DSN = os.environ.get("SERVICES__SENTRY__SERVER_DSN", None)
 if SENTRY_DSN is not None:
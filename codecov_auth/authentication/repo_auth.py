@@ -1,9 +1,11 @@
 import re
 from datetime import datetime
+from hashlib import sha256
 from typing import List
 from uuid import UUID
 
 from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import QuerySet
 from django.utils import timezone
@@ -21,8 +23,18 @@ from codecov_auth.models import (
     TokenTypeChoices,
 )
 from core.models import Repository
+from services.provider_lookup_cache import cached_lookup
 from services.repo_providers import RepoProviderService
-from upload.helpers import get_global_tokens, get_repo_with_github_actions_oidc_token
+from services.upload_auth_cache import (
+    org_level_token_key,
+    repository_token_key,
+    upload_auth_cache,
+)
+from upload.helpers import (
+    get_global_tokens,
+    get_repo_with_github_actions_oidc_token,
+    get_repository_by_upload_token,
+)
 from upload.views.helpers import get_repository_from_string
 from utils import is_uuid
 
@@ -123,9 +135,8 @@ class RepositoryLegacyTokenAuthentication(authentication.TokenAuthentication):
             token = UUID(token)
         except (ValueError, TypeError):
             raise exceptions.AuthenticationFailed("Invalid token.")
-        try:
-            repository = Repository.objects.get(upload_token=token)
-        except Repository.DoesNotExist:
+        repository = get_repository_by_upload_token(token)
+        if repository is None:
             raise exceptions.AuthenticationFailed("Invalid token.")
         return (
             RepositoryAsUser(repository),
@@ -137,9 +148,13 @@ class RepositoryTokenAuthentication(authentication.TokenAuthentication):
     keyword = "Repotoken"
 
     def authenticate_credentials(self, key):
-        try:
-            token = RepositoryToken.objects.select_related("repository").get(key=key)
-        except RepositoryToken.DoesNotExist:
+        queryset = RepositoryToken.objects.select_related("repository")
+        token = upload_auth_cache.get_or_fetch(
+            repository_token_key(key),
+            lambda: queryset.filter(key=key).first(),
+            queryset,
+        )
+        if token is None:
             raise exceptions.AuthenticationFailed("Invalid token.")
 
         if not token.repository.active:
@@ -196,7 +211,12 @@ class OrgLevelTokenAuthentication(authentication.TokenAuthentication):
     def authenticate_credentials(self, key):
         if is_uuid(key):
             # Actual verification for org level tokens
-            token = OrganizationLevelToken.objects.filter(token=key).first()
+            queryset = OrganizationLevelToken.objects.select_related("owner")
+            token = upload_auth_cache.get_or_fetch(
+                org_level_token_key(key),
+                lambda: queryset.filter(token=key).first(),
+                queryset,
+            )
 
             if token is None:
                 return None
@@ -284,6 +304,18 @@ class TokenlessAuthentication(authentication.TokenAuthentication):
                 wait=retry_after, detail=self.rate_limit_failed_message
             )
 
+    def get_pull_request_slugs(self, repository: Repository, fork_pr: str) -> dict:
+        # Get the provider service to check the tokenless claim
+        repository_service = RepoProviderService().get_adapter(
+            repository.author, repository
+        )
+        pull_request = self.get_pull_request_info(repository_service, fork_pr)
+        # only the slugs are needed (and cached)
+        return {
+            "base": {"slug": pull_request["base"]["slug"]},
+            "head": {"slug": pull_request["head"]["slug"]},
+        }
+
     def authenticate(self, request):
         fork_slug = request.headers.get("X-Tokenless", None)
         fork_pr = request.headers.get("X-Tokenless-PR", None)
@@ -294,11 +326,13 @@ class TokenlessAuthentication(authentication.TokenAuthentication):
         # Tokneless is only for public repos
         if repository.private:
             raise exceptions.AuthenticationFailed(self.auth_failed_message)
-        # Get the provider service to check the tokenless claim
-        repository_service = RepoProviderService().get_adapter(
-            repository.author, repository
+        # the header is not trusted with a Redis key
+        pull_request_id = sha256(f"{repository.repoid}:{fork_pr}".encode()).hexdigest()
+        pull_request = cached_lookup(
+            f"tokenless/pull/{pull_request_id}",
+            lambda: self.get_pull_request_slugs(repository, fork_pr),
+            settings.TOKENLESS_PULL_REQUEST_CACHE_TTL,
         )
-        pull_request = self.get_pull_request_info(repository_service, fork_pr)
         if (
             pull_request["base"]["slug"]
             != f"{repository.author.username}/{repository.name}"
@@ -5,6 +5,7 @@ from codecov.commands.exceptions import Unauthenticated, Unauthorized, Validatio
 from codecov.db import sync_to_async
 from codecov_auth.helpers import current_user_part_of_org
 from codecov_auth.models import OrganizationLevelToken, Owner
+from services.upload_auth_cache import org_level_token_key, upload_auth_cache
 
 
 class RegenerateOrgUploadTokenInteractor(BaseInteractor):
@@ -26,6 +27,7 @@ class RegenerateOrgUploadTokenInteractor(BaseInteractor):
             owner=owner_obj
         )
         if not created:
+            upload_auth_cache.invalidate(org_level_token_key(upload_token.token))
             upload_token.token = uuid.uuid4()
             upload_token.save()
 
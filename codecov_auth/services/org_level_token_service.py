@@ -8,6 +8,7 @@ from django.forms import ValidationError
 
 from codecov_auth.models import OrganizationLevelToken, Owner
 from plan.constants import USER_PLAN_REPRESENTATIONS
+from services.upload_auth_cache import org_level_token_key, upload_auth_cache
 
 log = logging.getLogger(__name__)
 
@@ -45,6 +46,7 @@ class OrgLevelTokenService(object):
     def refresh_token(cls, tokenid: int):
         try:
             token = OrganizationLevelToken.objects.get(id=tokenid)
+            upload_auth_cache.invalidate(org_level_token_key(token.token))
             token.token = uuid.uuid4()
             token.save()
         except OrganizationLevelToken.DoesNotExist:
@@ -56,6 +58,7 @@ class OrgLevelTokenService(object):
     def delete_org_token_if_exists(cls, org: Owner):
         try:
             org_token = OrganizationLevelToken.objects.get(owner=org)
+            upload_auth_cache.invalidate(org_level_token_key(org_token.token))
             org_token.delete()
         except OrganizationLevelToken.DoesNotExist:
             pass
@@ -1,7 +1,9 @@
 import uuid
 from datetime import datetime, timedelta
+from hashlib import sha256
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import fakeredis
 import pytest
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import QuerySet
@@ -636,3 +638,35 @@ class TestTokenlessAuth(object):
         with pytest.raises(exceptions.Throttled):
             res = authentication.authenticate(request)
         mock_adapter.get_pull_request.assert_called_with("15")
+
+    @override_settings(TOKENLESS_LOOKUP_CACHE_ENABLED=True)
+    @patch("services.provider_lookup_cache.redis", new_callable=fakeredis.FakeRedis)
+    @patch("codecov_auth.authentication.repo_auth.RepoProviderService")
+    def test_tokenless_pull_request_is_cached(self, mock_repo_provider, redis, db):
+        repo = RepositoryFactory(private=False)
+        pr_info = {
+            "base": {"slug": f"{repo.author.username}/{repo.name}"},
+            "head": {"slug": f"some-user/{repo.name}"},
+            "title": "Some PR",
+        }
+        mock_adapter = MagicMock(
+            name="mock_provider_adapter",
+            get_pull_request=AsyncMock(name="mock_get_pr", return_value=pr_info),
+        )
+        mock_repo_provider.return_value.get_adapter.return_value = mock_adapter
+
+        def authenticate(fork_slug):
+            request = APIRequestFactory().post(
+                f"/upload/github/{repo.author.username}::::{repo.name}/commits/commit_sha/reports/report_code/uploads",
+                headers={"X-Tokenless": fork_slug, "X-Tokenless-PR": "15"},
+            )
+            return TokenlessAuthentication().authenticate(request)
+
+        assert authenticate(f"some-user/{repo.name}") is not None
+        with pytest.raises(exceptions.AuthenticationFailed):
+            authenticate("user-name/repo-forked")
+        mock_adapter.get_pull_request.assert_called_once_with("15")
+        # the key holds a hash of the (untrusted) header
+        key = sha256(f"{repo.repoid}:15".encode()).hexdigest()
+        assert redis.keys("tokenless/pull/*") == [f"tokenless/pull/{key}".encode()]
+        assert b"title" not in redis.get(f"tokenless/pull/{key}")
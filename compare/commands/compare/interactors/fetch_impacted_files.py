@@ -24,16 +24,26 @@ class FetchImpactedFiles(BaseInteractor):
         comparison: Comparison,
         filters,
     ):
+        if comparison:
+            impacted_files = self._filter_impacted_files(
+                impacted_files, comparison, filters
+            )
+
+        # filtering keeps the order of the files so only the remaining ones are sorted
         parameter = filters.get("ordering", {}).get("parameter")
         direction = filters.get("ordering", {}).get("direction")
         if parameter and direction:
             impacted_files = self.sort_impacted_files(
                 impacted_files, parameter, direction
             )
+        return impacted_files
 
-        if not comparison:
-            return impacted_files
-
+    def _filter_impacted_files(
+        self,
+        impacted_files: Optional[List[ImpactedFile]],
+        comparison: Comparison,
+        filters,
+    ):
         flags_filter = filters.get("flags", [])
         components_filter = filters.get("components", [])
 
@@ -63,8 +73,10 @@ class FetchImpactedFiles(BaseInteractor):
 
         if flags_filter:
             if set(flags_filter) & set(head_commit_report.flags):
-                files = files_belonging_to_flags(
-                    commit_report=head_commit_report, flags=flags_filter
+                files = set(
+                    files_belonging_to_flags(
+                        commit_report=head_commit_report, flags=flags_filter
+                    )
                 )
 
                 impacted_files = [
@@ -104,25 +116,25 @@ class FetchImpactedFiles(BaseInteractor):
         """
         Sorts the impacted files by any provided parameter and slides items with None values to the end
         """
-        # Separate impacted files with None values for the specified parameter value
-        files_with_coverage = []
-        files_without_coverage = []
-        for file in impacted_files:
-            if self.get_attribute(file, parameter) is not None:
-                files_with_coverage.append(file)
-            else:
-                files_without_coverage.append(file)
+        # The value of the parameter is computed once per file, files are then
+        # ordered by their index so that the (stable) sort only compares values
+        keys = [self.get_attribute(file, parameter) for file in impacted_files]
+        indexes_with_coverage = [
+            index for index, key in enumerate(keys) if key is not None
+        ]
+        indexes_without_coverage = [
+            index for index, key in enumerate(keys) if key is None
+        ]
 
         # Sort impacted_files list based on parameter value
         is_reversed = direction.value == "descending"
-        files_with_coverage = sorted(
-            files_with_coverage,
-            key=lambda x: self.get_attribute(x, parameter),
-            reverse=is_reversed,
-        )
+        indexes_with_coverage.sort(key=keys.__getitem__, reverse=is_reversed)
 
         # Merge both lists together
-        return files_with_coverage + files_without_coverage
+        return [
+            impacted_files[index]
+            for index in indexes_with_coverage + indexes_without_coverage
+        ]
 
     def execute(
         self,
@@ -393,6 +393,24 @@ class FetchImpactedFilesTest(TransactionTestCase):
             "invalid impacted file parameter: something else", str(ctx.exception)
         )
 
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_sort_computes_parameter_once_per_file(self, read_file):
+        read_file.return_value = mock_data_from_archive
+        filters = {
+            "ordering": {
+                "parameter": ImpactedFileParameter.PATCH_COVERAGE,
+                "direction": OrderingDirection.DESC,
+            }
+        }
+        with patch.object(
+            FetchImpactedFiles,
+            "get_attribute",
+            autospec=True,
+            side_effect=FetchImpactedFiles.get_attribute,
+        ) as get_attribute:
+            sorted_files = self.execute(None, self.comparison_report, None, filters)
+        assert get_attribute.call_count == len(sorted_files) == 2
+
     @patch("services.archive.ArchiveService.read_file")
     def test_impacted_files_filtered_by_change_coverage_ascending(self, read_file):
         read_file.return_value = mock_data_from_archive
@@ -3,6 +3,7 @@ from codecov.commands.exceptions import Unauthenticated, ValidationError
 from codecov.db import sync_to_async
 from codecov_auth.models import Owner, RepositoryToken
 from core.models import Repository
+from services.upload_auth_cache import repository_token_key, upload_auth_cache
 
 
 class RegenerateRepositoryTokenInteractor(BaseInteractor):
@@ -23,6 +24,7 @@ class RegenerateRepositoryTokenInteractor(BaseInteractor):
             repository_id=repo.repoid, token_type=token_type
         )
         if not created:
+            upload_auth_cache.invalidate(repository_token_key(token.key))
             token.key = token.generate_key()
             token.save()
         return token.key
@@ -34,9 +34,6 @@ def measurements_by_ids(
     # group by measurable_id
     measurements = {}
     for measurement in queryset:
-        measurable_id = measurement["measurable_id"]
-        if measurable_id not in measurements:
-            measurements[measurable_id] = []
-        measurements[measurable_id].append(measurement)
+        measurements.setdefault(measurement["measurable_id"], []).append(measurement)
 
     return measurements
@@ -1,5 +1,13 @@
+from typing import Optional
+
 from codecov_auth.models import Owner
 from core.models import Repository
+from graphql_api.types.enums import RepositoryOrdering
+
+# fields of the `Repository` type that are resolved from the annotations added by
+# `with_recent_coverage` and `with_latest_commit_at` respectively
+RECENT_COVERAGE_FIELDS = {"coverage", "coverageSha", "hits", "misses", "lines"}
+LATEST_COMMIT_AT_FIELDS = {"latestCommitAt"}
 
 
 def apply_filters_to_queryset(queryset, filters):
@@ -24,24 +32,45 @@ def apply_filters_to_queryset(queryset, filters):
     return queryset
 
 
-def list_repository_for_owner(current_owner: Owner, owner: Owner, filters):
-    queryset = (
-        Repository.objects.viewable_repos(current_owner)
-        .with_recent_coverage()
-        .with_latest_commit_at()
-        .filter(author=owner)
-    )
+def annotate_repositories(queryset, fields: Optional[set[str]] = None, ordering=None):
+    """
+    Adds the (expensive) annotations needed to resolve the given `Repository` fields
+    (all of them if `fields` is `None`) and to order by `ordering`.
+    """
+    ordering = getattr(ordering, "value", ordering)
+    if (
+        fields is None
+        or fields & RECENT_COVERAGE_FIELDS
+        or ordering == RepositoryOrdering.COVERAGE.value
+    ):
+        queryset = queryset.with_recent_coverage()
+    if (
+        fields is None
+        or fields & LATEST_COMMIT_AT_FIELDS
+        or ordering == RepositoryOrdering.COMMIT_DATE.value
+    ):
+        queryset = queryset.with_latest_commit_at()
+    return queryset
+
+
+def list_repository_for_owner(
+    current_owner: Owner,
+    owner: Owner,
+    filters,
+    fields: Optional[set[str]] = None,
+    ordering=None,
+):
+    queryset = Repository.objects.viewable_repos(current_owner).filter(author=owner)
+    queryset = annotate_repositories(queryset, fields, ordering)
     queryset = apply_filters_to_queryset(queryset, filters)
     return queryset
 
 
-def search_repos(current_owner, filters):
+def search_repos(current_owner, filters, fields=None, ordering=None):
     authors_from = [current_owner.ownerid] + (current_owner.organizations or [])
-    queryset = (
-        Repository.objects.viewable_repos(current_owner)
-        .with_recent_coverage()
-        .with_latest_commit_at()
-        .filter(author__ownerid__in=authors_from)
+    queryset = Repository.objects.viewable_repos(current_owner).filter(
+        author__ownerid__in=authors_from
     )
+    queryset = annotate_repositories(queryset, fields, ordering)
     queryset = apply_filters_to_queryset(queryset, filters)
     return queryset
@@ -0,0 +1,64 @@
+from django.db.models import Count
+from shared.yaml import UserYaml
+
+from codecov.db import sync_to_async
+from core.models import Repository
+from reports.models import RepositoryFlag
+from timeseries.models import Dataset
+
+from .loader import BaseLoader
+
+
+class DatasetLoader(BaseLoader):
+    """
+    Loads the `Dataset` with the given name of repositories (keyed by repository id).
+    """
+
+    @classmethod
+    def key(cls, dataset):
+        return dataset.repository_id
+
+    def __init__(self, info, name, *args, **kwargs):
+        self.name = name
+        return super().__init__(info, *args, **kwargs)
+
+    def batch_queryset(self, keys):
+        return Dataset.objects.filter(name=self.name, repository_id__in=keys)
+
+
+class FlagsCountLoader(BaseLoader):
+    """
+    Loads the number of (non-deleted) flags of repositories (keyed by repository id).
+    """
+
+    @sync_to_async
+    def batch_load_fn(self, keys):
+        counts = dict(
+            RepositoryFlag.objects.filter(repository_id__in=keys, deleted__isnot=True)
+            .values("repository_id")
+            .annotate(count=Count("id"))
+            .values_list("repository_id", "count")
+        )
+        return [counts.get(key, 0) for key in keys]
+
+
+class ComponentsCountLoader(BaseLoader):
+    """
+    Loads the number of components in the merged owner/repository yaml of
+    repositories (keyed by repository id).
+    """
+
+    @sync_to_async
+    def batch_load_fn(self, keys):
+        yamls = Repository.objects.filter(repoid__in=keys).values_list(
+            "repoid", "yaml", "author_id", "author__yaml"
+        )
+        counts = {
+            repoid: len(
+                UserYaml.get_final_yaml(
+                    owner_yaml=owner_yaml, repo_yaml=repo_yaml, ownerid=ownerid
+                ).get_components()
+            )
+            for repoid, repo_yaml, ownerid, owner_yaml in yamls
+        }
+        return [counts.get(key, 0) for key in keys]
@@ -0,0 +1,77 @@
+import asyncio
+
+from django.test import TransactionTestCase
+
+from codecov_auth.tests.factories import OwnerFactory
+from core.tests.factories import RepositoryFactory
+from graphql_api.dataloader.repository import (
+    ComponentsCountLoader,
+    DatasetLoader,
+    FlagsCountLoader,
+)
+from reports.tests.factories import RepositoryFlagFactory
+from timeseries.models import MeasurementName
+from timeseries.tests.factories import DatasetFactory
+
+
+class GraphQLResolveInfo:
+    def __init__(self):
+        self.context = {}
+
+
+class RepositoryLoadersTestCase(TransactionTestCase):
+    databases = {"default", "timeseries"}
+
+    def setUp(self):
+        self.owner = OwnerFactory(
+            yaml={
+                "component_management": {
+                    "individual_components": [{"component_id": "owner"}]
+                }
+            }
+        )
+        self.repos = [
+            RepositoryFactory(author=self.owner, yaml=None),
+            RepositoryFactory(
+                author=self.owner,
+                yaml={
+                    "component_management": {
+                        "individual_components": [
+                            {"component_id": "a"},
+                            {"component_id": "b"},
+                        ]
+                    }
+                },
+            ),
+            RepositoryFactory(author=OwnerFactory(), yaml=None),
+        ]
+        for deleted in (None, False, True):
+            RepositoryFlagFactory(repository=self.repos[0], deleted=deleted)
+        RepositoryFlagFactory(repository=self.repos[1])
+        self.dataset = DatasetFactory(
+            repository_id=self.repos[1].pk, name=MeasurementName.FLAG_COVERAGE.value
+        )
+        DatasetFactory(
+            repository_id=self.repos[0].pk,
+            name=MeasurementName.COMPONENT_COVERAGE.value,
+        )
+        self.info = GraphQLResolveInfo()
+
+    async def test_flags_count(self):
+        loader = FlagsCountLoader.loader(self.info)
+        counts = await asyncio.gather(*(loader.load(repo.pk) for repo in self.repos))
+        assert counts == [2, 1, 0]
+
+    async def test_datasets(self):
+        loader = DatasetLoader.loader(self.info, MeasurementName.FLAG_COVERAGE.value)
+        datasets = await asyncio.gather(*(loader.load(repo.pk) for repo in self.repos))
+        assert datasets == [None, self.dataset, None]
+        assert (
+            DatasetLoader.loader(self.info, MeasurementName.COMPONENT_COVERAGE.value)
+            is not loader
+        )
+
+    async def test_components_count(self):
+        loader = ComponentsCountLoader.loader(self.info)
+        counts = await asyncio.gather(*(loader.load(repo.pk) for repo in self.repos))
+        assert counts == [1, 2, 0]
@@ -1,12 +1,22 @@
 import enum
+import json
+import logging
 from dataclasses import dataclass
 from functools import cached_property
+from hashlib import sha1
 
 from cursor_pagination import CursorPage, CursorPaginator
+from django.conf import settings
 from django.db.models import QuerySet
+from redis.exceptions import RedisError
 
 from codecov.db import sync_to_async
 from graphql_api.types.enums import OrderingDirection
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+redis = get_redis_connection()
 
 
 def build_connection_graphql(connection_name, type_node):
@@ -33,11 +43,74 @@ def field_order(field, ordering):
     return field
 
 
+class TotalCountStrategy(enum.Enum):
+    """
+    How the `totalCount` of a connection is computed:
+    - EXACT: a `COUNT(*)` of the queryset on every request
+    - CACHED: an exact count cached in Redis (keyed by the SQL of the queryset) for
+      `GRAPHQL_CONNECTION_COUNT_CACHE_TTL` seconds
+    - ESTIMATED: the Postgres planner estimate when it is at least
+      `GRAPHQL_CONNECTION_COUNT_ESTIMATE_THRESHOLD`, a cached count otherwise
+
+    Strategies other than EXACT are only used when
+    `GRAPHQL_CONNECTION_COUNT_STRATEGIES_ENABLED` is set.
+    """
+
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
+
+def _count_cache_key(queryset: QuerySet) -> str:
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = sha1(f"{sql}{params}".encode()).hexdigest()
+    return f"connection-count/{digest}"
+
+
+def cached_count(queryset: QuerySet) -> int:
+    key = _count_cache_key(queryset)
+    try:
+        cached = redis.get(key)
+        if cached is not None:
+            return int(cached)
+    except RedisError:
+        log.warning("Error reading connection count from cache", extra=dict(key=key))
+
+    count = queryset.count()
+    try:
+        redis.set(key, count, ex=settings.GRAPHQL_CONNECTION_COUNT_CACHE_TTL)
+    except RedisError:
+        log.warning("Error writing connection count to cache", extra=dict(key=key))
+    return count
+
+
+def estimated_count(queryset: QuerySet) -> int:
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate < settings.GRAPHQL_CONNECTION_COUNT_ESTIMATE_THRESHOLD:
+        # estimates of small results are the least accurate and exact counts are
+        # cheap there anyway
+        return cached_count(queryset)
+    return estimate
+
+
+def count_queryset(queryset: QuerySet, strategy: TotalCountStrategy) -> int:
+    if not settings.GRAPHQL_CONNECTION_COUNT_STRATEGIES_ENABLED:
+        strategy = TotalCountStrategy.EXACT
+
+    if strategy == TotalCountStrategy.CACHED:
+        return cached_count(queryset)
+    if strategy == TotalCountStrategy.ESTIMATED:
+        return estimated_count(queryset)
+    return queryset.count()
+
+
 @dataclass
 class Connection:
     queryset: QuerySet
     paginator: CursorPaginator
     page: CursorPage
+    count_strategy: TotalCountStrategy = TotalCountStrategy.EXACT
 
     @cached_property
     def edges(self):
@@ -48,7 +121,7 @@ class Connection:
 
     @sync_to_async
     def total_count(self, *args, **kwargs):
-        return self.queryset.count()
+        return count_queryset(self.queryset, self.count_strategy)
 
     @cached_property
     def start_cursor(self):
@@ -77,6 +150,7 @@ def queryset_to_connection_sync(
     after=None,
     last=None,
     before=None,
+    count_strategy=TotalCountStrategy.EXACT,
 ):
     """
     A method to take a queryset and return it in paginated order based on the cursor pattern.
@@ -87,7 +161,7 @@ def queryset_to_connection_sync(
     ordering = tuple(field_order(field, ordering_direction) for field in ordering)
     paginator = CursorPaginator(queryset, ordering=ordering)
     page = paginator.page(first=first, after=after, last=last, before=before)
-    return Connection(queryset, paginator, page)
+    return Connection(queryset, paginator, page, count_strategy)
 
 
 @sync_to_async
@@ -2,6 +2,7 @@ from typing import Iterable, Optional
 
 from graphql.language.ast import (
     FragmentSpreadNode,
+    InlineFragmentNode,
     Node,
     SelectionSetNode,
     VariableNode,
@@ -47,16 +48,29 @@ class LookaheadNode:
                 if selection.name.value == name:
                     return LookaheadNode(selection, self.info)
 
+    @property
+    def field_names(self) -> set[str]:
+        """
+        Names of the fields selected on this node
+        """
+        if not self.node.selection_set:
+            return set()
+        return {
+            selection.name.value
+            for selection in self._flatten_selections(self.node.selection_set)
+        }
+
     def _flatten_selections(self, selection_set: SelectionSetNode) -> Iterable[Node]:
         """
-        Expand fragments into flat list of selections
+        Expand fragments (including nested and inline ones) into flat list of selections
         """
         selections = []
         for selection in selection_set.selections:
             if isinstance(selection, FragmentSpreadNode):
                 fragment = self.info.fragments[selection.name.value]
-                for selection in fragment.selection_set.selections:
-                    selections.append(selection)
+                selections.extend(self._flatten_selections(fragment.selection_set))
+            elif isinstance(selection, InlineFragmentNode):
+                selections.extend(self._flatten_selections(selection.selection_set))
             else:
                 selections.append(selection)
         return selections
@@ -0,0 +1,111 @@
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterable
+
+from django.conf import settings
+from graphql.type.definition import GraphQLResolveInfo
+
+import services.report as report_service
+from core.models import Commit
+
+
+class ReportRegistry:
+    """
+    Request-scoped registry of commit reports so that all the resolvers of a query
+    share a single parsed report per (commit, report class) instead of each building
+    its own.
+
+    The registry is also attached to the request so that its counters can be
+    reported once the request is finished.
+    """
+
+    context_key = "__report_registry"
+
+    # fields of the `Commit` type whose resolvers build the commit's report
+    report_fields = frozenset(
+        ("components", "coverageFile", "flagNames", "pathContents")
+    )
+
+    @classmethod
+    def for_info(cls, info: GraphQLResolveInfo) -> "ReportRegistry":
+        """
+        Returns the registry of the request that `info` belongs to, creating it if
+        needed.
+        """
+        if cls.context_key not in info.context:
+            registry = cls()
+            info.context[cls.context_key] = registry
+            request = info.context.get("request")
+            if request is not None:
+                request.report_registry = registry
+        return info.context[cls.context_key]
+
+    def __init__(self):
+        # futures of the reports, which are built outside of the lock so that
+        # reports of different commits can be built concurrently while concurrent
+        # requests for the same report wait for a single build
+        self._reports: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        # number of reports that were built / that were served from the registry
+        self.builds = 0
+        self.hits = 0
+
+    def get(self, commit: Commit, report_class=None):
+        """
+        The report of `commit`: `Commit.full_report` by default, otherwise built
+        with `services.report.build_report_from_commit` using `report_class`.
+        """
+        key = (commit.repository_id, commit.commitid, report_class)
+        with self._lock:
+            future = self._reports.get(key)
+            is_builder = future is None
+            if is_builder:
+                future = self._reports[key] = Future()
+                if report_class is None and "full_report" in commit.__dict__:
+                    self.hits += 1
+                else:
+                    self.builds += 1
+            else:
+                self.hits += 1
+        if not is_builder:
+            return future.result()
+
+        try:
+            if report_class is None:
+                report = commit.full_report
+            else:
+                report = report_service.build_report_from_commit(
+                    commit, report_class=report_class
+                )
+        except BaseException as e:
+            # failures aren't kept, later calls try again
+            with self._lock:
+                del self._reports[key]
+            future.set_exception(e)
+            raise
+        future.set_result(report)
+        return report
+
+    def prefetch(self, commits: Iterable[Commit]):
+        """
+        Fetches what the reports of `commits` are built from in batches (see
+        `services.report.prefetch_commit_reports`) ahead of their resolvers building
+        them one at a time, e.g. for the commits of a connection.
+        """
+        if not settings.ARCHIVE_PREFETCH_ENABLED:
+            return
+        commits = [
+            commit
+            for commit in commits
+            if "full_report" not in commit.__dict__ and not self._has_report(commit)
+        ]
+        if len(commits) > 1:
+            report_service.prefetch_commit_reports(commits)
+
+    def _has_report(self, commit: Commit) -> bool:
+        with self._lock:
+            return (commit.repository_id, commit.commitid, None) in self._reports
+
+    @property
+    def counters(self) -> dict[str, int]:
+        return {"builds": self.builds, "hits": self.hits}
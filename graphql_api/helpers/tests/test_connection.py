@@ -1,5 +1,7 @@
+from unittest.mock import patch
+
 from asgiref.sync import async_to_sync
-from django.test import TransactionTestCase
+from django.test import TransactionTestCase, override_settings
 
 from core.models import Repository
 from core.tests.factories import RepositoryFactory
@@ -65,3 +67,65 @@ class RepositoryQuerySetTests(TransactionTestCase):
 
         count = async_to_sync(connection.total_count)()
         assert count == 3
+
+
+@override_settings(GRAPHQL_CONNECTION_COUNT_STRATEGIES_ENABLED=True)
+@patch("redis.Redis.set")
+@patch("redis.Redis.get")
+class TotalCountStrategyTests(TransactionTestCase):
+    def setUp(self):
+        RepositoryFactory(name="a")
+        RepositoryFactory(name="b")
+        RepositoryFactory(name="c")
+
+    def _total_count(self, count_strategy):
+        from graphql_api.helpers.connection import queryset_to_connection
+
+        connection = async_to_sync(queryset_to_connection)(
+            Repository.objects.filter(name__in=["a", "b"]),
+            ordering=(RepositoryOrdering.NAME,),
+            ordering_direction=OrderingDirection.ASC,
+            count_strategy=count_strategy,
+        )
+        return async_to_sync(connection.total_count)()
+
+    def test_exact(self, redis_get_mock, redis_set_mock):
+        from graphql_api.helpers.connection import TotalCountStrategy
+
+        assert self._total_count(TotalCountStrategy.EXACT) == 2
+        assert not redis_get_mock.called
+
+    @override_settings(GRAPHQL_CONNECTION_COUNT_STRATEGIES_ENABLED=False)
+    def test_strategies_disabled(self, redis_get_mock, redis_set_mock):
+        from graphql_api.helpers.connection import TotalCountStrategy
+
+        assert self._total_count(TotalCountStrategy.CACHED) == 2
+        assert not redis_get_mock.called
+
+    def test_cached(self, redis_get_mock, redis_set_mock):
+        from graphql_api.helpers.connection import TotalCountStrategy
+
+        redis_get_mock.return_value = None
+        assert self._total_count(TotalCountStrategy.CACHED) == 2
+        key, count = redis_set_mock.call_args.args
+        assert key.startswith("connection-count/")
+        assert count == 2
+
+        # the same query reads the count from the cache
+        redis_get_mock.return_value = b"42"
+        assert self._total_count(TotalCountStrategy.CACHED) == 42
+        assert redis_get_mock.call_args.args == (key,)
+
+    @override_settings(GRAPHQL_CONNECTION_COUNT_ESTIMATE_THRESHOLD=0)
+    def test_estimated(self, redis_get_mock, redis_set_mock):
+        from graphql_api.helpers.connection import TotalCountStrategy
+
+        with patch("django.db.models.QuerySet.count") as count_mock:
+            assert self._total_count(TotalCountStrategy.ESTIMATED) >= 0
+            assert not count_mock.called
+
+    def test_estimated_below_threshold(self, redis_get_mock, redis_set_mock):
+        from graphql_api.helpers.connection import TotalCountStrategy
+
+        redis_get_mock.return_value = None
+        assert self._total_count(TotalCountStrategy.ESTIMATED) == 2
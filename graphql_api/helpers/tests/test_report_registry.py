@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from types import SimpleNamespace
+from unittest.mock import PropertyMock, patch
+
+import pytest
+from django.test import TestCase, override_settings
+
+from core.models import Commit
+from core.tests.factories import CommitFactory
+from graphql_api.helpers.report_registry import ReportRegistry
+from services.report import ReadOnlyReport
+
+
+class ReportRegistryTests(TestCase):
+    def setUp(self):
+        self.request = SimpleNamespace()
+        self.info = SimpleNamespace(context={"request": self.request})
+        self.commit = CommitFactory()
+
+    def test_for_info(self):
+        registry = ReportRegistry.for_info(self.info)
+        assert ReportRegistry.for_info(self.info) is registry
+        assert self.request.report_registry is registry
+
+        other_info = SimpleNamespace(context={"request": SimpleNamespace()})
+        assert ReportRegistry.for_info(other_info) is not registry
+
+    @patch("core.models.Commit.full_report", new_callable=PropertyMock)
+    def test_get_shares_report_between_commit_instances(self, full_report_mock):
+        registry = ReportRegistry.for_info(self.info)
+        same_commit = Commit.objects.get(pk=self.commit.pk)
+
+        report = registry.get(self.commit)
+        assert registry.get(same_commit) is report
+        assert report is full_report_mock.return_value
+        assert full_report_mock.call_count == 1
+        assert registry.counters == {"builds": 1, "hits": 1}
+
+    @patch("services.report.build_report_from_commit")
+    def test_get_report_class(self, build_report_from_commit_mock):
+        registry = ReportRegistry.for_info(self.info)
+
+        report = registry.get(self.commit, report_class=ReadOnlyReport)
+        assert registry.get(self.commit, report_class=ReadOnlyReport) is report
+        build_report_from_commit_mock.assert_called_once_with(
+            self.commit, report_class=ReadOnlyReport
+        )
+        assert registry.counters == {"builds": 1, "hits": 1}
+
+    @patch("services.report.prefetch_commit_reports")
+    def test_prefetch(self, prefetch_commit_reports_mock):
+        registry = ReportRegistry.for_info(self.info)
+        commits = [self.commit, CommitFactory(), CommitFactory()]
+
+        registry.prefetch(commits)
+        prefetch_commit_reports_mock.assert_not_called()
+
+        with override_settings(ARCHIVE_PREFETCH_ENABLED=True):
+            with patch("core.models.Commit.full_report", new_callable=PropertyMock):
+                registry.get(self.commit)
+            # commits whose report was already built are skipped
+            registry.prefetch(commits)
+        prefetch_commit_reports_mock.assert_called_once_with(commits[1:])
+
+    @patch("services.report.build_report_from_commit")
+    def test_get_builds_different_commits_concurrently(
+        self, build_report_from_commit_mock
+    ):
+        registry = ReportRegistry.for_info(self.info)
+        other_commit = CommitFactory()
+        started = {commit.commitid: Event() for commit in (self.commit, other_commit)}
+
+        def build_report_from_commit(commit, report_class):
+            started[commit.commitid].set()
+            # each build waits for the other one to have started, which can't
+            # happen if builds are serialized
+            for event in started.values():
+                assert event.wait(5)
+            return commit.commitid
+
+        build_report_from_commit_mock.side_effect = build_report_from_commit
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            reports = list(
+                executor.map(
+                    lambda commit: registry.get(commit, report_class=ReadOnlyReport),
+                    [self.commit, other_commit],
+                )
+            )
+        assert reports == [self.commit.commitid, other_commit.commitid]
+
+    @patch("services.report.build_report_from_commit")
+    def test_get_builds_a_report_once(self, build_report_from_commit_mock):
+        registry = ReportRegistry.for_info(self.info)
+        building, release = Event(), Event()
+
+        def build_report_from_commit(commit, report_class):
+            building.set()
+            assert release.wait(5)
+            return "report"
+
+        build_report_from_commit_mock.side_effect = build_report_from_commit
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(registry.get, self.commit, ReadOnlyReport)
+            assert building.wait(5)
+            second = executor.submit(registry.get, self.commit, ReadOnlyReport)
+            release.set()
+            assert first.result() == second.result() == "report"
+        build_report_from_commit_mock.assert_called_once()
+        assert registry.counters == {"builds": 1, "hits": 1}
+
+    @patch("services.report.build_report_from_commit")
+    def test_get_failures_are_not_kept(self, build_report_from_commit_mock):
+        registry = ReportRegistry.for_info(self.info)
+        build_report_from_commit_mock.side_effect = [ValueError(), "report"]
+
+        with pytest.raises(ValueError):
+            registry.get(self.commit, report_class=ReadOnlyReport)
+        assert registry.get(self.commit, report_class=ReadOnlyReport) == "report"
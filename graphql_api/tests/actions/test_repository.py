@@ -0,0 +1,76 @@
+import json
+
+from django.test import TestCase
+
+from codecov_auth.tests.factories import OwnerFactory
+from core.models import Repository
+from core.tests.factories import CommitFactory, RepositoryFactory
+from graphql_api.actions.repository import (
+    annotate_repositories,
+    list_repository_for_owner,
+)
+from graphql_api.types.enums import RepositoryOrdering
+
+
+def explain_cost(queryset):
+    plan = json.loads(queryset.explain(format="json"))
+    return plan[0]["Plan"]["Total Cost"]
+
+
+class AnnotateRepositoriesTests(TestCase):
+    def setUp(self):
+        self.owner = OwnerFactory()
+        for _ in range(3):
+            repo = RepositoryFactory(author=self.owner)
+            CommitFactory(repository=repo)
+
+    def test_all_fields(self):
+        queryset = annotate_repositories(Repository.objects.all())
+        sql = str(queryset.query)
+        assert "recent_commit_totals" in sql
+        assert "true_latest_commit_at" in sql
+
+    def test_pruned_fields(self):
+        queryset = annotate_repositories(Repository.objects.all(), fields={"name"})
+        sql = str(queryset.query)
+        assert "recent_commit_totals" not in sql
+        assert "true_latest_commit_at" not in sql
+        assert queryset.count() == 3
+
+    def test_selected_fields(self):
+        queryset = annotate_repositories(Repository.objects.all(), fields={"hits"})
+        sql = str(queryset.query)
+        assert "recent_commit_totals" in sql
+        assert "true_latest_commit_at" not in sql
+
+        queryset = annotate_repositories(
+            Repository.objects.all(), fields={"latestCommitAt"}
+        )
+        sql = str(queryset.query)
+        assert "recent_commit_totals" not in sql
+        assert "true_latest_commit_at" in sql
+
+    def test_ordering(self):
+        queryset = annotate_repositories(
+            Repository.objects.all(),
+            fields=set(),
+            ordering=RepositoryOrdering.COVERAGE,
+        )
+        assert "recent_commit_totals" in str(queryset.query)
+        assert list(queryset.order_by("coverage"))
+
+        queryset = annotate_repositories(
+            Repository.objects.all(),
+            fields=set(),
+            ordering=RepositoryOrdering.COMMIT_DATE,
+        )
+        assert "true_latest_commit_at" in str(queryset.query)
+        assert list(queryset.order_by("latest_commit_at"))
+
+    def test_pruned_plan_is_cheaper(self):
+        pruned = list_repository_for_owner(self.owner, self.owner, {}, fields={"name"})
+        full = list_repository_for_owner(self.owner, self.owner, {})
+        assert explain_cost(pruned) < explain_cost(full)
+
+        with self.assertNumQueries(1):
+            assert len(list(pruned)) == 3
@@ -8,7 +8,6 @@ from shared.reports.resources import ReportFile
 
 import services.components as components_service
 import services.path as path_service
-import services.report as report_service
 from codecov.db import sync_to_async
 from core.models import Commit
 from graphql_api.actions.commits import commit_uploads
@@ -25,6 +24,7 @@ from graphql_api.helpers.connection import (
     queryset_to_connection,
     queryset_to_connection_sync,
 )
+from graphql_api.helpers.report_registry import ReportRegistry
 from graphql_api.types.comparison.comparison import (
     MissingBaseCommit,
     MissingBaseReport,
@@ -63,7 +63,9 @@ def resolve_file(commit, info, path, flags=None, components=None):
             paths.extend(fc.paths)
         _else = FilteredReportFile(ReportFile(path), [])
 
-    commit_report = commit.full_report.filter(flags=flags, paths=paths)
+    commit_report = (
+        ReportRegistry.for_info(info).get(commit).filter(flags=flags, paths=paths)
+    )
     file_report = commit_report.get(path, _else=_else)
 
     return {
@@ -200,7 +202,7 @@ def resolve_bundle_analysis_report(
 @commit_bindable.field("flagNames")
 @sync_to_async
 def resolve_flags(commit, info, **kwargs):
-    return commit.full_report.flags.keys()
+    return ReportRegistry.for_info(info).get(commit).flags.keys()
 
 
 @commit_bindable.field("criticalFiles")
@@ -230,7 +232,7 @@ def resolve_path_contents(commit: Commit, info, path: str = None, filters=None):
     current_owner = info.context["request"].current_owner
 
     # TODO: Might need to add reports here filtered by flags in the future
-    commit_report = report_service.build_report_from_commit(
+    commit_report = ReportRegistry.for_info(info).get(
         commit, report_class=ReadOnlyReport
     )
     if not commit_report:
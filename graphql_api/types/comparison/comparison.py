@@ -68,7 +68,7 @@ def resolve_impacted_files(
 @comparison_bindable.field("impactedFilesCount")
 @sync_to_async
 def resolve_impacted_files_count(comparison: ComparisonReport, info):
-    return len(comparison.impacted_files)
+    return comparison.impacted_files_count
 
 
 @comparison_bindable.field("directChangedFilesCount")
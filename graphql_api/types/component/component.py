@@ -5,6 +5,7 @@ from shared.reports.types import ReportTotals
 
 from codecov.db import sync_to_async
 from core.models import Commit
+from graphql_api.helpers.report_registry import ReportRegistry
 from services.components import Component, component_filtered_report
 
 component_bindable = ObjectType("Component")
@@ -24,6 +25,6 @@ def resolve_name(component: Component, info) -> str:
 @sync_to_async
 def resolve_totals(component: Component, info) -> Optional[ReportTotals]:
     commit: Commit = info.context["component_commit"]
-    report = commit.full_report
+    report = ReportRegistry.for_info(info).get(commit)
     filtered_report = component_filtered_report(report, [component])
     return filtered_report.totals
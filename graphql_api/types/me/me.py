@@ -15,6 +15,7 @@ from graphql_api.helpers.connection import (
     build_connection_graphql,
     queryset_to_connection,
 )
+from graphql_api.helpers.lookahead import lookahead
 from graphql_api.types.enums import OrderingDirection, RepositoryOrdering
 
 me = ariadne_load_local_graphql(__file__, "me.graphql")
@@ -42,13 +43,19 @@ def resolve_owner(user, _):
 @convert_kwargs_to_snake_case
 def resolve_viewable_repositories(
     current_user,
-    _,
+    info,
     filters=None,
     ordering=RepositoryOrdering.ID,
     ordering_direction=OrderingDirection.ASC,
     **kwargs,
 ):
-    queryset = search_repos(current_user, filters)
+    node = lookahead(info, ("edges", "node"))
+    queryset = search_repos(
+        current_user,
+        filters,
+        fields=node.field_names if node else set(),
+        ordering=ordering,
+    )
     return queryset_to_connection(
         queryset,
         ordering=(ordering, RepositoryOrdering.ID),
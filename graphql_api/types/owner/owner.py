@@ -17,6 +17,7 @@ from graphql_api.helpers.connection import (
     build_connection_graphql,
     queryset_to_connection,
 )
+from graphql_api.helpers.lookahead import lookahead
 from graphql_api.helpers.mutation import require_part_of_org
 from graphql_api.types.enums import OrderingDirection, RepositoryOrdering
 from graphql_api.types.errors.errors import NotFoundError, OwnerNotActivatedError
@@ -42,7 +43,14 @@ def resolve_repositories(
     **kwargs
 ):
     current_owner = info.context["request"].current_owner
-    queryset = list_repository_for_owner(current_owner, owner, filters)
+    node = lookahead(info, ("edges", "node"))
+    queryset = list_repository_for_owner(
+        current_owner,
+        owner,
+        filters,
+        fields=node.field_names if node else set(),
+        ordering=ordering,
+    )
     return queryset_to_connection(
         queryset,
         ordering=(ordering, RepositoryOrdering.ID),
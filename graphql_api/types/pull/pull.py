@@ -9,7 +9,12 @@ from graphql_api.dataloader.bundle_analysis import load_bundle_analysis_comparis
 from graphql_api.dataloader.commit import CommitLoader
 from graphql_api.dataloader.comparison import ComparisonLoader
 from graphql_api.dataloader.owner import OwnerLoader
-from graphql_api.helpers.connection import queryset_to_connection_sync
+from graphql_api.helpers.connection import (
+    TotalCountStrategy,
+    queryset_to_connection_sync,
+)
+from graphql_api.helpers.lookahead import lookahead
+from graphql_api.helpers.report_registry import ReportRegistry
 from graphql_api.types.comparison.comparison import (
     FirstPullRequest,
     MissingBaseCommit,
@@ -120,13 +125,22 @@ def resolve_bundle_analysis_compare_with_base(pull, info, **kwargs):
 def resolve_commits(pull: Pull, info, **kwargs):
     queryset = pull_commits(pull)
 
-    return queryset_to_connection_sync(
+    connection = queryset_to_connection_sync(
         queryset,
         ordering=("timestamp",),
         ordering_direction=OrderingDirection.DESC,
+        count_strategy=TotalCountStrategy.CACHED,
         **kwargs,
     )
 
+    node = lookahead(info, ("edges", "node"))
+    if node and node.field_names & ReportRegistry.report_fields:
+        ReportRegistry.for_info(info).prefetch(
+            [edge["node"] for edge in connection.edges]
+        )
+
+    return connection
+
 
 @pull_bindable.field("behindBy")
 def resolve_behind_by(pull: Pull, info, **kwargs) -> int:
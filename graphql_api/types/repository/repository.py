@@ -15,17 +15,24 @@ from graphql_api.actions.components import component_measurements
 from graphql_api.actions.flags import flag_measurements, flags_for_repo
 from graphql_api.dataloader.commit import CommitLoader
 from graphql_api.dataloader.owner import OwnerLoader
+from graphql_api.dataloader.repository import (
+    ComponentsCountLoader,
+    DatasetLoader,
+    FlagsCountLoader,
+)
 from graphql_api.helpers.connection import (
+    TotalCountStrategy,
     queryset_to_connection,
     queryset_to_connection_sync,
 )
 from graphql_api.helpers.lookahead import lookahead
+from graphql_api.helpers.report_registry import ReportRegistry
 from graphql_api.types.enums import OrderingDirection
 from graphql_api.types.errors.errors import NotFoundError, OwnerNotActivatedError
 from services.components import ComponentMeasurements
 from services.profiling import CriticalFile, ProfilingSummary
 from timeseries.helpers import fill_sparse_measurements
-from timeseries.models import Dataset, Interval, MeasurementName, MeasurementSummary
+from timeseries.models import Interval, MeasurementName, MeasurementSummary
 
 repository_bindable = ObjectType("Repository")
 
@@ -111,6 +118,7 @@ async def resolve_pulls(
         queryset,
         ordering=("pullid",),
         ordering_direction=ordering_direction,
+        count_strategy=TotalCountStrategy.CACHED,
         **kwargs,
     )
 
@@ -123,6 +131,7 @@ async def resolve_commits(repository, info, filters=None, **kwargs):
         queryset,
         ordering=("timestamp",),
         ordering_direction=OrderingDirection.DESC,
+        count_strategy=TotalCountStrategy.ESTIMATED,
         **kwargs,
     )
 
@@ -132,6 +141,12 @@ async def resolve_commits(repository, info, filters=None, **kwargs):
         loader = CommitLoader.loader(info, repository.repoid)
         loader.cache(commit)
 
+    node = lookahead(info, ("edges", "node"))
+    if node and node.field_names & ReportRegistry.report_fields:
+        await sync_to_async(ReportRegistry.for_info(info).prefetch)(
+            [edge["node"] for edge in connection.edges]
+        )
+
     return connection
 
 
@@ -144,6 +159,7 @@ async def resolve_branches(repository, info, filters=None, **kwargs):
         queryset,
         ordering=("updatestamp",),
         ordering_direction=OrderingDirection.DESC,
+        count_strategy=TotalCountStrategy.CACHED,
         **kwargs,
     )
 
@@ -252,33 +268,29 @@ def resolve_active(repository: Repository, info) -> bool:
 
 
 @repository_bindable.field("flagsCount")
-@sync_to_async
-def resolve_flags_count(repository: Repository, info) -> int:
-    return repository.flags.filter(deleted__isnot=True).count()
+async def resolve_flags_count(repository: Repository, info) -> int:
+    return await FlagsCountLoader.loader(info).load(repository.pk)
 
 
 @repository_bindable.field("flagsMeasurementsActive")
-@sync_to_async
-def resolve_flags_measurements_active(repository: Repository, info) -> bool:
+async def resolve_flags_measurements_active(repository: Repository, info) -> bool:
     if not settings.TIMESERIES_ENABLED:
         return False
 
-    return Dataset.objects.filter(
-        name=MeasurementName.FLAG_COVERAGE.value,
-        repository_id=repository.pk,
-    ).exists()
+    dataset = await DatasetLoader.loader(
+        info, MeasurementName.FLAG_COVERAGE.value
+    ).load(repository.pk)
+    return dataset is not None
 
 
 @repository_bindable.field("flagsMeasurementsBackfilled")
-@sync_to_async
-def resolve_flags_measurements_backfilled(repository: Repository, info) -> bool:
+async def resolve_flags_measurements_backfilled(repository: Repository, info) -> bool:
     if not settings.TIMESERIES_ENABLED:
         return False
 
-    dataset = Dataset.objects.filter(
-        name=MeasurementName.FLAG_COVERAGE.value,
-        repository_id=repository.pk,
-    ).first()
+    dataset = await DatasetLoader.loader(
+        info, MeasurementName.FLAG_COVERAGE.value
+    ).load(repository.pk)
 
     if not dataset:
         return False
@@ -287,27 +299,26 @@ def resolve_flags_measurements_backfilled(repository: Repository, info) -> bool:
 
 
 @repository_bindable.field("componentsMeasurementsActive")
-@sync_to_async
-def resolve_components_measurements_active(repository: Repository, info) -> bool:
+async def resolve_components_measurements_active(repository: Repository, info) -> bool:
     if not settings.TIMESERIES_ENABLED:
         return False
 
-    return Dataset.objects.filter(
-        name=MeasurementName.COMPONENT_COVERAGE.value,
-        repository_id=repository.pk,
-    ).exists()
+    dataset = await DatasetLoader.loader(
+        info, MeasurementName.COMPONENT_COVERAGE.value
+    ).load(repository.pk)
+    return dataset is not None
 
 
 @repository_bindable.field("componentsMeasurementsBackfilled")
-@sync_to_async
-def resolve_components_measurements_backfilled(repository: Repository, info) -> bool:
+async def resolve_components_measurements_backfilled(
+    repository: Repository, info
+) -> bool:
     if not settings.TIMESERIES_ENABLED:
         return False
 
-    dataset = Dataset.objects.filter(
-        name=MeasurementName.COMPONENT_COVERAGE.value,
-        repository_id=repository.pk,
-    ).first()
+    dataset = await DatasetLoader.loader(
+        info, MeasurementName.COMPONENT_COVERAGE.value
+    ).load(repository.pk)
 
     if not dataset:
         return False
@@ -316,15 +327,8 @@ def resolve_components_measurements_backfilled(repository: Repository, info) ->
 
 
 @repository_bindable.field("componentsCount")
-@sync_to_async
-def resolve_components_count(repository: Repository, info) -> int:
-    repo_yaml_components = UserYaml.get_final_yaml(
-        owner_yaml=repository.author.yaml,
-        repo_yaml=repository.yaml,
-        ownerid=repository.author.ownerid,
-    ).get_components()
-
-    return len(repo_yaml_components)
+async def resolve_components_count(repository: Repository, info) -> int:
+    return await ComponentsCountLoader.loader(info).load(repository.pk)
 
 
 @repository_bindable.field("isATSConfigured")
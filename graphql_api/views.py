@@ -56,8 +56,18 @@ class RequestFinalizer:
     def __enter__(self):
         pass
 
+    def _log_report_registry(self):
+        """
+        Reports how many report builds were avoided by sharing reports between
+        resolvers (see `graphql_api.helpers.report_registry.ReportRegistry`)
+        """
+        registry = getattr(self.request, "report_registry", None)
+        if registry is not None:
+            log.info("GraphQL report registry", extra=registry.counters)
+
     def __exit__(self, exc_type, exc_value, exc_traceback):
         self._remove_temp_files()
+        self._log_report_registry()
 
 
 class AsyncGraphqlView(GraphQLAsyncView):
@@ -1,13 +1,18 @@
 import json
 import logging
+import threading
 from base64 import b16encode
+from concurrent.futures import ThreadPoolExecutor, wait
 from enum import Enum
 from hashlib import md5
+from typing import Dict, Iterable, Optional
 from uuid import uuid4
+from weakref import WeakKeyDictionary
 
 from django.conf import settings
 from django.utils import timezone
 from minio import Minio
+from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.ReportEncoder import ReportEncoder
 
 from services.storage import StorageService
@@ -39,6 +44,19 @@ class MinioEndpoints(Enum):
         return self.value.format(**kwaargs)
 
 
+# shared by all batch reads so that the number of concurrent reads is bounded
+_read_executor = ThreadPoolExecutor(
+    max_workers=settings.ARCHIVE_READ_CONCURRENCY,
+    thread_name_prefix="archive-read",
+)
+
+# `ArchiveService`s memoized per repository.  Model instances compare by primary key
+# so all the instances of a repository share the service, which is dropped once the
+# instance it was created for is garbage collected.
+_services = WeakKeyDictionary()
+_services_lock = threading.Lock()
+
+
 # Service class for performing archive operations. Meant to work against the
 # underlying StorageService
 class ArchiveService(object):
@@ -73,6 +91,22 @@ class ArchiveService(object):
         self.storage = StorageService()
         self.storage_hash = self.get_archive_hash(repository)
 
+    """
+    Returns an ArchiveService for the given repository, reusing the one created
+    for (any instance of) the same repository while that instance is alive.
+    """
+
+    @classmethod
+    def for_repository(cls, repository):
+        if repository.pk is None:
+            return cls(repository)
+        with _services_lock:
+            service = _services.get(repository)
+            if service is None:
+                service = cls(repository)
+                _services[repository] = service
+            return service
+
     """
     Accessor for underlying StorageService. You typically shouldn't need
     this for anything.
@@ -209,6 +243,41 @@ class ArchiveService(object):
         contents = self.storage.read_file(self.root, path)
         return contents.decode()
 
+    """
+    Reads many files from the archive concurrently (sharing the minio client).
+    Returns the contents of each path, or `None` for files that are missing,
+    failed to be read or weren't read within `timeout` seconds.
+    """
+
+    def read_files(
+        self, paths: Iterable[str], timeout: Optional[float] = None
+    ) -> Dict[str, Optional[str]]:
+        if timeout is None:
+            timeout = settings.ARCHIVE_READ_TIMEOUT
+        futures = {
+            path: _read_executor.submit(self.read_file, path) for path in set(paths)
+        }
+        wait(futures.values(), timeout=timeout)
+
+        results = {}
+        for path, future in futures.items():
+            results[path] = None
+            if not future.done():
+                future.cancel()
+                log.warning(
+                    "Timed out reading file from archive", extra=dict(path=path)
+                )
+            elif future.exception() is not None:
+                if not isinstance(future.exception(), FileNotInStorageError):
+                    log.warning(
+                        "Error reading file from archive",
+                        extra=dict(path=path),
+                        exc_info=future.exception(),
+                    )
+            else:
+                results[path] = future.result()
+        return results
+
     """
     Generic method to delete a file from the archive.
     """
@@ -1,18 +1,27 @@
 import asyncio
-import copy
 import functools
 import json
 import logging
-from collections import Counter
+import re
+import threading
+import zlib
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Optional, Tuple
 
 import minio
 import pytz
+import sentry_sdk
 from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connections
 from django.db.models import Prefetch, QuerySet
 from django.utils.functional import cached_property
+from redis.exceptions import RedisError
 from shared.helpers.yaml import walk
 from shared.reports.readonly import ReadOnlyReport
 from shared.reports.types import ReportTotals
@@ -36,6 +45,19 @@ redis = get_redis_connection()
 
 MAX_DIFF_SIZE = 170
 
+_UNSET = object()
+
+# compact encoding of line coverage types used by `CreateLineArraysVisitor`:
+# `_ABSENT` for lines missing from a report file, otherwise the index into `_LINE_TYPES`
+_ABSENT = -1
+_LINE_TYPES = (None, *LineType)
+_LINE_TYPE_CODES = {line_type: code for code, line_type in enumerate(_LINE_TYPES)}
+_SUMMARY_KEYS = {
+    _LINE_TYPE_CODES[LineType.hit]: "hits",
+    _LINE_TYPE_CODES[LineType.miss]: "misses",
+    _LINE_TYPE_CODES[LineType.partial]: "partials",
+}
+
 
 def _is_added(line_value):
     return line_value and line_value[0] == "+"
@@ -101,14 +123,15 @@ class FileComparisonTraverseManager:
             }
 
             The segment["header"], also known as the hunk-header (https://en.wikipedia.org/wiki/Diff#Unified_format),
-            is an array of strings, which is why we have to use the int() builtin function
-            to compare with self.head_ln and self.base_ln. It is used by this algorithm to
+            is an array of strings. The headers are parsed into integer tuples once, up-front,
+            and are used by this algorithm to
               1. Set initial values for the self.base_ln and self.head_ln line-counters, and
               2. Detect if self.base and/or self.head refer to lines in the diff at any given time
 
             This algorithm relies on the fact that segments are returned in ascending
             order for each file, which means that the "nearest" segment to the current line
-            being traversed is located at segments[0].
+            being traversed is the one at the segment cursor. Segments are never modified:
+            traversal walks a (segment index, line index) cursor over them instead.
 
         src -- this is the source code of the file at the head-reference, where each line
             is a cell in the array. If we are not traversing a segment, and src is provided,
@@ -116,44 +139,56 @@ class FileComparisonTraverseManager:
         """
         self.head_file_eof = head_file_eof
         self.base_file_eof = base_file_eof
-        self.segments = copy.deepcopy(segments)
         self.src = src
 
-        if self.segments:
+        # (base offset, base length, head offset, head length) for each segment
+        self._headers = [
+            (
+                int(segment["header"][0]),
+                int(segment["header"][1] or 1),
+                int(segment["header"][2]),
+                int(segment["header"][3] or 1),
+            )
+            for segment in segments
+        ]
+        self._segment_lines = [segment.get("lines", []) for segment in segments]
+        self._segment_idx = 0
+        self._line_idx = 0
+
+        if self._headers:
             # Base offsets can be 0 if files are added or removed
-            self.base_ln = min(1, int(self.segments[0]["header"][0]))
-            self.head_ln = min(1, int(self.segments[0]["header"][2]))
+            self.base_ln = min(1, self._headers[0][0])
+            self.head_ln = min(1, self._headers[0][2])
         else:
             self.base_ln, self.head_ln = 1, 1
 
+    def _has_segments(self):
+        return self._segment_idx < len(self._headers)
+
     def traverse_finished(self):
-        if self.segments:
+        if self._has_segments():
             return False
         if self.src:
             return self.head_ln > len(self.src)
         return self.head_ln >= self.head_file_eof and self.base_ln >= self.base_file_eof
 
     def traversing_diff(self):
-        if self.segments == []:
+        if not self._has_segments():
             return False
 
-        base_ln_within_offset = (
-            int(self.segments[0]["header"][0])
-            <= self.base_ln
-            < int(self.segments[0]["header"][0])
-            + int(self.segments[0]["header"][1] or 1)
-        )
-        head_ln_within_offset = (
-            int(self.segments[0]["header"][2])
-            <= self.head_ln
-            < int(self.segments[0]["header"][2])
-            + int(self.segments[0]["header"][3] or 1)
+        base_start, base_length, head_start, head_length = self._headers[
+            self._segment_idx
+        ]
+        return (
+            base_start <= self.base_ln < base_start + base_length
+            or head_start <= self.head_ln < head_start + head_length
         )
-        return base_ln_within_offset or head_ln_within_offset
 
     def pop_line(self):
         if self.traversing_diff():
-            return self.segments[0]["lines"].pop(0)
+            line = self._segment_lines[self._segment_idx][self._line_idx]
+            self._line_idx += 1
+            return line
 
         if self.src:
             return self.src[self.head_ln - 1]
@@ -169,30 +204,42 @@ class FileComparisonTraverseManager:
         visitors -- A list of visitors applied to each line.
         """
         while not self.traverse_finished():
-            line_value = self.pop_line()
             is_diff = self.traversing_diff()
+            if is_diff:
+                line_value = self._segment_lines[self._segment_idx][self._line_idx]
+                self._line_idx += 1
+            elif self.src:
+                line_value = self.src[self.head_ln - 1]
+            else:
+                line_value = None
+
+            added = is_diff and _is_added(line_value)
+            removed = is_diff and _is_removed(line_value)
 
             for visitor in visitors:
                 visitor(
-                    None if is_diff and _is_added(line_value) else self.base_ln,
-                    None if is_diff and _is_removed(line_value) else self.head_ln,
+                    None if added else self.base_ln,
+                    None if removed else self.head_ln,
                     line_value,
                     is_diff,  # TODO(pierce): remove when upon combining diff + changes tabs in UI
                 )
 
-            if is_diff and _is_added(line_value):
+            if added:
                 self.head_ln += 1
-            elif is_diff and _is_removed(line_value):
+            elif removed:
                 self.base_ln += 1
             else:
                 self.head_ln += 1
                 self.base_ln += 1
 
-            if self.segments and not self.segments[0]["lines"]:
+            if self._has_segments() and self._line_idx >= len(
+                self._segment_lines[self._segment_idx]
+            ):
                 # Either the segment has no lines (and is therefore of no use)
-                # or all lines have been popped and visited, which means we are
+                # or all lines have been visited, which means we are
                 # done traversing it
-                self.segments.pop(0)
+                self._segment_idx += 1
+                self._line_idx = 0
 
 
 class FileComparisonVisitor:
@@ -311,7 +358,152 @@ class CreateChangeSummaryVisitor(FileComparisonVisitor):
         self._update_summary(base_line, head_line)
 
 
+class CreateLineArraysVisitor(FileComparisonVisitor):
+    """
+    An alternative to `CreateChangeSummaryVisitor` + `CreateLineComparisonVisitor`.
+
+    The coverage type of every line in the base and head files is decoded once into
+    compact arrays, and traversed lines are recorded in a columnar form. The change
+    summary and the lines of interest for segments are computed from those arrays,
+    and `LineComparison` objects are only created for the lines that are requested.
+    """
+
+    def __init__(self, base_file, head_file):
+        self.base_file, self.head_file = base_file, head_file
+        self._base_line_types = self._decode_line_types(base_file)
+        self._head_line_types = self._decode_line_types(head_file)
+
+        # one entry per traversed line
+        self.base_lns = array("q")
+        self.head_lns = array("q")
+        self.base_types = array("b")
+        self.head_types = array("b")
+        self.diffs = array("b")
+        self.values = []
+
+    @staticmethod
+    def _decode_line_types(report_file) -> array:
+        line_types = array("b")
+        if report_file is None:
+            return line_types
+
+        for line in report_file._lines:
+            if not line:
+                line_types.append(_ABSENT)
+                continue
+            if type(line) is not list:
+                line = json.loads(line)
+            line_types.append(_LINE_TYPE_CODES[line_type(line[0])])
+        return line_types
+
+    @staticmethod
+    def _line_type_at(line_types, ln):
+        if ln is None or not line_types:
+            return _ABSENT
+        # same indexing as `_get_line`
+        try:
+            return line_types[ln - 1]
+        except IndexError:
+            return _ABSENT
+
+    def __call__(self, base_ln, head_ln, value, is_diff):
+        self.base_lns.append(-1 if base_ln is None else base_ln)
+        self.head_lns.append(-1 if head_ln is None else head_ln)
+        self.base_types.append(self._line_type_at(self._base_line_types, base_ln))
+        self.head_types.append(self._line_type_at(self._head_line_types, head_ln))
+        self.diffs.append(bool(is_diff))
+        self.values.append(value)
+
+    @cached_property
+    def change_summary(self) -> Counter:
+        """
+        Same result as `CreateChangeSummaryVisitor.summary`
+        """
+        summary = Counter()
+        for value, base_type, head_type in zip(
+            self.values, self.base_types, self.head_types
+        ):
+            if base_type == head_type or base_type == _ABSENT or head_type == _ABSENT:
+                continue
+            if value and value[0] in ["+", "-"]:
+                continue
+            summary[_SUMMARY_KEYS[base_type]] -= 1
+            summary[_SUMMARY_KEYS[head_type]] += 1
+        return summary
+
+    @cached_property
+    def _line_indexes(self) -> List[int]:
+        # positions of the traversed lines that `CreateLineComparisonVisitor` would keep
+        return [idx for idx, value in enumerate(self.values) if value is not None]
+
+    @property
+    def num_lines(self) -> int:
+        return len(self._line_indexes)
+
+    def lines_of_interest(self) -> List[int]:
+        """
+        Positions (within `self.lines(...)`) of lines where either coverage
+        or code has changed.
+        """
+        result = []
+        for position, idx in enumerate(self._line_indexes):
+            if self.diffs[idx]:
+                value = self.values[idx]
+                if _is_added(value) or _is_removed(value):
+                    result.append(position)
+                    continue
+            # coverage types for missing lines and lines without one are both `None`
+            if max(self.base_types[idx], 0) != max(self.head_types[idx], 0):
+                result.append(position)
+        return result
+
+    def lines(self, start=0, end=None) -> List["LineComparison"]:
+        """
+        Creates `LineComparison`s for the lines at positions [start, end)
+        """
+        lines = []
+        for idx in self._line_indexes[start:end]:
+            base_ln = self.base_lns[idx] if self.base_lns[idx] >= 0 else None
+            head_ln = self.head_lns[idx] if self.head_lns[idx] >= 0 else None
+            base_line, head_line = self._get_lines(base_ln, head_ln)
+            lines.append(
+                LineComparison(
+                    base_line=base_line,
+                    head_line=head_line,
+                    base_ln=base_ln,
+                    head_ln=head_ln,
+                    value=self.values[idx],
+                    is_diff=bool(self.diffs[idx]),
+                )
+            )
+        return lines
+
+
 class LineComparison:
+    """
+    The comparison of a single line between the base and head files.
+
+    Many of these are created for each file comparison so they use `__slots__`,
+    and line numbers and coverage types are computed once up-front. `number` and
+    `coverage` are still available as dicts for serializers and resolvers.
+    """
+
+    __slots__ = (
+        "base_line",
+        "head_line",
+        "head_ln",
+        "base_ln",
+        "value",
+        "is_diff",
+        "added",
+        "removed",
+        "base_number",
+        "head_number",
+        "base_coverage",
+        "head_coverage",
+        "_hit_session_ids",
+    )
+
     def __init__(self, base_line, head_line, base_ln, head_ln, value, is_diff):
         self.base_line = base_line
         self.head_line = head_line
@@ -323,25 +515,33 @@ class LineComparison:
         self.added = is_diff and _is_added(value)
         self.removed = is_diff and _is_removed(value)
 
+        self.base_number = base_ln if not self.added else None
+        self.head_number = head_ln if not self.removed else None
+        self.base_coverage = (
+            None if self.added or not base_line else line_type(base_line[0])
+        )
+        self.head_coverage = (
+            None if self.removed or not head_line else line_type(head_line[0])
+        )
+
+        # computed lazily (`None` is a valid value)
+        self._hit_session_ids = _UNSET
+
     @property
     def number(self):
         return {
-            "base": self.base_ln if not self.added else None,
-            "head": self.head_ln if not self.removed else None,
+            "base": self.base_number,
+            "head": self.head_number,
         }
 
     @property
     def coverage(self):
         return {
-            "base": None
-            if self.added or not self.base_line
-            else line_type(self.base_line[0]),
-            "head": None
-            if self.removed or not self.head_line
-            else line_type(self.head_line[0]),
+            "base": self.base_coverage,
+            "head": self.head_coverage,
         }
 
-    @cached_property
+    @property
     def head_line_sessions(self) -> Optional[List[tuple]]:
         if self.head_line is None:
             return None
@@ -357,20 +557,19 @@ class LineComparison:
 
         return sessions
 
-    @cached_property
+    @property
     def hit_count(self) -> Optional[int]:
-        if self.head_line_sessions is None:
-            return None
+        hit_session_ids = self.hit_session_ids
+        if hit_session_ids is not None:
+            return len(hit_session_ids)
 
-        hit_count = 0
-        for (id, coverage, *rest) in self.head_line_sessions:
-            if line_type(coverage) == LineType.hit:
-                hit_count += 1
-        if hit_count > 0:
-            return hit_count
-
-    @cached_property
+    @property
     def hit_session_ids(self) -> Optional[List[int]]:
+        if self._hit_session_ids is _UNSET:
+            self._hit_session_ids = self._get_hit_session_ids()
+        return self._hit_session_ids
+
+    def _get_hit_session_ids(self) -> Optional[List[int]]:
         if self.head_line_sessions is None:
             return None
 
@@ -396,18 +595,43 @@ class Segment:
 
     @classmethod
     def segments(cls, file_comparison):
+        if file_comparison.use_line_arrays:
+            return cls.segments_from_line_arrays(file_comparison.line_arrays)
+
         lines = file_comparison.lines
 
         # line numbers of interest (i.e. coverage changed or code changed)
         line_numbers = []
         for idx, line in enumerate(lines):
-            if (
-                line.coverage["base"] != line.coverage["head"]
-                or line.added
-                or line.removed
-            ):
+            if line.base_coverage != line.head_coverage or line.added or line.removed:
                 line_numbers.append(idx)
 
+        return [
+            cls(lines[start_line_number : end_line_number + 1])
+            for start_line_number, end_line_number in cls._line_ranges(
+                line_numbers, len(lines)
+            )
+        ]
+
+    @classmethod
+    def segments_from_line_arrays(cls, line_arrays):
+        """
+        Same as `segments` but only creates `LineComparison`s for the lines
+        that end up in a segment.
+        """
+        return [
+            cls(line_arrays.lines(start_line_number, end_line_number + 1))
+            for start_line_number, end_line_number in cls._line_ranges(
+                line_arrays.lines_of_interest(), line_arrays.num_lines
+            )
+        ]
+
+    @classmethod
+    def _line_ranges(cls, line_numbers, num_lines):
+        """
+        Groups the line numbers of interest and returns the (inclusive) range
+        of line numbers for each segment, including padding.
+        """
         segmented_lines = []
         if len(line_numbers) > 0:
             segmented_lines, last = [[]], None
@@ -418,19 +642,17 @@ class Segment:
                     segmented_lines.append([line_number])
                 last = line_number
 
-        segments = []
+        ranges = []
         for group in segmented_lines:
             # padding lines before first line of interest
             start_line_number = group[0] - cls.padding_lines
             start_line_number = max(start_line_number, 0)
             # padding lines after last line of interest
             end_line_number = group[-1] + cls.padding_lines
-            end_line_number = min(end_line_number, len(lines) - 1)
+            end_line_number = min(end_line_number, num_lines - 1)
+            ranges.append((start_line_number, end_line_number))
 
-            segment = cls(lines[start_line_number : end_line_number + 1])
-            segments.append(segment)
-
-        return segments
+        return ranges
 
     def __init__(self, lines):
         self._lines = lines
@@ -444,10 +666,10 @@ class Segment:
         num_context = 0
 
         for line in self.lines:
-            if base_start is None and line.number["base"] is not None:
-                base_start = int(line.number["base"])
-            if head_start is None and line.number["head"] is not None:
-                head_start = int(line.number["head"])
+            if base_start is None and line.base_number is not None:
+                base_start = int(line.base_number)
+            if head_start is None and line.head_number is not None:
+                head_start = int(line.head_number)
             if line.added:
                 num_added += 1
             elif line.removed:
@@ -476,9 +698,9 @@ class Segment:
     @property
     def has_unintended_changes(self):
         for line in self.lines:
-            head_coverage = line.coverage["base"]
-            base_coverage = line.coverage["head"]
-            if not (line.added or line.removed) and (base_coverage != head_coverage):
+            if not (line.added or line.removed) and (
+                line.base_coverage != line.head_coverage
+            ):
                 return True
         return False
 
@@ -492,6 +714,7 @@ class FileComparison:
         src=[],
         bypass_max_diff=False,
         should_search_for_changes=None,
+        use_line_arrays=False,
     ):
         """
         comparison -- the enclosing Comparison object that owns this FileComparison
@@ -527,6 +750,9 @@ class FileComparison:
             3. None (default) - indicates we do not have information cached from worker to rely on here
                 (no value in cache), so we need to traverse this FileComparison and calculate a change
                 summary to find out.
+
+        use_line_arrays -- compute the change summary, lines and segments with `CreateLineArraysVisitor`
+            instead of creating a `LineComparison` for every line in the file.
         """
         self.base_file = base_file
         self.head_file = head_file
@@ -545,6 +771,7 @@ class FileComparison:
 
         self.bypass_max_diff = bypass_max_diff
         self.should_search_for_changes = should_search_for_changes
+        self.use_line_arrays = use_line_arrays
 
     @property
     def name(self):
@@ -581,8 +808,7 @@ class FileComparison:
     def stats(self):
         return self.diff_data["stats"] if self.diff_data else None
 
-    @cached_property
-    def _calculated_changes_and_lines(self):
+    def _traverse(self, visitors):
         """
         Applies visitors to the file to generate response data (line comparison representations
         and change summary). Only applies visitors if
@@ -593,13 +819,6 @@ class FileComparison:
         This limitation improves performance by limiting searching for changes to only files that
         have them.
         """
-        change_summary_visitor = CreateChangeSummaryVisitor(
-            self.base_file, self.head_file
-        )
-        create_lines_visitor = CreateLineComparisonVisitor(
-            self.base_file, self.head_file
-        )
-
         if self.diff_data or self.src or self.should_search_for_changes is not False:
             FileComparisonTraverseManager(
                 head_file_eof=self.head_file.eof if self.head_file is not None else 0,
@@ -608,12 +827,29 @@ class FileComparison:
                 if self.diff_data and "segments" in self.diff_data
                 else [],
                 src=self.src,
-            ).apply([change_summary_visitor, create_lines_visitor])
+            ).apply(visitors)
 
+    @cached_property
+    def _calculated_changes_and_lines(self):
+        change_summary_visitor = CreateChangeSummaryVisitor(
+            self.base_file, self.head_file
+        )
+        create_lines_visitor = CreateLineComparisonVisitor(
+            self.base_file, self.head_file
+        )
+        self._traverse([change_summary_visitor, create_lines_visitor])
         return change_summary_visitor.summary, create_lines_visitor.lines
 
+    @cached_property
+    def line_arrays(self) -> CreateLineArraysVisitor:
+        line_arrays_visitor = CreateLineArraysVisitor(self.base_file, self.head_file)
+        self._traverse([line_arrays_visitor])
+        return line_arrays_visitor
+
     @cached_property
     def change_summary(self):
+        if self.use_line_arrays:
+            return self.line_arrays.change_summary
         return self._calculated_changes_and_lines[0]
 
     @property
@@ -624,6 +860,8 @@ class FileComparison:
     def lines(self):
         if self.total_diff_length > MAX_DIFF_SIZE and not self.bypass_max_diff:
             return None
+        if self.use_line_arrays:
+            return self.line_arrays.lines()
         return self._calculated_changes_and_lines[1]
 
     @cached_property
@@ -631,6 +869,104 @@ class FileComparison:
         return Segment.segments(self)
 
 
+class GitCompareCache:
+    """
+    Cache of provider compares between two commits.  Commit SHAs are immutable so a
+    compare never changes and entries never need to be invalidated - the TTL only
+    exists to bound the size of Redis.
+
+    Compares are stored compressed in Redis and in a process-local LRU in front of it
+    (bounded by the compressed size).  Each `get` decodes a fresh copy so that callers
+    are free to mutate the result.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        use_redis: bool = False,
+        redis_ttl: int = 7 * 24 * 3600,
+    ):
+        self.max_bytes = max_bytes
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(repository, base_sha: str, head_sha: str) -> str:
+        return f"git-compare/{repository.repoid}/{base_sha}/{head_sha}"
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+
+        if value is None and self.use_redis:
+            try:
+                value = redis.get(key)
+            except RedisError:
+                log.warning("Error reading git compare from cache", extra=dict(key=key))
+            if value is not None:
+                self._local_set(key, value)
+
+        if value is None:
+            return None
+        return json.loads(zlib.decompress(value))
+
+    def set(self, key: str, compare: dict):
+        value = zlib.compress(json.dumps(compare).encode())
+        self._local_set(key, value)
+        if self.use_redis:
+            try:
+                redis.set(key, value, ex=self.redis_ttl)
+            except RedisError:
+                log.warning("Error writing git compare to cache", extra=dict(key=key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _local_set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            existing = self._entries.pop(key, None)
+            if existing is not None:
+                self._size -= len(existing)
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+git_compare_cache = GitCompareCache(
+    max_bytes=settings.GIT_COMPARE_CACHE_MAX_BYTES,
+    use_redis=settings.GIT_COMPARE_CACHE_REDIS_ENABLED,
+    redis_ttl=settings.GIT_COMPARE_CACHE_REDIS_TTL,
+)
+
+
+async def get_git_compare(adapter, repository, base_sha: str, head_sha: str) -> dict:
+    """
+    Returns the provider compare between `base_sha` and `head_sha`, going through
+    `git_compare_cache` when it's enabled.
+    """
+    if not settings.GIT_COMPARE_CACHE_ENABLED:
+        return await adapter.get_compare(base_sha, head_sha)
+
+    key = GitCompareCache.key(repository, base_sha, head_sha)
+    compare = git_compare_cache.get(key)
+    if compare is None:
+        compare = await adapter.get_compare(base_sha, head_sha)
+        git_compare_cache.set(key, compare)
+    return compare
+
+
 class Comparison(object):
     def __init__(self, user, base_commit, head_commit):
         # TODO: rename to owner
@@ -639,10 +975,91 @@ class Comparison(object):
         self._head_commit = head_commit
 
     def validate(self):
+        if settings.COMPARISON_PREFETCH_ENABLED:
+            self.prefetch()
+
         # make sure head and base reports exist (will throw an error if not)
         self.head_report
         self.base_report
 
+    def prefetch(self):
+        """
+        Loads the base report, the head report and the git comparison concurrently
+        instead of one after the other as they're accessed, so that the total latency
+        is that of the slowest of them.  Anything that has already been loaded is
+        not fetched again.
+
+        Errors are not raised here: the corresponding property is left unset and
+        will raise as usual when it's accessed.
+        """
+        # commits are resolved here since they may need to be fetched from the database
+        base_commit, head_commit = self.base_commit, self.head_commit
+        parent_span = sentry_sdk.Hub.current.scope.span
+
+        legs = {}
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            if "_fetch_comparison_and_reverse_comparison" not in self.__dict__:
+                legs["git_comparison"] = executor.submit(
+                    self._prefetch_leg,
+                    parent_span,
+                    "Fetch git comparison",
+                    lambda: self._fetch_comparison_and_reverse_comparison,
+                )
+            if "base_report" not in self.__dict__:
+                legs["base_report"] = executor.submit(
+                    self._prefetch_leg,
+                    parent_span,
+                    "Fetch base report",
+                    self._load_report,
+                    base_commit,
+                    "Missing base report",
+                )
+            if "head_report" not in self.__dict__:
+                legs["head_report"] = executor.submit(
+                    self._prefetch_leg,
+                    parent_span,
+                    "Fetch head report",
+                    self._load_report,
+                    head_commit,
+                    "Missing head report",
+                )
+
+        results = {}
+        for name, future in legs.items():
+            try:
+                results[name] = future.result()
+            except Exception:
+                log.warning(
+                    "Failed to prefetch comparison data",
+                    extra=dict(name=name),
+                    exc_info=True,
+                )
+
+        # populate the `cached_property`s as though they had been accessed
+        if results.get("base_report") is not None:
+            self.__dict__["base_report"] = results["base_report"]
+        if (
+            results.get("head_report") is not None
+            and "_fetch_comparison_and_reverse_comparison" in self.__dict__
+        ):
+            report = results["head_report"]
+            report.apply_diff(self.git_comparison["diff"])
+            self.__dict__["head_report"] = report
+
+    @staticmethod
+    def _prefetch_leg(parent_span, description, fn, *args):
+        span = (
+            parent_span.start_child(op="prefetch", description=description)
+            if parent_span is not None
+            else nullcontext()
+        )
+        try:
+            with span:
+                return fn(*args)
+        finally:
+            # database connections are per-thread
+            connections.close_all()
+
     @cached_property
     def base_commit(self):
         return self._base_commit
@@ -687,32 +1104,29 @@ class Comparison(object):
             diff_data=diff_data,
             src=src,
             bypass_max_diff=bypass_max_diff,
+            use_line_arrays=settings.COMPARISON_LINE_ARRAYS_ENABLED,
         )
 
     @property
     def git_comparison(self):
         return self._fetch_comparison_and_reverse_comparison[0]
 
-    @cached_property
-    def base_report(self):
+    def _load_report(self, commit, missing_message):
         try:
-            return report_service.build_report_from_commit(self.base_commit)
+            return report_service.build_report_from_commit(commit)
         except minio.error.S3Error as e:
             if e.code == "NoSuchKey":
-                raise MissingComparisonReport("Missing base report")
+                raise MissingComparisonReport(missing_message)
             else:
                 raise e
 
     @cached_property
-    def head_report(self):
-        try:
-            report = report_service.build_report_from_commit(self.head_commit)
-        except minio.error.S3Error as e:
-            if e.code == "NoSuchKey":
-                raise MissingComparisonReport("Missing head report")
-            else:
-                raise e
+    def base_report(self):
+        return self._load_report(self.base_commit, "Missing base report")
 
+    @cached_property
+    def head_report(self):
+        report = self._load_report(self.head_commit, "Missing head report")
         report.apply_diff(self.git_comparison["diff"])
         return report
 
@@ -771,12 +1185,13 @@ class Comparison(object):
         adapter = RepoProviderService().get_adapter(
             self.user, self.base_commit.repository
         )
-        comparison_coro = adapter.get_compare(
-            self.base_commit.commitid, self.head_commit.commitid
+        repository = self.base_commit.repository
+        comparison_coro = get_git_compare(
+            adapter, repository, self.base_commit.commitid, self.head_commit.commitid
         )
 
-        reverse_comparison_coro = adapter.get_compare(
-            self.head_commit.commitid, self.base_commit.commitid
+        reverse_comparison_coro = get_git_compare(
+            adapter, repository, self.head_commit.commitid, self.base_commit.commitid
         )
 
         async def runnable():
@@ -918,15 +1333,9 @@ class ImpactedFile:
         """
         Returns the misses count for a direct impacted file
         """
-
-        misses = 0
-
-        diff_coverage = self.added_diff_coverage or []
-        for line_number, line_coverage_value in diff_coverage:
-            if line_coverage_value == "m":
-                misses += 1
-
-        return misses
+        if self.patch_coverage is None:
+            return 0
+        return self.patch_coverage.misses
 
     @cached_property
     def patch_coverage(self) -> Optional[Totals]:
@@ -934,17 +1343,12 @@ class ImpactedFile:
         Sums of hits, misses and partials in the diff
         """
         if self.added_diff_coverage and len(self.added_diff_coverage) > 0:
-            hits, misses, partials = (0, 0, 0)
-            for added_coverage in self.added_diff_coverage:
-                [_, type_coverage] = added_coverage
-                if type_coverage == "h":
-                    hits += 1
-                if type_coverage == "m":
-                    misses += 1
-                if type_coverage == "p":
-                    partials += 1
-
-            return ImpactedFile.Totals(hits=hits, misses=misses, partials=partials)
+            counts = Counter(
+                type_coverage for _, type_coverage in self.added_diff_coverage
+            )
+            return ImpactedFile.Totals(
+                hits=counts["h"], misses=counts["m"], partials=counts["p"]
+            )
 
     @cached_property
     def change_coverage(self) -> Optional[float]:
@@ -963,12 +1367,66 @@ class ImpactedFile:
             return parts[-1]
 
 
+_json_decoder = json.JSONDecoder()
+_json_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+def _index_comparison_files(data: str) -> List[Tuple[Optional[str], int, int]]:
+    """
+    Incrementally decodes the worker's comparison JSON and returns a list of
+    (head_name, start offset, end offset) tuples locating each item of its
+    top-level "files" array within `data`. Other top-level keys are skipped.
+    """
+
+    def skip_whitespace(idx):
+        return _json_whitespace.match(data, idx).end()
+
+    def expect(char, idx):
+        if data[idx : idx + 1] != char:
+            raise ValueError(f"Expected {char!r} at offset {idx}")
+        return idx + 1
+
+    index = []
+    idx = expect("{", skip_whitespace(0))
+    while True:
+        idx = skip_whitespace(idx)
+        if data[idx : idx + 1] == "}":
+            break
+        key, idx = _json_decoder.raw_decode(data, idx)
+        idx = skip_whitespace(expect(":", skip_whitespace(idx)))
+
+        if key == "files":
+            idx = expect("[", idx)
+            while True:
+                idx = skip_whitespace(idx)
+                if data[idx : idx + 1] == "]":
+                    idx += 1
+                    break
+                start = idx
+                item, idx = _json_decoder.raw_decode(data, idx)
+                index.append((item.get("head_name"), start, idx))
+                idx = skip_whitespace(idx)
+                if data[idx : idx + 1] == ",":
+                    idx += 1
+        else:
+            _, idx = _json_decoder.raw_decode(data, idx)
+
+        idx = skip_whitespace(idx)
+        if data[idx : idx + 1] == ",":
+            idx += 1
+    return index
+
+
 @dataclass
 class ComparisonReport(object):
     """
     This is a wrapper around the data computed by the worker's commit comparison task.
     The raw data is stored in blob storage and accessible via the `report_storage_path`
     on a `CommitComparison`
+
+    The location of each impacted file within the raw data is indexed (and the index
+    cached in Redis) so that looking up a single file or counting the files doesn't
+    decode all of them.  Building the index still decodes every file once.
     """
 
     commit_comparison: CommitComparison = None
@@ -984,9 +1442,22 @@ class ComparisonReport(object):
         ]
 
     def impacted_file(self, path: str) -> Optional[ImpactedFile]:
-        for file in self.files:
-            if file.head_name == path:
-                return file
+        if "files" in self.__dict__:
+            # all files have already been decoded
+            for file in self.files:
+                if file.head_name == path:
+                    return file
+            return None
+
+        for head_name, start, end in self._files_index:
+            if head_name == path:
+                return self._decode_file(start, end)
+
+    @property
+    def impacted_files_count(self) -> int:
+        if "files" in self.__dict__:
+            return len(self.files)
+        return len(self._files_index)
 
     @cached_property
     def impacted_files(self) -> List[ImpactedFile]:
@@ -1000,20 +1471,83 @@ class ComparisonReport(object):
     def impacted_files_with_direct_changes(self) -> List[ImpactedFile]:
         return [file for file in self.files if file.has_diff or not file.has_changes]
 
-    def _fetch_raw_comparison_data(self) -> dict:
+    def _decode_file(self, start: int, end: int) -> ImpactedFile:
+        return ImpactedFile.create(**json.loads(self._raw_comparison_data[start:end]))
+
+    @cached_property
+    def _raw_comparison_data(self) -> str:
         """
-        Fetches the raw comparison data from storage
+        Fetches the raw (undecoded) comparison data from storage
         """
+        if not self.commit_comparison.report_storage_path:
+            return ""
+
         repository = self.commit_comparison.compare_commit.repository
-        archive_service = ArchiveService(repository)
+        archive_service = ArchiveService.for_repository(repository)
         try:
-            data = archive_service.read_file(self.commit_comparison.report_storage_path)
-            return json.loads(data)
+            return archive_service.read_file(self.commit_comparison.report_storage_path)
         except:
             log.error(
                 "ComparisonReport - couldn't fetch data from storage", exc_info=True
             )
+            return ""
+
+    def _fetch_raw_comparison_data(self) -> dict:
+        """
+        Fetches the raw comparison data from storage
+        """
+        data = self._raw_comparison_data
+        if not data:
             return {}
+        try:
+            return json.loads(data)
+        except:
+            log.error("ComparisonReport - couldn't decode data", exc_info=True)
+            return {}
+
+    @cached_property
+    def _files_index_key(self) -> str:
+        updated_at = self.commit_comparison.updated_at
+        return "/".join(
+            (
+                "comparison-files-index",
+                self.commit_comparison.report_storage_path,
+                updated_at.isoformat() if updated_at else "",
+            )
+        )
+
+    @cached_property
+    def _files_index(self) -> List[Tuple[Optional[str], int, int]]:
+        data = self._raw_comparison_data
+        if not data:
+            return []
+
+        try:
+            cached = redis.get(self._files_index_key)
+        except (OSError, RedisError) as e:
+            log.warning(f"Error connecting to redis: {e}")
+            cached = None
+        if cached is not None:
+            cached = json.loads(cached)
+            # make sure the index was built from this exact data
+            if cached["length"] == len(data):
+                return [tuple(entry) for entry in cached["index"]]
+
+        try:
+            index = _index_comparison_files(data)
+        except ValueError:
+            log.error("ComparisonReport - couldn't decode data", exc_info=True)
+            return []
+
+        try:
+            redis.set(
+                self._files_index_key,
+                json.dumps(dict(length=len(data), index=index)),
+                ex=86400,  # 1 day in seconds
+            )
+        except (OSError, RedisError) as e:
+            log.warning(f"Error connecting to redis: {e}")
+        return index
 
 
 class PullRequestComparison(Comparison):
@@ -1159,8 +1693,8 @@ class PullRequestComparison(Comparison):
         'self.pull.base' field.
         """
         adapter = RepoProviderService().get_adapter(self.user, self.pull.repository)
-        return async_to_sync(adapter.get_compare)(
-            self.pull.compared_to, self.pull.base
+        return async_to_sync(get_git_compare)(
+            adapter, self.pull.repository, self.pull.compared_to, self.pull.base
         )["diff"]
 
     @cached_property
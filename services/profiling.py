@@ -49,7 +49,7 @@ class ProfilingSummary:
             # no summary available yet for this profiling commit
             return None
 
-        archive_service = ArchiveService(self.repo)
+        archive_service = ArchiveService.for_repository(self.repo)
         try:
             data = archive_service.read_file(profiling_commit.summarized_location)
             return ProfilingSummaryDataAnalyzer(json.loads(data))
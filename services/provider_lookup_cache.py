@@ -0,0 +1,119 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+# seconds a lookup may hold the lock of its key
+lock_timeout = 10
+# seconds other requests wait for the result of the lookup holding the lock
+wait_time = 2
+poll_interval = 0.05
+
+_in_flight: Dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+
+def cached_lookup(key: str, fetch: Callable[[], Optional[object]], ttl: int):
+    """
+    Returns the result of `fetch`, a lookup in a git or CI provider API, cached in
+    Redis for `ttl` seconds.  Results must be JSON serializable, exceptions and
+    `None` results are not cached.
+
+    Concurrent lookups of the same key are coalesced: threads of a process wait for
+    the one already fetching it (and get its result or exception), across processes
+    the first request takes a short lived lock and the others poll for its result,
+    fetching it themselves if it doesn't show up in `wait_time` seconds.
+    Results shared between threads must not be modified.
+    """
+    if not settings.TOKENLESS_LOOKUP_CACHE_ENABLED:
+        return fetch()
+
+    value = _redis_get(key)
+    if value is not None:
+        return value
+
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = _in_flight[key] = Future()
+    if not is_leader:
+        return future.result()
+
+    try:
+        value = _fetch_with_lock(key, fetch, ttl)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(value)
+        return value
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+
+def _fetch_with_lock(key: str, fetch: Callable[[], Optional[object]], ttl: int):
+    lock_key = f"{key}/lock"
+    try:
+        acquired = redis.set(lock_key, 1, nx=True, ex=lock_timeout)
+    except RedisError:
+        log.warning("Error locking provider lookup", extra=dict(key=key))
+        return fetch()
+
+    if not acquired:
+        deadline = time.monotonic() + wait_time
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            value = _redis_get(key)
+            if value is not None:
+                return value
+            if not _redis_exists(lock_key):
+                # the other lookup failed
+                break
+        return fetch()
+
+    try:
+        value = fetch()
+        if value is not None:
+            _redis_set(key, value, ttl)
+        return value
+    finally:
+        try:
+            redis.delete(lock_key)
+        except RedisError:
+            log.warning("Error unlocking provider lookup", extra=dict(key=key))
+
+
+def _redis_get(key: str):
+    try:
+        data = redis.get(key)
+    except RedisError:
+        log.warning("Error reading provider lookup cache", extra=dict(key=key))
+        return None
+    return json.loads(data) if data is not None else None
+
+
+def _redis_exists(key: str) -> bool:
+    try:
+        return bool(redis.exists(key))
+    except RedisError:
+        return False
+
+
+def _redis_set(key: str, value, ttl: int):
+    try:
+        redis.set(key, json.dumps(value), ex=ttl)
+    except RedisError:
+        log.warning("Error writing provider lookup cache", extra=dict(key=key))
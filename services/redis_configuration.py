@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from redis import Redis
 
 from utils.config import get_config
@@ -19,3 +21,18 @@ def get_redis_connection() -> Redis:
 
 def _get_redis_instance_from_url(url):
     return Redis.from_url(url)
+
+
+def get_pooled_redis_connection() -> Redis:
+    """
+    Like `get_redis_connection` but every call (with the same configuration) returns
+    the same client, so that its connection pool is reused across requests instead of
+    connecting again each time.
+    """
+    url = get_redis_url()
+    return _get_pooled_redis_instance_from_url(url)
+
+
+@lru_cache(maxsize=None)
+def _get_pooled_redis_instance_from_url(url):
+    return _get_redis_instance_from_url(url)
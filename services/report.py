@@ -1,10 +1,17 @@
+import copy
 import logging
-from typing import List, Optional
+import pickle
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
 
 import sentry_sdk
 from django.conf import settings
-from django.db.models import Prefetch, Q
+from django.db.models import Prefetch, Q, prefetch_related_objects
 from django.utils.functional import cached_property
+from redis.exceptions import RedisError
 from shared.helpers.flag import Flag
 from shared.reports.readonly import ReadOnlyReport as SharedReadOnlyReport
 from shared.reports.resources import Report
@@ -15,10 +22,14 @@ from shared.utils.sessions import Session, SessionType
 from core.models import Commit
 from reports.models import AbstractTotals, CommitReport, ReportDetails, ReportSession
 from services.archive import ArchiveService
+from services.redis_configuration import get_redis_connection
 from utils.config import RUN_ENV
+from utils.model_utils import prefetch_archive_field
 
 log = logging.getLogger(__name__)
 
+redis = get_redis_connection()
+
 
 class ReportMixin:
     def file_reports(self):
@@ -42,6 +53,11 @@ class ReportMixin:
                     )
         return flags_dict
 
+    @cached_property
+    def file_sessions(self) -> Dict[str, FrozenSet[int]]:
+        """returns dict(:name=frozenset(<session id>)) in file order"""
+        return index_file_sessions(self)
+
 
 class SerializableReport(ReportMixin, Report):
     pass
@@ -60,6 +76,147 @@ def build_report(chunks, files, sessions, totals, report_class=None):
     )
 
 
+@dataclass
+class ReportData:
+    """
+    The ingredients needed to build a report with `build_report`.
+    """
+
+    chunks: str
+    files: dict
+    sessions: dict
+    totals: Any
+
+    def copy(self) -> "ReportData":
+        """
+        Copy whose files, sessions and totals can be modified (as reports built from
+        it do, e.g. `apply_diff`) without affecting this one.
+        """
+        return ReportData(
+            chunks=self.chunks,
+            files=copy.deepcopy(self.files),
+            sessions=copy.deepcopy(self.sessions),
+            totals=copy.deepcopy(self.totals),
+        )
+
+    @property
+    def size(self) -> int:
+        # approximation - chunks dominate the memory footprint of a report
+        return len(self.chunks) + 256 * (len(self.files) + len(self.sessions))
+
+
+class ReportCache:
+    """
+    Process-local LRU cache of `ReportData` bounded by an (approximate) byte budget.
+    When `use_redis` is set then entries are also shared between processes via Redis.
+
+    Keys are expected to include the time at which the report was last updated
+    so that entries are naturally invalidated when the worker updates the report.
+    """
+
+    def __init__(self, max_bytes: int, use_redis: bool = False, redis_ttl: int = 3600):
+        self.max_bytes = max_bytes
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[ReportData]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+
+        if self.use_redis:
+            data = self._redis_get(key)
+            if data is not None:
+                self._local_set(key, data)
+        return data
+
+    def set(self, key: str, data: ReportData):
+        self._local_set(key, data)
+        if self.use_redis:
+            self._redis_set(key, data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _local_set(self, key: str, data: ReportData):
+        size = data.size
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            existing = self._entries.pop(key, None)
+            if existing is not None:
+                self._size -= existing.size
+            self._entries[key] = data
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def _redis_get(self, key: str) -> Optional[ReportData]:
+        try:
+            value = redis.get(key)
+        except RedisError:
+            log.warning("Error reading report from cache", extra=dict(key=key))
+            return None
+        if value is None:
+            return None
+        return pickle.loads(zlib.decompress(value))
+
+    def _redis_set(self, key: str, data: ReportData):
+        try:
+            redis.set(
+                key,
+                zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)),
+                ex=self.redis_ttl,
+            )
+        except RedisError:
+            log.warning("Error writing report to cache", extra=dict(key=key))
+
+
+report_cache = ReportCache(
+    max_bytes=settings.REPORT_CACHE_MAX_BYTES,
+    use_redis=settings.REPORT_CACHE_REDIS_ENABLED,
+    redis_ttl=settings.REPORT_CACHE_REDIS_TTL,
+)
+
+
+def report_cache_key(commit: Commit, new_report_builder_enabled: bool) -> Optional[str]:
+    """
+    Cache key for the report data of the given commit.  The key includes the last
+    time the report was updated so that new uploads result in a different key.
+    Returns `None` if the commit's report cannot be versioned.
+    """
+    updated_at = None
+    if new_report_builder_enabled:
+        updated_at = (
+            CommitReport.objects.coverage_reports()
+            .filter(commit=commit, code=None)
+            .values_list("reportdetails__updated_at", flat=True)
+            .first()
+        )
+    if updated_at is None:
+        updated_at = commit.updatestamp
+    if updated_at is None:
+        return None
+
+    return "/".join(
+        (
+            "report-cache",
+            str(commit.repository_id),
+            commit.commitid,
+            updated_at.isoformat(),
+        )
+    )
+
+
 @sentry_sdk.trace
 def build_report_from_commit(commit: Commit, report_class=None):
     """
@@ -67,6 +224,10 @@ def build_report_from_commit(commit: Commit, report_class=None):
 
     Chunks are fetched from archive storage and the rest of the data is sourced
     from various `reports_*` tables in the database.
+
+    When `REPORT_CACHE_ENABLED` is set, the fetched data is kept in `report_cache`
+    so that subsequent builds of the same (unchanged) report skip storage and
+    most of the database queries.
     """
 
     # TODO: this can be removed once confirmed working well on prod
@@ -77,6 +238,21 @@ def build_report_from_commit(commit: Commit, report_class=None):
         or commit.repository_id in settings.REPORT_BUILDER_REPO_IDS
     )
 
+    cache_key = None
+    if settings.REPORT_CACHE_ENABLED:
+        with sentry_sdk.start_span(description="Fetch report from cache"):
+            cache_key = report_cache_key(commit, new_report_builder_enabled)
+            cached = report_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            data = cached.copy()
+            return build_report(
+                data.chunks,
+                data.files,
+                data.sessions,
+                data.totals,
+                report_class=report_class,
+            )
+
     with sentry_sdk.start_span(description="Fetch files/sessions/totals"):
         commit_report = fetch_commit_report(commit)
         if commit_report and new_report_builder_enabled:
@@ -97,6 +273,13 @@ def build_report_from_commit(commit: Commit, report_class=None):
     try:
         with sentry_sdk.start_span(description="Fetch chunks"):
             chunks = ArchiveService(commit.repository).read_chunks(commit.commitid)
+        if cache_key:
+            report_cache.set(
+                cache_key,
+                ReportData(
+                    chunks=chunks, files=files, sessions=sessions, totals=totals
+                ).copy(),
+            )
         return build_report(chunks, files, sessions, totals, report_class=report_class)
     except FileNotInStorageError:
         log.warning(
@@ -109,13 +292,9 @@ def build_report_from_commit(commit: Commit, report_class=None):
         return None
 
 
-def fetch_commit_report(commit: Commit) -> Optional[CommitReport]:
-    """
-    Fetch a single `CommitReport` for the given commit.
-    All the necessary report relations are prefetched.
-    """
+def _commit_reports_queryset(manager):
     return (
-        commit.reports.coverage_reports()
+        manager.coverage_reports()
         .filter(code=None)
         .prefetch_related(
             Prefetch(
@@ -126,10 +305,54 @@ def fetch_commit_report(commit: Commit) -> Optional[CommitReport]:
             ),
         )
         .select_related("reportdetails", "reportleveltotals")
-        .first()
     )
 
 
+def fetch_commit_report(commit: Commit) -> Optional[CommitReport]:
+    """
+    Fetch a single `CommitReport` for the given commit.
+    All the necessary report relations are prefetched.
+    """
+    if hasattr(commit, "prefetched_reports"):
+        return next(iter(commit.prefetched_reports), None)
+    return _commit_reports_queryset(commit.reports).first()
+
+
+def prefetch_commit_reports(commits: Iterable[Commit]):
+    """
+    Prefetches the `CommitReport`s of many commits at once into their
+    `prefetched_reports` (the first of which `fetch_commit_report` then returns) and
+    loads their `ReportDetails.files_array` with one batched archive read, rather
+    than querying and reading storage for each commit when its report is built.
+    """
+    commits = [
+        commit for commit in commits if not hasattr(commit, "prefetched_reports")
+    ]
+    if not commits:
+        return
+
+    prefetch_related_objects(
+        commits,
+        Prefetch(
+            "reports",
+            # ordered like `fetch_commit_report`'s `first()`
+            queryset=_commit_reports_queryset(CommitReport.objects).order_by("id"),
+            to_attr="prefetched_reports",
+        ),
+    )
+
+    report_details = []
+    for commit in commits:
+        if not commit.prefetched_reports:
+            continue
+        commit_report = commit.prefetched_reports[0]
+        try:
+            report_details.append(commit_report.reportdetails)
+        except CommitReport.reportdetails.RelatedObjectDoesNotExist:
+            pass
+    prefetch_archive_field(report_details, "files_array")
+
+
 def build_totals(totals: AbstractTotals) -> ReportTotals:
     """
     Build a `shared.reports.types.ReportTotals` instance from one of the
@@ -255,8 +478,32 @@ def sessions_with_specific_flags(
     return dict(sessions)
 
 
-def files_in_sessions(commit_report: Report, session_ids: List[int]) -> List[str]:
-    files, session_ids = [], set(session_ids)
+def index_file_sessions(commit_report: Report) -> Dict[str, FrozenSet[int]]:
+    """
+    Maps the name of each file of the report to the ids of the sessions that
+    have coverage on any of its lines.  This walks every line of the report once;
+    reports that mix in `ReportMixin` keep the result as `file_sessions`.
+    """
+    index = {}
+    for file in commit_report:
+        session_ids = set()
+        for line in file:
+            if line:
+                session_ids.update(session.id for session in line.sessions)
+        index[file.name] = frozenset(session_ids)
+    return index
+
+
+def files_in_sessions(commit_report: Report, session_ids: Iterable[int]) -> List[str]:
+    session_ids = set(session_ids)
+    if isinstance(commit_report, ReportMixin):
+        return [
+            name
+            for name, file_session_ids in commit_report.file_sessions.items()
+            if not session_ids.isdisjoint(file_session_ids)
+        ]
+
+    files = []
     for file in commit_report:
         found = False
         for line in file:
@@ -1,11 +1,14 @@
 import json
 from pathlib import Path
+from threading import Event
 from time import time
 from unittest.mock import patch
 
 from django.test import TestCase
 from shared.storage import MinioStorageService
+from shared.storage.exceptions import FileNotInStorageError
 
+from core.models import Repository
 from core.tests.factories import RepositoryFactory
 from services.archive import ArchiveService
 
@@ -21,6 +24,57 @@ class ArchiveServiceTests(TestCase):
         assert service.create_raw_upload_presigned_put("ABCD") == "presigned url"
 
 
+class ReadFilesTests(TestCase):
+    def setUp(self):
+        self.repo = RepositoryFactory.create()
+        self.service = ArchiveService(self.repo)
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_read_files(self, read_file_mock):
+        def read_file(path):
+            if path == "missing":
+                raise FileNotInStorageError()
+            if path == "broken":
+                raise Exception("boom")
+            return f"contents of {path}"
+
+        read_file_mock.side_effect = read_file
+
+        assert self.service.read_files(["a", "b", "missing", "broken", "a"]) == {
+            "a": "contents of a",
+            "b": "contents of b",
+            "missing": None,
+            "broken": None,
+        }
+        assert read_file_mock.call_count == 4
+
+    @patch("services.archive.ArchiveService.read_file")
+    def test_read_files_timeout(self, read_file_mock):
+        release = Event()
+
+        def read_file(path):
+            if path == "slow":
+                release.wait(5)
+            return path
+
+        read_file_mock.side_effect = read_file
+
+        assert self.service.read_files(["fast", "slow"], timeout=0.1) == {
+            "fast": "fast",
+            "slow": None,
+        }
+        release.set()
+
+    def test_for_repository(self):
+        service = ArchiveService.for_repository(self.repo)
+        assert ArchiveService.for_repository(self.repo) is service
+        # instances of the same repository share the service
+        same_repo = Repository.objects.get(pk=self.repo.pk)
+        assert ArchiveService.for_repository(same_repo) is service
+        assert ArchiveService.for_repository(RepositoryFactory.create()) is not service
+        assert service.storage_hash == self.service.storage_hash
+
+
 class TestWriteData(object):
     def test_write_report_details_to_storage(self, mocker, db):
         repo = RepositoryFactory()
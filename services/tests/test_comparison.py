@@ -8,7 +8,7 @@ from unittest.mock import PropertyMock, patch
 import minio
 import pytest
 import pytz
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from shared.reports.resources import ReportFile
 from shared.reports.types import ReportTotals
 from shared.utils.merge import LineType
@@ -25,13 +25,17 @@ from services.comparison import (
     Comparison,
     ComparisonReport,
     CreateChangeSummaryVisitor,
+    CreateLineArraysVisitor,
     CreateLineComparisonVisitor,
     FileComparison,
     FileComparisonTraverseManager,
+    GitCompareCache,
     ImpactedFile,
     LineComparison,
     MissingComparisonReport,
     PullRequestComparison,
+    _index_comparison_files,
+    git_compare_cache,
 )
 from services.report import SerializableReport
 
@@ -212,6 +216,21 @@ class FileComparisonTraverseManagerTests(TestCase):
 
         assert manager.traverse_finished() is False
 
+    def test_traverse_large_segment_does_not_modify_segments(self):
+        lines = ["+added", "-removed", " context"] * 5000
+        segments = [{"header": ["1", "10000", "1", "10000"], "lines": lines}]
+        manager = FileComparisonTraverseManager(
+            head_file_eof=10001, base_file_eof=10001, segments=segments
+        )
+
+        visitor = LineNumberCollector()
+        manager.apply(visitors=[visitor])
+
+        assert len(visitor.line_numbers) == 15000
+        assert visitor.line_numbers[:3] == [(None, 1), (1, None), (2, 2)]
+        assert visitor.line_numbers[-3:] == [(None, 9999), (9999, None), (10000, 10000)]
+        assert len(segments[0]["lines"]) == 15000
+
     def test_no_indexerror_if_basefile_longer_than_headfile_and_src_provided(self):
         manager = FileComparisonTraverseManager(
             head_file_eof=3,
@@ -351,6 +370,71 @@ class CreateChangeSummaryVisitorTests(TestCase):
         assert visitor.summary == {"hits": -1, "partials": 1}
 
 
+class CreateLineArraysVisitorTests(TestCase):
+    def setUp(self):
+        self.head_file = ReportFile(
+            "file1",
+            lines=[[1, "", [], 0, 0], [1, "", [], 0, 0], None, [1, "", [], 0, 0]],
+        )
+        self.base_file = ReportFile(
+            "file1",
+            lines=[[0, "", [], 0, 0], [1, "", [], 0, 0], None, ["1/2", "", [], 0, 0]],
+        )
+
+    def test_change_summary(self):
+        visitor = CreateLineArraysVisitor(self.base_file, self.head_file)
+        visitor(1, 1, "", False)
+        visitor(2, 2, "", False)
+        visitor(3, 3, "", False)
+        visitor(4, 4, "+", True)
+        assert visitor.change_summary == {"misses": -1, "hits": 1}
+
+    def test_skips_lines_without_value(self):
+        visitor = CreateLineArraysVisitor(self.base_file, self.head_file)
+        visitor(1, 1, None, False)
+        visitor(2, 2, "line", False)
+        assert visitor.num_lines == 1
+        assert visitor.change_summary == {"misses": -1, "hits": 1}
+
+        [line] = visitor.lines()
+        assert line.value == "line"
+        assert line.number == {"base": 2, "head": 2}
+
+    def test_lines_of_interest(self):
+        visitor = CreateLineArraysVisitor(self.base_file, self.head_file)
+        visitor(1, 1, "coverage changed", False)
+        visitor(2, 2, "unchanged", False)
+        visitor(3, 3, "no coverage", False)
+        visitor(None, 4, "+added", True)
+        visitor(4, None, "-removed", True)
+        assert visitor.lines_of_interest() == [0, 3, 4]
+
+    def test_lines_creates_line_comparisons(self):
+        visitor = CreateLineArraysVisitor(self.base_file, self.head_file)
+        visitor(1, 1, "first", False)
+        visitor(100, None, "-removed", True)
+        visitor(2, 2, "second", False)
+
+        first, removed = visitor.lines(0, 2)
+        assert first.base_line == self.base_file._lines[0]
+        assert first.head_line == self.head_file._lines[0]
+        assert first.coverage == {"base": LineType.miss, "head": LineType.hit}
+        assert removed.base_line is None
+        assert removed.head_line is None
+        assert removed.number == {"base": 100, "head": None}
+        assert removed.removed
+
+        [second] = visitor.lines(2)
+        assert second.value == "second"
+
+    def test_no_files(self):
+        visitor = CreateLineArraysVisitor(None, None)
+        visitor(1, 1, "line", False)
+        assert visitor.change_summary == {}
+        assert visitor.lines_of_interest() == []
+        assert visitor.lines()[0].coverage == {"base": None, "head": None}
+
+
 class LineComparisonTests(TestCase):
     def test_number_shows_number_from_base_and_head(self):
         base_ln = 3
@@ -399,6 +483,14 @@ class LineComparisonTests(TestCase):
         lc = LineComparison([base_cov, "", [], 0, 0], None, 0, 0, "-", False)
         assert lc.coverage == {"base": LineType.miss, "head": None}
 
+    def test_precomputed_numbers_and_coverage(self):
+        lc = LineComparison([0, "", [], 0, 0], [1, "", [], 0, 0], 3, 4, "", False)
+        assert lc.base_number == 3
+        assert lc.head_number == 4
+        assert lc.base_coverage == LineType.miss
+        assert lc.head_coverage == LineType.hit
+        assert not hasattr(lc, "__dict__")
+
     def test_hit_count_returns_sessions_hit_in_head(self):
         lc = LineComparison(
             None,
@@ -668,6 +760,52 @@ class FileComparisonTests(TestCase):
 
         assert self.file_comparison.change_summary == {"hits": 2, "misses": -2}
 
+    def test_line_arrays_match_line_comparisons(self):
+        head_lines = [[1, "", [], 0, None]] * 10 + [
+            [1, "", [], 0, None],
+            ["3/4", "", [], 0, None],
+            [1, "", [], 0, None],
+        ]
+        base_lines = [[1, "", [], 0, None]] * 10 + [
+            [0, "", [], 0, None],
+            [1, "", [], 0, None],
+            [0, "", [], 0, None],
+        ]
+        segment = {
+            "header": ["12", "2", "12", "2"],
+            "lines": ["+this is an added line", "-this is a removed line"],
+        }
+        src = ["line"] * 10 + ["first", "this is an added line", "last"]
+
+        self.file_comparison.head_file._lines = head_lines
+        self.file_comparison.base_file._lines = base_lines
+        self.file_comparison.diff_data = {"segments": [segment]}
+        self.file_comparison.src = src
+
+        line_arrays_comparison = FileComparison(
+            head_file=self.file_comparison.head_file,
+            base_file=self.file_comparison.base_file,
+            diff_data={"segments": [segment]},
+            src=src,
+            use_line_arrays=True,
+        )
+
+        assert (
+            line_arrays_comparison.change_summary == self.file_comparison.change_summary
+        )
+
+        expected_segments = self.file_comparison.segments
+        segments = line_arrays_comparison.segments
+        assert len(segments) == len(expected_segments) == 1
+        assert segments[0].header == expected_segments[0].header
+        assert [
+            (line.value, line.number, line.coverage) for line in segments[0].lines
+        ] == [
+            (line.value, line.number, line.coverage)
+            for line in expected_segments[0].lines
+        ]
+        assert len(segments[0].lines) < len(line_arrays_comparison.lines)
+
     @patch(
         "services.comparison.FileComparison.change_summary", new_callable=PropertyMock
     )
@@ -1303,6 +1441,184 @@ class ComparisonHeadReportTests(TestCase):
             self.comparison.base_report
 
 
+@patch("services.repo_providers.RepoProviderService.get_adapter")
+@patch("services.report.build_report_from_commit")
+class ComparisonPrefetchTests(TestCase):
+    class MockAdapter:
+        async def get_compare(self, base, head):
+            return {"diff": {"files": {}}, "commits": []}
+
+    def setUp(self):
+        owner = OwnerFactory()
+        self.base, self.head = CommitFactory(author=owner), CommitFactory(author=owner)
+        self.comparison = Comparison(
+            user=owner, base_commit=self.base, head_commit=self.head
+        )
+
+    def test_prefetch_loads_reports_and_git_comparison(
+        self, build_report_from_commit_mock, get_adapter_mock
+    ):
+        get_adapter_mock.return_value = self.MockAdapter()
+        build_report_from_commit_mock.side_effect = lambda commit: SerializableReport(
+            files={"f": file_data}
+        )
+
+        self.comparison.prefetch()
+        assert build_report_from_commit_mock.call_count == 2
+        assert {
+            call.args[0] for call in build_report_from_commit_mock.call_args_list
+        } == {self.base, self.head}
+
+        # everything has already been loaded
+        assert self.comparison.base_report is not None
+        assert self.comparison.head_report is not None
+        assert self.comparison.git_comparison == {"diff": {"files": {}}, "commits": []}
+        assert build_report_from_commit_mock.call_count == 2
+        assert get_adapter_mock.call_count == 1
+
+        # nothing left to fetch
+        self.comparison.prefetch()
+        assert build_report_from_commit_mock.call_count == 2
+        assert get_adapter_mock.call_count == 1
+
+    def test_prefetch_defers_errors(
+        self, build_report_from_commit_mock, get_adapter_mock
+    ):
+        get_adapter_mock.return_value = self.MockAdapter()
+        build_report_from_commit_mock.side_effect = minio.error.S3Error(
+            code="NoSuchKey",
+            message=None,
+            resource=None,
+            request_id=None,
+            host_id=None,
+            response=None,
+        )
+
+        self.comparison.prefetch()
+
+        with self.assertRaises(MissingComparisonReport):
+            self.comparison.base_report
+        with self.assertRaises(MissingComparisonReport):
+            self.comparison.head_report
+
+    @patch("services.comparison.Comparison.prefetch")
+    def test_validate_prefetches_when_enabled(
+        self, prefetch_mock, build_report_from_commit_mock, get_adapter_mock
+    ):
+        get_adapter_mock.return_value = self.MockAdapter()
+        build_report_from_commit_mock.return_value = SerializableReport(
+            files={"f": file_data}
+        )
+
+        with self.settings(COMPARISON_PREFETCH_ENABLED=False):
+            self.comparison.validate()
+        prefetch_mock.assert_not_called()
+
+        with self.settings(COMPARISON_PREFETCH_ENABLED=True):
+            self.comparison.validate()
+        prefetch_mock.assert_called_once()
+
+
+@override_settings(GIT_COMPARE_CACHE_ENABLED=True)
+@patch("services.repo_providers.RepoProviderService.get_adapter")
+class GitCompareCacheTests(TestCase):
+    class MockAdapter:
+        def __init__(self):
+            self.calls = []
+
+        async def get_compare(self, base, head):
+            self.calls.append((base, head))
+            return {"diff": {"files": {}}, "commits": [{"commitid": head}]}
+
+    def setUp(self):
+        git_compare_cache.clear()
+        self.addCleanup(git_compare_cache.clear)
+        owner = OwnerFactory()
+        repository = RepositoryFactory(author=owner)
+        self.owner = owner
+        self.base = CommitFactory(author=owner, repository=repository)
+        self.head = CommitFactory(author=owner, repository=repository)
+
+    def test_comparisons_share_provider_compares(self, get_adapter_mock):
+        adapter = self.MockAdapter()
+        get_adapter_mock.return_value = adapter
+
+        first = Comparison(
+            user=self.owner, base_commit=self.base, head_commit=self.head
+        )
+        second = Comparison(
+            user=self.owner, base_commit=self.base, head_commit=self.head
+        )
+
+        assert first.git_comparison == second.git_comparison
+        assert first.has_unmerged_base_commits == second.has_unmerged_base_commits
+        assert sorted(adapter.calls) == sorted(
+            [
+                (self.base.commitid, self.head.commitid),
+                (self.head.commitid, self.base.commitid),
+            ]
+        )
+        # each comparison gets its own copy
+        assert first.git_comparison is not second.git_comparison
+
+    def test_cache_disabled(self, get_adapter_mock):
+        adapter = self.MockAdapter()
+        get_adapter_mock.return_value = adapter
+
+        with self.settings(GIT_COMPARE_CACHE_ENABLED=False):
+            for _ in range(2):
+                Comparison(
+                    user=self.owner, base_commit=self.base, head_commit=self.head
+                ).git_comparison
+
+        assert len(adapter.calls) == 4
+
+    def test_pseudo_diff_shares_provider_compares(self, get_adapter_mock):
+        adapter = self.MockAdapter()
+        get_adapter_mock.return_value = adapter
+        pull = PullFactory(
+            repository=self.base.repository,
+            compared_to=self.base.commitid,
+            base=self.head.commitid,
+        )
+
+        comparison = Comparison(
+            user=self.owner, base_commit=self.base, head_commit=self.head
+        )
+        pull_comparison = PullRequestComparison(user=self.owner, pull=pull)
+
+        assert comparison.git_comparison["diff"] == pull_comparison.pseudo_diff
+        assert len(adapter.calls) == 2
+
+    @patch("redis.Redis.set")
+    @patch("redis.Redis.get")
+    def test_redis_tier(self, redis_get_mock, redis_set_mock, get_adapter_mock):
+        cache = GitCompareCache(max_bytes=1024, use_redis=True, redis_ttl=60)
+        redis_get_mock.return_value = None
+
+        assert cache.get("key") is None
+        cache.set("key", {"diff": {"files": {}}})
+        assert redis_set_mock.call_args.kwargs == {"ex": 60}
+
+        cache.clear()
+        redis_get_mock.return_value = redis_set_mock.call_args.args[1]
+        assert cache.get("key") == {"diff": {"files": {}}}
+        # now served locally
+        redis_get_mock.return_value = None
+        assert cache.get("key") == {"diff": {"files": {}}}
+
+    def test_evicts_least_recently_used(self, get_adapter_mock):
+        cache = GitCompareCache(max_bytes=50)
+        cache.set("a", {"a": "a" * 10})
+        cache.set("b", {"b": "b" * 10})
+        assert cache.get("a") is not None
+
+        cache.set("c", {"c": "c" * 10})
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+
 @patch("services.repo_providers.RepoProviderService.get_adapter")
 class ComparisonHasUnmergedBaseCommitsTests(TestCase):
     class MockFetchDiffCoro:
@@ -1699,6 +2015,54 @@ class ComparisonReportTest(TestCase):
         impacted_file = self.comparison_report.impacted_file("fileB")
         assert impacted_file.head_name == "fileB"
 
+    @patch("services.comparison.redis")
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_decodes_single_file(self, read_file, redis_mock):
+        read_file.return_value = mocked_files_with_direct_and_indirect_changes
+        redis_mock.get.return_value = None
+
+        with patch("services.comparison.ImpactedFile.create") as create:
+            self.comparison_report.impacted_file("fileB")
+            assert create.call_count == 1
+            assert create.call_args.kwargs["head_name"] == "fileB"
+
+        assert "files" not in self.comparison_report.__dict__
+        assert redis_mock.set.call_count == 1
+
+    @patch("services.comparison.redis")
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_file_uses_cached_index(self, read_file, redis_mock):
+        read_file.return_value = mocked_files_with_direct_and_indirect_changes
+        redis_mock.get.return_value = None
+        index = ComparisonReport(self.comparison)._files_index
+        redis_mock.get.return_value = redis_mock.set.call_args.args[1]
+
+        with patch("services.comparison._index_comparison_files") as build_index:
+            comparison_report = ComparisonReport(self.comparison)
+            assert comparison_report._files_index == index
+            assert comparison_report.impacted_file("fileD").head_name == "fileD"
+            build_index.assert_not_called()
+
+    @patch("services.comparison.redis")
+    @patch("services.archive.ArchiveService.read_file")
+    def test_impacted_files_count(self, read_file, redis_mock):
+        read_file.return_value = mocked_files_with_direct_and_indirect_changes
+        redis_mock.get.return_value = None
+
+        assert self.comparison_report.impacted_files_count == 4
+        assert "files" not in self.comparison_report.__dict__
+        assert self.comparison_report.impacted_files_count == len(
+            self.comparison_report.files
+        )
+
+    def test_index_comparison_files(self):
+        data = '{"other": {"files": [1]}, "files": [ {"head_name": "a"} ,{"head_name": null}], "x": 1}'
+        index = _index_comparison_files(data)
+        assert [(name, data[start:end]) for name, start, end in index] == [
+            ("a", '{"head_name": "a"}'),
+            (None, '{"head_name": null}'),
+        ]
+
     @patch("services.archive.ArchiveService.read_file")
     def test_impacted_files_filtered_by_indirect_changes(self, read_file):
         read_file.return_value = mock_data_from_archive
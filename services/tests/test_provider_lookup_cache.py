@@ -0,0 +1,87 @@
+import threading
+from unittest.mock import Mock, patch
+
+import fakeredis
+import pytest
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import NotFound
+
+from services.provider_lookup_cache import cached_lookup
+
+
+@override_settings(TOKENLESS_LOOKUP_CACHE_ENABLED=True)
+@patch("services.provider_lookup_cache.redis", new_callable=fakeredis.FakeRedis)
+class CachedLookupTest(TestCase):
+    def test_cached_lookup(self, redis):
+        fetch = Mock(return_value={"base": {"slug": "codecov/repo"}})
+        assert cached_lookup("key", fetch, 60) == {"base": {"slug": "codecov/repo"}}
+        assert cached_lookup("key", fetch, 60) == {"base": {"slug": "codecov/repo"}}
+        fetch.assert_called_once()
+        assert 0 < redis.ttl("key") <= 60
+        assert redis.get("key/lock") is None
+
+    def test_failures_are_not_cached(self, redis):
+        fetch = Mock(side_effect=NotFound())
+        with pytest.raises(NotFound):
+            cached_lookup("key", fetch, 60)
+        with pytest.raises(NotFound):
+            cached_lookup("key", fetch, 60)
+        assert fetch.call_count == 2
+        assert redis.get("key/lock") is None
+
+    def test_concurrent_lookups_are_coalesced(self, redis):
+        started, release = threading.Event(), threading.Event()
+
+        def fetch():
+            started.set()
+            release.wait(5)
+            return "value"
+
+        fetch = Mock(side_effect=fetch)
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(cached_lookup("key", fetch, 60))
+        )
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(
+            target=lambda: results.append(cached_lookup("key", fetch, 60))
+        )
+        follower.start()
+        release.set()
+        leader.join()
+        follower.join()
+
+        assert results == ["value", "value"]
+        fetch.assert_called_once()
+
+    @patch("services.provider_lookup_cache.wait_time", 0.2)
+    @patch("services.provider_lookup_cache.poll_interval", 0.01)
+    def test_lookup_locked_by_another_process(self, redis):
+        redis.set("key/lock", 1)
+        fetch = Mock(return_value="value")
+
+        # the other process stores its result while we wait
+        with patch(
+            "services.provider_lookup_cache.time.sleep",
+            side_effect=lambda _: redis.set("key", '"cached"'),
+        ):
+            assert cached_lookup("key", fetch, 60) == "cached"
+        fetch.assert_not_called()
+
+        # the other process gave up, look it up ourselves
+        redis.delete("key")
+        with patch(
+            "services.provider_lookup_cache.time.sleep",
+            side_effect=lambda _: redis.delete("key/lock"),
+        ):
+            assert cached_lookup("key", fetch, 60) == "value"
+        fetch.assert_called_once()
+
+    @override_settings(TOKENLESS_LOOKUP_CACHE_ENABLED=False)
+    def test_disabled(self, redis):
+        fetch = Mock(return_value="value")
+        cached_lookup("key", fetch, 60)
+        cached_lookup("key", fetch, 60)
+        assert fetch.call_count == 2
+        assert redis.get("key") is None
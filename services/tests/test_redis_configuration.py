@@ -1,4 +1,8 @@
-from services.redis_configuration import get_redis_connection
+from services.redis_configuration import (
+    _get_pooled_redis_instance_from_url,
+    get_pooled_redis_connection,
+    get_redis_connection,
+)
 
 
 def test_get_redis_connection(mocker):
@@ -7,3 +11,14 @@ def test_get_redis_connection(mocker):
     res = get_redis_connection()
     assert res is not None
     mocked.assert_called_with("redis://redis:6379")
+
+
+def test_get_pooled_redis_connection(mocker):
+    _get_pooled_redis_instance_from_url.cache_clear()
+    mocker.patch("services.redis_configuration.get_config", return_value=None)
+    mocked = mocker.patch("services.redis_configuration.Redis.from_url")
+    res = get_pooled_redis_connection()
+    assert res is not None
+    assert get_pooled_redis_connection() is res
+    mocked.assert_called_once_with("redis://redis:6379")
+    _get_pooled_redis_instance_from_url.cache_clear()
@@ -1,25 +1,45 @@
+import json
 from decimal import Decimal
 from pathlib import Path
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from shared.reports.resources import Report, ReportFile, ReportLine
 from shared.storage.exceptions import FileNotInStorageError
 from shared.utils.sessions import Session
 
-from core.tests.factories import CommitFactory, CommitWithReportFactory
-from reports.tests.factories import UploadFactory, UploadFlagMembershipFactory
+from core.models import Commit
+from core.tests.factories import (
+    CommitFactory,
+    CommitWithReportFactory,
+    RepositoryFactory,
+)
+from reports.tests.factories import (
+    CommitReportFactory,
+    ReportDetailsFactory,
+    UploadFactory,
+    UploadFlagMembershipFactory,
+)
 from services.report import (
+    ReportCache,
+    ReportData,
+    SerializableReport,
+    build_files,
     build_report,
     build_report_from_commit,
+    fetch_commit_report,
     files_belonging_to_flags,
+    files_in_sessions,
+    index_file_sessions,
+    prefetch_commit_reports,
+    report_cache,
 )
 
 current_file = Path(__file__)
 
 
-def flags_report():
-    report = Report()
+def flags_report(report_class=Report):
+    report = report_class()
     session_a_id, _ = report.add_session(Session(flags=["flag-a"]))
     session_b_id, _ = report.add_session(Session(flags=["flag-b"]))
     session_c_id, _ = report.add_session(Session(flags=["flag-c"]))
@@ -381,3 +401,158 @@ class ReportServiceTest(TestCase):
         files = files_belonging_to_flags(commit_report=commit_report, flags=flags)
         assert len(files) == 0
         assert files == []
+
+    def test_files_belonging_to_flags_uses_file_sessions_index(self):
+        commit_report = flags_report(report_class=SerializableReport)
+        with patch(
+            "services.report.index_file_sessions",
+            wraps=index_file_sessions,
+        ) as index_file_sessions_mock:
+            assert files_belonging_to_flags(
+                commit_report=commit_report, flags=["flag-b", "flag-c"]
+            ) == ["bar/file2.py", "another/file3.py"]
+            assert files_belonging_to_flags(
+                commit_report=commit_report, flags=["flag-a"]
+            ) == ["foo/file1.py"]
+            assert files_in_sessions(
+                commit_report=commit_report,
+                session_ids=commit_report.sessions.keys(),
+            ) == ["foo/file1.py", "bar/file2.py", "another/file3.py"]
+        # the report is only walked once
+        index_file_sessions_mock.assert_called_once_with(commit_report)
+
+    @patch("services.archive.ArchiveService.read_files")
+    def test_prefetch_commit_reports(self, read_files_mock):
+        files_array = [
+            {
+                "filename": "awesome/__init__.py",
+                "file_index": 0,
+                "file_totals": [0, 10, 8, 2, 0, "80.00000", 0, 0, 0, 0, 0, 0, 0],
+                "session_totals": [],
+                "diff_totals": None,
+            }
+        ]
+        read_files_mock.return_value = {
+            "path/0": json.dumps(files_array),
+            "path/1": json.dumps(files_array),
+        }
+        repository = RepositoryFactory()
+        commits = [CommitFactory(repository=repository) for _ in range(3)]
+        for i, commit in enumerate(commits[:2]):
+            ReportDetailsFactory(
+                report=CommitReportFactory(commit=commit),
+                _files_array=None,
+                _files_array_storage_path=f"path/{i}",
+            )
+        # fresh instances, like the commits of a connection
+        commits = list(Commit.objects.filter(pk__in=[c.pk for c in commits]))
+
+        prefetch_commit_reports(commits)
+        assert [len(commit.prefetched_reports) for commit in commits] == [1, 1, 0]
+
+        # the files of all the commits were read in one batch
+        read_files_mock.assert_called_once()
+        assert sorted(read_files_mock.call_args.args[0]) == ["path/0", "path/1"]
+        with self.assertNumQueries(0):
+            reports = [fetch_commit_report(commit) for commit in commits]
+            assert [list(build_files(report)) for report in reports[:2]] == [
+                ["awesome/__init__.py"],
+                ["awesome/__init__.py"],
+            ]
+            assert reports[2] is None
+
+
+@override_settings(REPORT_CACHE_ENABLED=True)
+class ReportCacheTest(TestCase):
+    def setUp(self):
+        report_cache.clear()
+        self.addCleanup(report_cache.clear)
+
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_build_report_from_commit_cached(self, read_chunks_mock):
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        read_chunks_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        first = build_report_from_commit(commit)
+        second = build_report_from_commit(commit)
+
+        assert read_chunks_mock.call_count == 1
+        assert first is not second
+        assert first.files == second.files
+        assert list(first.totals) == list(second.totals)
+        assert first.sessions.keys() == second.sessions.keys()
+
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_build_report_from_commit_cached_copies(self, read_chunks_mock):
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        read_chunks_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        first = build_report_from_commit(commit)
+        sid = next(iter(first.sessions))
+        flags = first.sessions[sid].flags
+        first.sessions[sid].flags = ["modified"]
+        second = build_report_from_commit(commit)
+        second.sessions[sid].flags = ["modified"]
+
+        # reports built from the cache don't share sessions with each other
+        assert build_report_from_commit(commit).sessions[sid].flags == flags
+        assert read_chunks_mock.call_count == 1
+
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_build_report_from_commit_report_updated(self, read_chunks_mock):
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        read_chunks_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        build_report_from_commit(commit)
+        # the worker touches the report details whenever it processes an upload
+        commit.reports.first().reportdetails.save()
+        build_report_from_commit(commit)
+
+        assert read_chunks_mock.call_count == 2
+
+    @patch("services.archive.ArchiveService.read_chunks")
+    def test_build_report_from_commit_cache_disabled(self, read_chunks_mock):
+        f = open(current_file.parent / "samples" / "chunks.txt", "r")
+        read_chunks_mock.return_value = f.read()
+        commit = CommitWithReportFactory.create(message="aaaaa", commitid="abf6d4d")
+
+        with self.settings(REPORT_CACHE_ENABLED=False):
+            build_report_from_commit(commit)
+            build_report_from_commit(commit)
+
+        assert read_chunks_mock.call_count == 2
+
+    def test_report_cache_evicts_least_recently_used(self):
+        cache = ReportCache(max_bytes=30)
+        cache.set("a", ReportData(chunks="a" * 10, files={}, sessions={}, totals=None))
+        cache.set("b", ReportData(chunks="b" * 10, files={}, sessions={}, totals=None))
+        assert cache.get("a") is not None
+
+        cache.set("c", ReportData(chunks="c" * 15, files={}, sessions={}, totals=None))
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_report_cache_skips_oversized_entries(self):
+        cache = ReportCache(max_bytes=10)
+        cache.set("a", ReportData(chunks="a" * 11, files={}, sessions={}, totals=None))
+        assert cache.get("a") is None
+
+    @patch("services.report.redis")
+    def test_report_cache_redis(self, redis_mock):
+        store = {}
+        redis_mock.get.side_effect = lambda key: store.get(key)
+        redis_mock.set.side_effect = lambda key, value, ex: store.update({key: value})
+
+        data = ReportData(
+            chunks="chunks", files={"a.py": [0]}, sessions={}, totals=None
+        )
+        ReportCache(max_bytes=1024, use_redis=True).set("key", data)
+
+        # a different process has an empty local cache
+        other = ReportCache(max_bytes=1024, use_redis=True)
+        assert other.get("key") == data
+        assert redis_mock.set.call_args.kwargs["ex"] == 3600
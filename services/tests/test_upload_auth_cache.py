@@ -0,0 +1,107 @@
+import uuid
+from unittest.mock import Mock, patch
+
+import fakeredis
+from django.test import TestCase, override_settings
+
+from codecov_auth.authentication.repo_auth import OrgLevelTokenAuthentication
+from codecov_auth.models import OrganizationLevelToken
+from codecov_auth.services.org_level_token_service import OrgLevelTokenService
+from codecov_auth.tests.factories import OwnerFactory
+from core.models import Repository
+from core.tests.factories import RepositoryFactory
+from services.upload_auth_cache import (
+    UploadAuthCache,
+    org_level_token_key,
+    repository_upload_token_key,
+    upload_auth_cache,
+)
+
+
+@override_settings(UPLOAD_TOKEN_CACHE_ENABLED=True)
+@patch("services.upload_auth_cache.redis", new_callable=fakeredis.FakeRedis)
+class UploadAuthCacheTest(TestCase):
+    def setUp(self):
+        self.cache = UploadAuthCache(max_entries=2)
+        self.repo = RepositoryFactory(activated=False)
+        self.queryset = Repository.objects.select_related("author")
+        self.fetch = Mock(
+            side_effect=lambda: self.queryset.filter(pk=self.repo.pk).first()
+        )
+
+    def test_get_or_fetch(self, redis):
+        assert self.cache.get_or_fetch("key", self.fetch, self.queryset) == self.repo
+        assert redis.get("key") == str(self.repo.pk).encode()
+
+        # only the primary key is cached, the repository is loaded again
+        Repository.objects.filter(pk=self.repo.pk).update(activated=True)
+        with self.assertNumQueries(1):
+            repo = self.cache.get_or_fetch("key", self.fetch, self.queryset)
+        assert repo.activated is True
+        self.fetch.assert_called_once()
+
+        # shared with other processes through Redis
+        self.cache.clear()
+        assert self.cache.get_or_fetch("key", self.fetch, self.queryset) == self.repo
+        self.fetch.assert_called_once()
+
+        self.cache.invalidate("key")
+        assert redis.get("key") is None
+        self.cache.get_or_fetch("key", self.fetch, self.queryset)
+        assert self.fetch.call_count == 2
+
+    def test_get_or_fetch_deleted(self, redis):
+        self.cache.get_or_fetch("key", self.fetch, self.queryset)
+        self.repo.delete()
+        assert self.cache.get_or_fetch("key", self.fetch, self.queryset) is None
+        assert self.fetch.call_count == 2
+        assert redis.get("key") is None
+
+    def test_get_or_fetch_not_found(self, redis):
+        fetch = Mock(return_value=None)
+        assert self.cache.get_or_fetch("key", fetch, self.queryset) is None
+        assert self.cache.get_or_fetch("key", fetch, self.queryset) is None
+        assert fetch.call_count == 2
+
+    def test_local_entries(self, redis):
+        for key in ("a", "b", "c"):
+            self.cache.get_or_fetch(key, self.fetch, self.queryset)
+        assert list(self.cache._entries) == ["b", "c"]
+
+        with override_settings(UPLOAD_TOKEN_CACHE_LOCAL_TTL=0):
+            self.cache.get_or_fetch("d", self.fetch, self.queryset)
+        assert self.cache._local_get("d") is None
+
+    @override_settings(UPLOAD_TOKEN_CACHE_ENABLED=False)
+    def test_disabled(self, redis):
+        self.cache.get_or_fetch("key", self.fetch, self.queryset)
+        self.cache.get_or_fetch("key", self.fetch, self.queryset)
+        assert self.fetch.call_count == 2
+        assert redis.get("key") is None
+
+
+def test_token_keys_are_normalized():
+    token = uuid.uuid4()
+    assert repository_upload_token_key(token) == repository_upload_token_key(
+        str(token).upper()
+    )
+    assert str(token) not in org_level_token_key(token)
+
+
+@override_settings(UPLOAD_TOKEN_CACHE_ENABLED=True)
+@patch("services.upload_auth_cache.redis", new_callable=fakeredis.FakeRedis)
+def test_org_level_token_invalidated_on_refresh(redis, db, django_assert_num_queries):
+    upload_auth_cache.clear()
+    owner = OwnerFactory(plan="users-enterprisey")
+    token, _ = OrganizationLevelToken.objects.get_or_create(owner=owner)
+    authentication = OrgLevelTokenAuthentication()
+
+    user, auth = authentication.authenticate_credentials(str(token.token))
+    assert user == owner
+    with django_assert_num_queries(1):
+        authentication.authenticate_credentials(str(token.token))
+
+    old_token = str(token.token)
+    OrgLevelTokenService.refresh_token(token.id)
+    assert authentication.authenticate_credentials(old_token) is None
+    upload_auth_cache.clear()
@@ -1,16 +1,25 @@
+import pickle
 from unittest.mock import patch
 
 from django.contrib.auth.models import AnonymousUser
-from django.test import TransactionTestCase
-from shared.torngit.exceptions import TorngitObjectNotFoundError
+from django.test import TransactionTestCase, override_settings
+from shared.torngit.exceptions import (
+    TorngitClientError,
+    TorngitObjectNotFoundError,
+)
 
 import services.yaml as yaml
 from codecov_auth.tests.factories import OwnerFactory
+from core.models import Commit
 from core.tests.factories import CommitFactory, RepositoryFactory
 
 
 class YamlServiceTest(TransactionTestCase):
     def setUp(self):
+        yaml.commit_yaml_cache.clear()
+        self.addCleanup(yaml.commit_yaml_cache.clear)
+        yaml._memoized_final_commit_yaml.cache_clear()
+        self.addCleanup(yaml._memoized_final_commit_yaml.cache_clear)
         self.org = OwnerFactory()
         self.repo = RepositoryFactory(author=self.org, private=False)
         self.commit = CommitFactory(repository=self.repo)
@@ -32,3 +41,82 @@ class YamlServiceTest(TransactionTestCase):
         )
         config = yaml.final_commit_yaml(self.commit, None)
         assert config["codecov"]["require_ci_to_pass"] is True
+
+    @override_settings(COMMIT_YAML_CACHE_ENABLED=True)
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_commit_yaml_cached(self, mock_fetch_yaml):
+        mock_fetch_yaml.return_value = """
+        codecov:
+          notify:
+            require_ci_to_pass: no
+        """
+        yaml.final_commit_yaml(self.commit, None)
+        # a different instance of the same commit, e.g. in a later request
+        commit = Commit.objects.get(pk=self.commit.pk)
+        config = yaml.final_commit_yaml(commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is False
+        assert mock_fetch_yaml.call_count == 1
+
+    @override_settings(COMMIT_YAML_CACHE_ENABLED=True)
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_commit_without_yaml_cached(self, mock_fetch_yaml):
+        mock_fetch_yaml.side_effect = TorngitObjectNotFoundError(
+            response_data=404, message="not found"
+        )
+        yaml.final_commit_yaml(self.commit, None)
+        yaml.final_commit_yaml(self.commit, None)
+        assert mock_fetch_yaml.call_count == 1
+
+    @override_settings(COMMIT_YAML_CACHE_ENABLED=True)
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_provider_errors_not_cached(self, mock_fetch_yaml):
+        mock_fetch_yaml.side_effect = TorngitClientError(
+            code=403, response_data={}, message="forbidden"
+        )
+        config = yaml.final_commit_yaml(self.commit, None)
+        assert config["codecov"]["require_ci_to_pass"] is True
+        yaml.final_commit_yaml(self.commit, None)
+        assert mock_fetch_yaml.call_count == 2
+
+    @patch("services.yaml.fetch_current_yaml_from_provider_via_reference")
+    def test_commit_yaml_cache_disabled(self, mock_fetch_yaml):
+        mock_fetch_yaml.side_effect = TorngitObjectNotFoundError(
+            response_data=404, message="not found"
+        )
+        yaml.fetch_commit_yaml(self.commit, None)
+        yaml.fetch_commit_yaml(self.commit, None)
+        assert mock_fetch_yaml.call_count == 2
+        assert yaml.commit_yaml_cache.get(yaml.CommitYamlCache.key(self.commit)) is (
+            yaml._MISS
+        )
+
+    @patch("redis.Redis.set")
+    @patch("redis.Redis.get")
+    def test_commit_yaml_cache_redis(self, redis_get_mock, redis_set_mock):
+        cache = yaml.CommitYamlCache(
+            max_entries=10, use_redis=True, ttl=100, negative_ttl=10
+        )
+        redis_get_mock.return_value = None
+        assert cache.get("key") is yaml._MISS
+
+        cache.set("key", {"codecov": {}})
+        assert redis_set_mock.call_args.kwargs == {"ex": 100}
+        cache.set("missing", None)
+        assert redis_set_mock.call_args.kwargs == {"ex": 10}
+
+        cache.clear()
+        redis_get_mock.return_value = pickle.dumps({"codecov": {}})
+        first, second = cache.get("key"), cache.get("key")
+        assert first == second == {"codecov": {}}
+        assert first is not second
+        assert redis_get_mock.call_count == 2
+
+    def test_commit_yaml_cache_bounded(self):
+        cache = yaml.CommitYamlCache(max_entries=2)
+        cache.set("a", {"a": 1})
+        cache.set("b", None)
+        cache.get("a")
+        cache.set("c", {"c": 1})
+        assert cache.get("a") == {"a": 1}
+        assert cache.get("b") is yaml._MISS
+        assert cache.get("c") == {"c": 1}
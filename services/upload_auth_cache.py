@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Callable, Optional
+from uuid import UUID
+
+from django.conf import settings
+from django.db.models import Model, QuerySet
+from redis.exceptions import RedisError
+
+from services.redis_configuration import get_redis_connection
+
+log = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+
+class UploadAuthCache:
+    """
+    Cache of the lookups (of repositories, repository tokens and org level tokens) that
+    upload requests are authenticated with, keyed by token or repository slug.
+
+    Only the primary key of the object found is cached, hits load the object by it so
+    that its state (activation, plan, privacy...) is never stale.  Entries are kept in
+    Redis for `settings.UPLOAD_TOKEN_CACHE_TTL` seconds and in a bounded process-local
+    LRU for `settings.UPLOAD_TOKEN_CACHE_LOCAL_TTL` seconds.  `invalidate` removes an
+    entry from Redis and the local cache of the calling process, other processes may
+    keep using their local entry until it expires.  Lookups that find nothing are not
+    cached.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Optional[Model]],
+        queryset: QuerySet,
+    ) -> Optional[Model]:
+        """
+        The object found by `fetch`, or the object of `queryset` with the cached
+        primary key.
+        """
+        if not settings.UPLOAD_TOKEN_CACHE_ENABLED:
+            return fetch()
+
+        pk = self._local_get(key)
+        if pk is None:
+            pk = self._redis_get(key)
+            if pk is not None:
+                self._local_set(key, pk)
+        if pk is not None:
+            obj = queryset.filter(pk=pk).first()
+            if obj is not None:
+                return obj
+            # deleted
+            self.invalidate(key)
+
+        obj = fetch()
+        if obj is not None:
+            pk = str(obj.pk)
+            self._local_set(key, pk)
+            self._redis_set(key, pk)
+        return obj
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+        try:
+            redis.delete(key)
+        except RedisError:
+            log.warning("Error invalidating upload auth cache", extra=dict(key=key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _local_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, pk = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return pk
+
+    def _local_set(self, key: str, pk: str):
+        expires_at = time.monotonic() + settings.UPLOAD_TOKEN_CACHE_LOCAL_TTL
+        with self._lock:
+            self._entries[key] = (expires_at, pk)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_get(self, key: str) -> Optional[str]:
+        try:
+            pk = redis.get(key)
+        except RedisError:
+            log.warning("Error reading upload auth cache", extra=dict(key=key))
+            return None
+        return pk.decode() if pk is not None else None
+
+    def _redis_set(self, key: str, pk: str):
+        try:
+            redis.set(key, pk, ex=settings.UPLOAD_TOKEN_CACHE_TTL)
+        except RedisError:
+            log.warning("Error writing upload auth cache", extra=dict(key=key))
+
+
+upload_auth_cache = UploadAuthCache(
+    max_entries=settings.UPLOAD_TOKEN_CACHE_MAX_ENTRIES,
+)
+
+
+def _token_digest(token) -> str:
+    # tokens are not stored in Redis keys, UUIDs are normalized so that
+    # invalidations find the entries of differently formatted tokens
+    token = str(token)
+    try:
+        token = str(UUID(token))
+    except ValueError:
+        pass
+    return sha256(token.encode()).hexdigest()
+
+
+def repository_upload_token_key(upload_token) -> str:
+    return f"upload-auth/repository/{_token_digest(upload_token)}"
+
+
+def repository_token_key(key) -> str:
+    return f"upload-auth/repository-token/{_token_digest(key)}"
+
+
+def org_level_token_key(token) -> str:
+    return f"upload-auth/org-token/{_token_digest(token)}"
+
+
+def repository_slug_key(service, repo_identifier: str) -> str:
+    service = getattr(service, "value", service)
+    return f"upload-auth/slug/{service}/{_token_digest(repo_identifier)}"
@@ -1,8 +1,16 @@
 import enum
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
 from functools import lru_cache
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 from asgiref.sync import async_to_sync
+from django.conf import settings
+from redis.exceptions import RedisError
+from shared.torngit.exceptions import TorngitObjectNotFoundError
 from shared.yaml import UserYaml, fetch_current_yaml_from_provider_via_reference
 from shared.yaml.user_yaml import UserYaml
 from shared.yaml.validation import validate_yaml
@@ -10,17 +18,136 @@ from yaml import safe_load
 
 from codecov_auth.models import Owner, get_config
 from core.models import Commit
+from services.redis_configuration import get_redis_connection
 from services.repo_providers import RepoProviderService
 
+log = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
+_MISS = object()
+
 
 class YamlStates(enum.Enum):
     DEFAULT = "default"
 
 
+class CommitYamlCache:
+    """
+    Cache of the validated codecov.yaml of commits, keyed by repository and commit
+    SHA (so it never needs invalidating).  Used when `COMMIT_YAML_CACHE_ENABLED` is
+    set: a bounded process-local tier is always used then, and when `use_redis` is
+    set entries are also shared between processes.
+
+    Commits without a (valid) yaml are cached as `None` with a shorter TTL since
+    providers also report missing files for commits the user can't access.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        use_redis: bool = False,
+        ttl: int = 24 * 3600,
+        negative_ttl: int = 300,
+    ):
+        self.max_entries = max_entries
+        self.use_redis = use_redis
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(commit: Commit) -> str:
+        return f"commit-yaml/{commit.repository_id}/{commit.commitid}"
+
+    def get(self, key: str):
+        """
+        Returns (a copy of) the cached yaml, which may be `None`, or `_MISS`.
+        """
+        data = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, data = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    data = None
+
+        if data is None and self.use_redis:
+            try:
+                data = redis.get(key)
+            except RedisError:
+                log.warning("Error reading commit yaml from cache", extra=dict(key=key))
+            if data is not None:
+                self._local_set(key, data, self._ttl(pickle.loads(data)))
+
+        if data is None:
+            return _MISS
+        return pickle.loads(data)
+
+    def set(self, key: str, value: Optional[Dict]):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        ttl = self._ttl(value)
+        self._local_set(key, data, ttl)
+        if self.use_redis:
+            try:
+                redis.set(key, data, ex=ttl)
+            except RedisError:
+                log.warning("Error writing commit yaml to cache", extra=dict(key=key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _ttl(self, value: Optional[Dict]) -> int:
+        return self.ttl if value is not None else self.negative_ttl
+
+    def _local_set(self, key: str, data: bytes, ttl: int):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + ttl, data)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+commit_yaml_cache = CommitYamlCache(
+    max_entries=settings.COMMIT_YAML_CACHE_MAX_ENTRIES,
+    use_redis=settings.COMMIT_YAML_CACHE_REDIS_ENABLED,
+    ttl=settings.COMMIT_YAML_CACHE_TTL,
+    negative_ttl=settings.COMMIT_YAML_CACHE_NEGATIVE_TTL,
+)
+
+
 def fetch_commit_yaml(commit: Commit, owner: Owner) -> Optional[Dict]:
     """
     Fetches the codecov.yaml file for a particular commit from the service provider.
     Service provider API request is made on behalf of the given `owner`.
+
+    When `COMMIT_YAML_CACHE_ENABLED` is set, results are kept in `commit_yaml_cache`,
+    except when the provider request fails for reasons other than the file not
+    existing.
+    """
+    if not settings.COMMIT_YAML_CACHE_ENABLED:
+        commit_yaml, _ = _fetch_commit_yaml(commit, owner)
+        return commit_yaml
+
+    key = CommitYamlCache.key(commit)
+    cached = commit_yaml_cache.get(key)
+    if cached is not _MISS:
+        return cached
+
+    commit_yaml, cacheable = _fetch_commit_yaml(commit, owner)
+    if cacheable:
+        commit_yaml_cache.set(key, commit_yaml)
+    return commit_yaml
+
+
+def _fetch_commit_yaml(commit: Commit, owner: Owner) -> Tuple[Optional[Dict], bool]:
+    """
+    Returns the codecov.yaml of the commit and whether that result can be cached.
     """
     try:
         repository_service = RepoProviderService().get_adapter(
@@ -29,19 +156,38 @@ def fetch_commit_yaml(commit: Commit, owner: Owner) -> Optional[Dict]:
         yaml_str = async_to_sync(fetch_current_yaml_from_provider_via_reference)(
             commit.commitid, repository_service
         )
+    except TorngitObjectNotFoundError:
+        return None, True
+    except:
+        # the provider could be unavailable or the owner might not be able to
+        # fetch the file right now: the codecov.yaml would not be used, but
+        # that isn't worth caching
+        return None, False
+
+    try:
         yaml_dict = safe_load(yaml_str)
-        return validate_yaml(yaml_dict, show_secrets_for=None)
+        commit_yaml = validate_yaml(yaml_dict, show_secrets_for=None)
     except:
-        # fetching, parsing, validating the yaml inside the commit can
-        # have various exceptions, which we do not care about to get the final
-        # yaml used for a commit, as any error here, the codecov.yaml would not
-        # be used, so we return None here
-        return None
+        # parsing or validating the yaml inside the commit can have various
+        # exceptions, which we do not care about to get the final yaml used for
+        # a commit, as any error here, the codecov.yaml would not be used
+        commit_yaml = None
+    return commit_yaml, True
+
+
+def final_commit_yaml(commit: Commit, owner: Owner) -> UserYaml:
+    if settings.COMMIT_YAML_CACHE_ENABLED:
+        return _final_commit_yaml(commit, owner)
+    return _memoized_final_commit_yaml(commit, owner)
 
 
 @lru_cache()
 # TODO: make this use the Redis cache logic in 'shared' once it's there
-def final_commit_yaml(commit: Commit, owner: Owner) -> UserYaml:
+def _memoized_final_commit_yaml(commit: Commit, owner: Owner) -> UserYaml:
+    return _final_commit_yaml(commit, owner)
+
+
+def _final_commit_yaml(commit: Commit, owner: Owner) -> UserYaml:
     return UserYaml.get_final_yaml(
         owner_yaml=commit.repository.author.yaml,
         repo_yaml=commit.repository.yaml,
@@ -1,18 +1,26 @@
+import json
+import logging
 import math
+import operator
 from datetime import datetime, timedelta
-from typing import Iterable, List, Optional
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from django.conf import settings
 from django.db import connections
 from django.db.models import (
     Avg,
+    BooleanField,
+    Count,
     DateTimeField,
     DecimalField,
+    ExpressionWrapper,
     F,
     FloatField,
     Func,
     Max,
     Min,
+    Q,
     QuerySet,
     Sum,
     Value,
@@ -20,11 +28,13 @@ from django.db.models import (
 from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast
 from django.utils import timezone
+from redis.exceptions import RedisError
 
 import services.report as report_service
 from codecov_auth.models import Owner
 from core.models import Commit, Repository
 from reports.models import RepositoryFlag
+from services.redis_configuration import get_redis_connection
 from services.task import TaskService
 from timeseries.models import (
     Dataset,
@@ -34,6 +44,10 @@ from timeseries.models import (
     MeasurementSummary,
 )
 
+log = logging.getLogger(__name__)
+
+redis = get_redis_connection()
+
 interval_deltas = {
     Interval.INTERVAL_1_DAY: timedelta(days=1),
     Interval.INTERVAL_7_DAY: timedelta(days=7),
@@ -193,6 +207,19 @@ def aligned_start_date(interval: Interval, date: datetime) -> datetime:
     return aligning_date + (intervals_before * delta)
 
 
+def _interval_bins(
+    interval: Interval, start_date: datetime, end_date: datetime
+) -> Tuple[datetime, ...]:
+    """
+    Start dates of the time bins from `start_date` (aligned) through `end_date`.
+    """
+    delta = interval_deltas[interval]
+    if end_date < start_date:
+        return ()
+    count = (end_date - start_date) // delta + 1
+    return tuple(start_date + i * delta for i in range(count))
+
+
 def fill_sparse_measurements(
     measurements: Iterable[dict],
     interval: Interval,
@@ -204,55 +231,52 @@ def fill_sparse_measurements(
     have an entry for every interval within the requested time range.
     Those placeholder entries will have empty measurement values.
     """
-    by_timestamp = {
-        measurement["timestamp_bin"].replace(tzinfo=timezone.utc): measurement
-        for measurement in measurements
-    }
-    timestamps = sorted(by_timestamp.keys())
-    if len(timestamps) == 0:
+    measurements = list(measurements)
+    if len(measurements) == 0:
         return []
 
-    delta = interval_deltas[interval]
+    # (the timestamps of measurements are almost always in UTC already)
+    timestamps = [
+        (
+            measurement["timestamp_bin"]
+            if measurement["timestamp_bin"].tzinfo is timezone.utc
+            else measurement["timestamp_bin"].replace(tzinfo=timezone.utc)
+        )
+        for measurement in measurements
+    ]
+    oldest_date = min(timestamps)
 
     if start_date is None:
-        start_date = timestamps[0]
+        start_date = oldest_date
     start_date = aligned_start_date(interval, start_date)
 
     if end_date is None:
         end_date = timezone.now()
 
-    intervals = []
+    bins = _interval_bins(interval, start_date, end_date)
+    intervals = [
+        {"timestamp_bin": timestamp, "avg": None, "min": None, "max": None}
+        for timestamp in bins
+    ]
 
-    current_date = start_date
-    while current_date <= end_date:
-        if current_date in by_timestamp:
-            intervals.append(by_timestamp[current_date])
-        else:
-            # interval not found
-            intervals.append(
-                {
-                    "timestamp_bin": current_date,
-                    "avg": None,
-                    "min": None,
-                    "max": None,
-                }
-            )
-        current_date += delta
-
-    if len(timestamps) > 0:
-        oldest_date = timestamps[0]
-        if (
-            oldest_date <= start_date
-            and len(intervals) > 0
-            and intervals[0]["avg"] is None
-        ):
-            # we're missing the first datapoint but we can carry forward
-            # and older measurement that was selected
-            measurement = by_timestamp[oldest_date]
-            intervals[0] = {
-                **measurement,
-                "timestamp_bin": start_date,
-            }
+    # place each measurement directly at the index of its bin (measurements that
+    # are not aligned on a bin of the range are ignored)
+    delta = interval_deltas[interval]
+    oldest = None
+    for timestamp, measurement in zip(timestamps, measurements):
+        index, remainder = divmod(timestamp - start_date, delta)
+        if not remainder and 0 <= index < len(intervals):
+            intervals[index] = measurement
+        if timestamp == oldest_date:
+            oldest = measurement
+
+    if oldest_date <= start_date and len(intervals) > 0 and intervals[0]["avg"] is None:
+        # we're missing the first datapoint but we can carry forward
+        # and older measurement that was selected
+        intervals[0] = {
+            **oldest,
+            "timestamp_bin": start_date,
+        }
 
     return intervals
 
@@ -262,11 +286,32 @@ def coverage_fallback_query(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     repos: Optional[List[Repository]] = None,
+    rollups: bool = True,
     **filters,
 ):
     """
     Query for coverage timeseries directly from the database
+
+    With `COVERAGE_FALLBACK_ROLLUP_ENABLED` the measurements may be computed from
+    the cached coverage rollups (and returned as a list) unless `rollups` is false,
+    in which case a queryset is always returned.
     """
+    if settings.COVERAGE_FALLBACK_ROLLUP_ENABLED and rollups:
+        if repos is not None and not filters:
+            return rollup_coverage_measurements(
+                interval,
+                [(repo.repoid, repo.branch) for repo in repos],
+                start_date=start_date,
+                end_date=end_date,
+            )
+        if filters.keys() == {"repository_id", "branch"}:
+            return rollup_coverage_measurements(
+                interval,
+                [(filters["repository_id"], filters["branch"])],
+                start_date=start_date,
+                end_date=end_date,
+            )
+
     timestamp_filters = {}
     if start_date is not None:
         timestamp_filters["timestamp__gte"] = start_date
@@ -292,7 +337,7 @@ def coverage_fallback_query(
         return commits.order_by("timestamp_bin")
 
 
-def _commits_coverage(
+def _annotate_commits_coverage(
     commits_queryset: QuerySet[Commit], interval: Interval
 ) -> QuerySet[Commit]:
     intervals = {
@@ -301,19 +346,24 @@ def _commits_coverage(
         Interval.INTERVAL_30_DAY: "30 days",
     }
 
+    return commits_queryset.annotate(
+        timestamp_bin=Func(
+            Value(intervals[interval]),
+            F("timestamp"),
+            Value("2000-01-03"),  # mimic how Timescale aligns bins
+            function="date_bin",
+            template="%(function)s(%(expressions)s) at time zone 'utc'",
+            output_field=DateTimeField(),
+        ),
+        coverage=Cast(KeyTextTransform("c", "totals"), output_field=FloatField()),
+    ).filter(coverage__isnull=False)
+
+
+def _commits_coverage(
+    commits_queryset: QuerySet[Commit], interval: Interval
+) -> QuerySet[Commit]:
     return (
-        commits_queryset.annotate(
-            timestamp_bin=Func(
-                Value(intervals[interval]),
-                F("timestamp"),
-                Value("2000-01-03"),  # mimic how Timescale aligns bins
-                function="date_bin",
-                template="%(function)s(%(expressions)s) at time zone 'utc'",
-                output_field=DateTimeField(),
-            ),
-            coverage=Cast(KeyTextTransform("c", "totals"), output_field=FloatField()),
-        )
-        .filter(coverage__isnull=False)
+        _annotate_commits_coverage(commits_queryset, interval)
         .values("timestamp_bin")
         .annotate(
             min=Min("coverage"),
@@ -324,17 +374,280 @@ def _commits_coverage(
     )
 
 
+def _rollup_key(repository_id: int, branch: str, interval: Interval) -> str:
+    return f"coverage-rollup/{repository_id}/{branch}/{interval.value}"
+
+
+def _utc(date: datetime) -> datetime:
+    if date.tzinfo is None:
+        return date.replace(tzinfo=timezone.utc)
+    return date
+
+
+def _rollup_commits(
+    interval: Interval, conditions: List[Q]
+) -> Dict[Tuple[int, str], Dict[datetime, list]]:
+    """
+    [min, max, sum, count] of the coverage of the commits matching any of the
+    `conditions`, by (repository id, branch) and time bin.
+    """
+    commits = Commit.objects.filter(reduce(operator.or_, conditions))
+    rows = (
+        _annotate_commits_coverage(commits, interval)
+        .values("repository_id", "branch", "timestamp_bin")
+        .annotate(
+            min=Min("coverage"),
+            max=Max("coverage"),
+            sum=Sum("coverage"),
+            count=Count("coverage"),
+        )
+        .order_by()
+    )
+
+    bins = {}
+    for row in rows:
+        bins.setdefault((row["repository_id"], row["branch"]), {})[
+            row["timestamp_bin"]
+        ] = [row["min"], row["max"], row["sum"], row["count"]]
+    return bins
+
+
+def _updated_commits(
+    conditions: List[Q],
+) -> Dict[Tuple[int, str], Tuple[datetime, datetime]]:
+    """
+    Earliest `timestamp` and latest `updatestamp` of the commits matching any of
+    the `conditions`, by (repository id, branch).
+    """
+    rows = (
+        Commit.objects.filter(reduce(operator.or_, conditions))
+        .values("repository_id", "branch")
+        .annotate(since=Min("timestamp"), watermark=Max("updatestamp"))
+        .order_by()
+    )
+    return {
+        (row["repository_id"], row["branch"]): (row["since"], row["watermark"])
+        for row in rows
+    }
+
+
+def _coverage_rollups(
+    interval: Interval, repos: List[Tuple[int, str]]
+) -> List[Dict[datetime, list]]:
+    """
+    The coverage rollups (see `_rollup_commits`) of the given (repository id,
+    branch) pairs.
+
+    Rollups are cached in Redis for `COVERAGE_FALLBACK_ROLLUP_TTL` seconds from when
+    they were first computed.  The latest commit `updatestamp` serves as the
+    watermark: the bins of the commits updated since then (new commits, commits
+    whose totals landed late or commits with older timestamps) are recomputed
+    along with all the later bins.
+    """
+    keys = [_rollup_key(repoid, branch, interval) for repoid, branch in repos]
+    try:
+        cached = redis.mget(keys) if keys else []
+    except RedisError:
+        log.warning("Error reading coverage rollups from cache")
+        cached = [None] * len(keys)
+
+    rollups = {}
+    watermarks = {}
+    for repo, value in zip(repos, cached):
+        if value is not None:
+            value = json.loads(value)
+            rollups[repo] = {
+                datetime.fromisoformat(timestamp): values
+                for timestamp, values in value["bins"]
+            }
+            watermarks[repo] = datetime.fromisoformat(value["watermark"])
+
+    # the rollups to recompute, from the given time bin onwards or entirely (None)
+    stale = {}
+    if watermarks:
+        updated = _updated_commits(
+            [
+                Q(repository_id=repoid, branch=branch, updatestamp__gt=watermark)
+                for (repoid, branch), watermark in watermarks.items()
+            ]
+        )
+        for repo, (since, watermark) in updated.items():
+            stale[repo] = aligned_start_date(interval, _utc(since))
+            watermarks[repo] = watermark
+            rollups[repo] = {
+                timestamp: values
+                for timestamp, values in rollups[repo].items()
+                if timestamp < stale[repo]
+            }
+    missing = [repo for repo in repos if repo not in rollups]
+    if missing:
+        updated = _updated_commits(
+            [Q(repository_id=repoid, branch=branch) for repoid, branch in missing]
+        )
+        for repo, (_, watermark) in updated.items():
+            stale[repo] = None
+            watermarks[repo] = watermark
+            rollups[repo] = {}
+
+    if not stale:
+        return [rollups.get(repo, {}) for repo in repos]
+
+    fresh = _rollup_commits(
+        interval,
+        [
+            Q(repository_id=repoid, branch=branch, timestamp__gte=since)
+            if since is not None
+            else Q(repository_id=repoid, branch=branch)
+            for (repoid, branch), since in stale.items()
+        ],
+    )
+    try:
+        with redis.pipeline() as pipeline:
+            for repo, key in zip(repos, keys):
+                if repo not in stale:
+                    continue
+                rollups[repo].update(fresh.get(repo, {}))
+                value = json.dumps(
+                    {
+                        "watermark": watermarks[repo].isoformat(),
+                        "bins": [
+                            [timestamp.isoformat(), values]
+                            for timestamp, values in sorted(rollups[repo].items())
+                        ],
+                    }
+                )
+                if stale[repo] is None:
+                    pipeline.set(key, value, ex=settings.COVERAGE_FALLBACK_ROLLUP_TTL)
+                else:
+                    # incremental writes keep the expiry of the cached rollup so
+                    # that it is eventually recomputed from scratch
+                    pipeline.set(key, value, xx=True, keepttl=True)
+            pipeline.execute()
+    except RedisError:
+        log.warning("Error writing coverage rollups to cache")
+    return [rollups[repo] for repo in repos]
+
+
+def _merge_bin(bins: Dict[datetime, list], timestamp: datetime, values: list):
+    if timestamp in bins:
+        min_, max_, sum_, count = bins[timestamp]
+        bins[timestamp] = [
+            min(min_, values[0]),
+            max(max_, values[1]),
+            sum_ + values[2],
+            count + values[3],
+        ]
+    else:
+        bins[timestamp] = list(values)
+
+
+def rollup_coverage_measurements(
+    interval: Interval,
+    repos: List[Tuple[int, str]],
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Same as `coverage_fallback_query` for the given (repository id, branch) pairs.
+    The time bins lying entirely within the range come from the cached coverage
+    rollups while the bins containing `start_date` and `end_date` (which those
+    dates split) are aggregated from the commits.
+    """
+    if not repos:
+        return []
+
+    delta = interval_deltas[interval]
+    start_bin = end_bin = None
+    if start_date is not None:
+        start_date = _utc(start_date)
+        start_bin = aligned_start_date(interval, start_date)
+    if end_date is not None:
+        end_date = _utc(end_date)
+        end_bin = aligned_start_date(interval, end_date)
+
+    combined = {}
+    older = {}
+    for bins in _coverage_rollups(interval, repos):
+        for timestamp, values in bins.items():
+            if start_bin is not None and timestamp < start_bin:
+                _merge_bin(older, timestamp, values)
+            elif (start_bin is None or timestamp > start_bin) and (
+                end_bin is None or timestamp < end_bin
+            ):
+                _merge_bin(combined, timestamp, values)
+
+    edges = [
+        Q(timestamp__gte=edge_bin, timestamp__lt=edge_bin + delta)
+        for edge_bin in {start_bin, end_bin}
+        if edge_bin is not None
+    ]
+    if edges:
+        in_range = Q()
+        if start_date is not None:
+            in_range &= Q(timestamp__gte=start_date)
+        if end_date is not None:
+            in_range &= Q(timestamp__lte=end_date)
+        if start_date is not None:
+            in_range |= Q(timestamp__lt=start_date)
+            before_start = ExpressionWrapper(
+                Q(timestamp__lt=start_date), output_field=BooleanField()
+            )
+        else:
+            before_start = Value(False)
+        commits = Commit.objects.filter(
+            reduce(
+                operator.or_,
+                [Q(repository_id=repoid, branch=branch) for repoid, branch in repos],
+            )
+        ).filter(reduce(operator.or_, edges), in_range)
+        rows = (
+            _annotate_commits_coverage(commits, interval)
+            .annotate(before_start=before_start)
+            .values("timestamp_bin", "before_start")
+            .annotate(
+                min=Min("coverage"),
+                max=Max("coverage"),
+                sum=Sum("coverage"),
+                count=Count("coverage"),
+            )
+            .order_by()
+        )
+        for row in rows:
+            target = older if row["before_start"] else combined
+            target[row["timestamp_bin"]] = [
+                row["min"],
+                row["max"],
+                row["sum"],
+                row["count"],
+            ]
+
+    # carry the latest older datapoint forward (see `coverage_fallback_query`)
+    measurements = sorted(older.items())[-1:] + sorted(combined.items())
+    return [
+        {
+            "timestamp_bin": timestamp,
+            "min": min_,
+            "max": max_,
+            "avg": sum_ / count,
+        }
+        for timestamp, (min_, max_, sum_, count) in measurements
+    ]
+
+
 def repository_coverage_measurements_with_fallback(
     repository: Repository,
     interval: Interval,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     branch: str = None,
+    rollups: bool = True,
 ):
     """
     Tries to return repository coverage measurements from Timescale.
     If those are not available then we trigger a backfill and return computed results
     directly from the primary database (much slower to query).
+
+    `rollups` is passed through to `coverage_fallback_query`.
     """
     dataset = None
     if settings.TIMESERIES_ENABLED:
@@ -368,6 +681,7 @@ def repository_coverage_measurements_with_fallback(
             interval,
             start_date=start_date,
             end_date=end_date,
+            rollups=rollups,
             repository_id=repository.pk,
             branch=branch or repository.branch,
         )
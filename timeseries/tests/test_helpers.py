@@ -1,6 +1,7 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from unittest.mock import call, patch
 
+import fakeredis
 import pytest
 from django.conf import settings
 from django.test import TransactionTestCase
@@ -11,9 +12,11 @@ from shared.reports.resources import Report, ReportFile, ReportLine
 from shared.utils.sessions import Session
 
 from codecov_auth.tests.factories import OwnerFactory
+from core.models import Repository
 from core.tests.factories import CommitFactory, RepositoryFactory
 from reports.tests.factories import RepositoryFlagFactory
 from timeseries.helpers import (
+    coverage_fallback_query,
     coverage_measurements,
     fill_sparse_measurements,
     owner_coverage_measurements_with_fallback,
@@ -381,6 +384,61 @@ class FillSparseMeasurementsTest(TransactionTestCase):
     def test_fill_sparse_measurements_no_measurements(self):
         assert fill_sparse_measurements([], Interval.INTERVAL_1_DAY, None, None) == []
 
+    def test_fill_sparse_measurements_unaligned_and_naive(self):
+        measurements = [
+            # naive timestamps are treated as UTC
+            {"timestamp_bin": datetime(2022, 1, 1), "avg": 1, "min": 1, "max": 1},
+            # not aligned on a bin
+            {
+                "timestamp_bin": datetime(2022, 1, 2, 12, tzinfo=timezone.utc),
+                "avg": 2,
+                "min": 2,
+                "max": 2,
+            },
+            # outside of the range
+            {
+                "timestamp_bin": datetime(2022, 1, 10, tzinfo=timezone.utc),
+                "avg": 3,
+                "min": 3,
+                "max": 3,
+            },
+        ]
+        start_date = datetime(2022, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+        end_date = datetime(2022, 1, 2, 0, 0, 0, tzinfo=timezone.utc)
+
+        assert fill_sparse_measurements(
+            measurements, Interval.INTERVAL_1_DAY, start_date, end_date
+        ) == [
+            measurements[0],
+            {
+                "timestamp_bin": datetime(2022, 1, 2, 0, 0, tzinfo=timezone.utc),
+                "avg": None,
+                "min": None,
+                "max": None,
+            },
+        ]
+
+    def test_fill_sparse_measurements_many_series(self):
+        start_date = datetime(2021, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+        end_date = datetime(2022, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+        for step in range(1, 20):
+            measurements = [
+                {
+                    "timestamp_bin": start_date + timedelta(days=day),
+                    "avg": day,
+                    "min": day,
+                    "max": day,
+                }
+                for day in range(0, 366, step)
+            ]
+            filled = fill_sparse_measurements(
+                measurements, Interval.INTERVAL_1_DAY, start_date, end_date
+            )
+            assert len(filled) == 366
+            assert [
+                measurement["avg"] for measurement in filled if measurement["avg"]
+            ] == list(range(step, 366, step))
+
 
 @pytest.mark.skipif(
     not settings.TIMESERIES_ENABLED, reason="requires timeseries data storage"
@@ -1132,3 +1190,165 @@ class OwnerCoverageMeasurementsWithFallbackTest(TransactionTestCase):
                 "max": 80.0,
             },
         ]
+
+
+@patch("timeseries.helpers.redis", new_callable=fakeredis.FakeRedis)
+class CoverageFallbackRollupTest(TransactionTestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.owner = OwnerFactory()
+        self.repo1 = RepositoryFactory(author=self.owner, branch="master")
+        self.repo2 = RepositoryFactory(author=self.owner, branch="master")
+        for repo, timestamp, coverage in [
+            (self.repo1, datetime(2021, 12, 20, 1, 0, 0), 50.0),
+            (self.repo1, datetime(2022, 1, 1, 1, 0, 0), 80.0),
+            (self.repo1, datetime(2022, 1, 1, 2, 0, 0), 85.0),
+            (self.repo1, datetime(2022, 1, 2, 1, 0, 0), 80.0),
+            (self.repo2, datetime(2022, 1, 1, 1, 0, 0), 60.0),
+            (self.repo2, datetime(2022, 1, 2, 1, 0, 0), 90.0),
+        ]:
+            CommitFactory(
+                repository=repo,
+                branch="master",
+                timestamp=timestamp,
+                totals={"c": coverage},
+            )
+        CommitFactory(
+            repository=self.repo1,
+            branch="other",
+            timestamp=datetime(2022, 1, 1, 3, 0, 0),
+            totals={"c": 10.0},
+        )
+        self.start_date = datetime(2021, 12, 31, 0, 0, 0, tzinfo=timezone.utc)
+        self.end_date = datetime(2022, 1, 3, 0, 0, 0, tzinfo=timezone.utc)
+
+    def _fallback(self, **kwargs):
+        return [
+            {**measurement, "avg": round(measurement["avg"], 5)}
+            for measurement in coverage_fallback_query(
+                Interval.INTERVAL_1_DAY,
+                start_date=self.start_date,
+                end_date=self.end_date,
+                **kwargs,
+            )
+        ]
+
+    def test_repository_rollup(self, redis):
+        expected = self._fallback(repository_id=self.repo1.pk, branch="master")
+        with self.settings(COVERAGE_FALLBACK_ROLLUP_ENABLED=True):
+            assert self._fallback(repository_id=self.repo1.pk, branch="master") == (
+                expected
+            )
+            assert redis.get(f"coverage-rollup/{self.repo1.pk}/master/1") is not None
+
+            # the cached rollup is extended with newer commits
+            CommitFactory(
+                repository=self.repo1,
+                branch="master",
+                timestamp=datetime(2022, 1, 2, 5, 0, 0),
+                totals={"c": 90.0},
+            )
+            res = self._fallback(repository_id=self.repo1.pk, branch="master")
+        assert res[-1] == {
+            "timestamp_bin": datetime(2022, 1, 2, tzinfo=timezone.utc),
+            "avg": 85.0,
+            "min": 80.0,
+            "max": 90.0,
+        }
+
+    def test_owner_rollup(self, redis):
+        repos = Repository.objects.filter(
+            repoid__in=[self.repo1.pk, self.repo2.pk]
+        ).only("repoid", "branch")
+        expected = self._fallback(repos=repos)
+        with self.settings(COVERAGE_FALLBACK_ROLLUP_ENABLED=True):
+            assert self._fallback(repos=repos) == expected
+            # the cached rollups are read back as no commits were updated
+            assert self._fallback(repos=repos) == expected
+
+    def test_rollup_other_filters(self, redis):
+        with self.settings(COVERAGE_FALLBACK_ROLLUP_ENABLED=True):
+            self._fallback(repository_id=self.repo1.pk)
+        assert redis.keys(f"coverage-rollup/{self.repo1.pk}/*") == []
+
+    def test_rollup_split_bins(self, redis):
+        # both dates fall in the middle of a time bin
+        self.start_date = datetime(2022, 1, 1, 1, 30, 0, tzinfo=timezone.utc)
+        self.end_date = datetime(2022, 1, 2, 0, 30, 0, tzinfo=timezone.utc)
+        expected = self._fallback(repository_id=self.repo1.pk, branch="master")
+        with self.settings(COVERAGE_FALLBACK_ROLLUP_ENABLED=True):
+            res = self._fallback(repository_id=self.repo1.pk, branch="master")
+        # the older and the first datapoints share a time bin
+        assert sorted(res, key=lambda m: m["avg"]) == sorted(
+            expected, key=lambda m: m["avg"]
+        )
+        assert res == [
+            {
+                "timestamp_bin": datetime(2022, 1, 1, tzinfo=timezone.utc),
+                "avg": 80.0,
+                "min": 80.0,
+                "max": 80.0,
+            },
+            {
+                "timestamp_bin": datetime(2022, 1, 1, tzinfo=timezone.utc),
+                "avg": 85.0,
+                "min": 85.0,
+                "max": 85.0,
+            },
+        ]
+
+    def test_rollup_late_commits(self, redis):
+        with self.settings(COVERAGE_FALLBACK_ROLLUP_ENABLED=True):
+            self._fallback(repository_id=self.repo1.pk, branch="master")
+
+            # commits with older timestamps and totals that land late
+            CommitFactory(
+                repository=self.repo1,
+                branch="master",
+                timestamp=datetime(2021, 12, 31, 5, 0, 0),
+                totals={"c": 40.0},
+            )
+            commit = CommitFactory(
+                repository=self.repo1,
+                branch="master",
+                timestamp=datetime(2022, 1, 1, 5, 0, 0),
+                totals=None,
+            )
+            commit.totals = {"c": 90.0}
+            commit.updatestamp = timezone.now()
+            commit.save()
+
+            res = self._fallback(repository_id=self.repo1.pk, branch="master")
+        assert res == self._fallback(repository_id=self.repo1.pk, branch="master")
+        assert res[1:3] == [
+            {
+                "timestamp_bin": datetime(2021, 12, 31, tzinfo=timezone.utc),
+                "avg": 40.0,
+                "min": 40.0,
+                "max": 40.0,
+            },
+            {
+                "timestamp_bin": datetime(2022, 1, 1, tzinfo=timezone.utc),
+                "avg": 85.0,
+                "min": 80.0,
+                "max": 90.0,
+            },
+        ]
+
+    def test_rollup_keeps_ttl(self, redis):
+        key = f"coverage-rollup/{self.repo1.pk}/master/1"
+        with self.settings(
+            COVERAGE_FALLBACK_ROLLUP_ENABLED=True, COVERAGE_FALLBACK_ROLLUP_TTL=3600
+        ):
+            self._fallback(repository_id=self.repo1.pk, branch="master")
+            redis.expire(key, 60)
+
+            CommitFactory(
+                repository=self.repo1,
+                branch="master",
+                timestamp=datetime(2022, 1, 2, 5, 0, 0),
+                totals={"c": 90.0},
+            )
+            self._fallback(repository_id=self.repo1.pk, branch="master")
+        assert 0 < redis.ttl(key) <= 60
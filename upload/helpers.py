@@ -31,12 +31,17 @@ from services.analytics import AnalyticsService
 from services.redis_configuration import get_redis_connection
 from services.repo_providers import RepoProviderService
 from services.task import TaskService
+from services.upload_auth_cache import repository_upload_token_key, upload_auth_cache
 from upload.tokenless.tokenless import TokenlessUploadHandler
 from utils import is_uuid
 from utils.config import get_config
 from utils.encryption import encryptor
 from utils.github import get_github_integration_token
-from utils.uploads_used import get_uploads_used, increment_uploads_used
+from utils.uploads_used import (
+    get_uploads_used,
+    increment_uploads_used,
+    uploads_used_increment,
+)
 
 from .constants import ci, global_upload_token_providers
 
@@ -45,6 +50,30 @@ is_pull_noted_in_branch = re.compile(r".*(pull|pr)\/(\d+).*")
 log = logging.getLogger(__name__)
 redis = get_redis_connection()
 
+# The Redis bookkeeping of `dispatch_upload_task` in one atomic round-trip:
+# KEYS = [uploads queue, latest upload, uploads used]
+# ARGV = [task arguments, queue TTL, latest upload timestamp, uploads used TTL,
+#         "1" if uploads used is a daily counter, "0" if it is the cached total and
+#         "" if the upload does not count towards the limit]
+# Like `increment_uploads_used`, a cached uploads used total is only incremented when
+# present.
+dispatch_upload_script = redis.register_script(
+    """
+    redis.call("rpush", KEYS[1], ARGV[1])
+    redis.call("expire", KEYS[1], ARGV[2])
+    redis.call("setex", KEYS[2], 3600, ARGV[3])
+    if ARGV[5] == "1" then
+        redis.call("incr", KEYS[3])
+        redis.call("expire", KEYS[3], ARGV[4])
+    elseif ARGV[5] == "0" then
+        local uploads_used = redis.call("get", KEYS[3])
+        if uploads_used then
+            redis.call("set", KEYS[3], tonumber(uploads_used) + 1, "ex", ARGV[4])
+        end
+    end
+    """
+)
+
 
 def parse_params(data):
     """
@@ -249,6 +278,15 @@ def get_repo_with_github_actions_oidc_token(token):
     return repository
 
 
+def get_repository_by_upload_token(token) -> Optional[Repository]:
+    queryset = Repository.objects.select_related("author")
+    return upload_auth_cache.get_or_fetch(
+        repository_upload_token_key(token),
+        lambda: queryset.filter(upload_token=token).first(),
+        queryset,
+    )
+
+
 def determine_repo_for_upload(upload_params):
     token = upload_params.get("token")
     using_global_token = upload_params.get("using_global_token")
@@ -256,9 +294,8 @@ def determine_repo_for_upload(upload_params):
 
     if token and not using_global_token:
         if is_uuid(token):
-            try:
-                repository = Repository.objects.get(upload_token=token)
-            except ObjectDoesNotExist:
+            repository = get_repository_by_upload_token(token)
+            if repository is None:
                 raise NotFound(
                     f"Could not find a repository associated with upload token {token}"
                 )
@@ -713,23 +750,53 @@ def dispatch_upload_task(
     ):
         countdown = 4
 
-    redis.rpush(repo_queue_key, dumps(task_arguments))
-    redis.expire(
-        repo_queue_key, cache_uploads_eta if cache_uploads_eta is not True else 86400
-    )
-
     if report_type == CommitReport.ReportType.COVERAGE:
         latest_upload_key = (
             f"latest_upload/{repository.repoid}/{task_arguments.get('commit')}"
         )
     else:
         latest_upload_key = f"latest_upload/{repository.repoid}/{task_arguments.get('commit')}/{report_type}"
-    redis.setex(
-        latest_upload_key,
-        3600,
-        timezone.now().timestamp(),
+
+    # only the coverage uploads of private repositories count towards the uploads
+    # limit (see `utils.uploads_used.query_uploads_used`)
+    counts_towards_limit = (
+        repository.private and report_type == CommitReport.ReportType.COVERAGE
     )
-    increment_uploads_used(redis, repository.author)
+
+    if settings.UPLOAD_FAST_DISPATCH_ENABLED:
+        uploads_used_key, uploads_used_ttl, is_counter = uploads_used_increment(
+            repository.author
+        )
+        if not counts_towards_limit:
+            uploads_used_mode = ""
+        elif is_counter:
+            uploads_used_mode = "1"
+        else:
+            uploads_used_mode = "0"
+        dispatch_upload_script(
+            keys=[repo_queue_key, latest_upload_key, uploads_used_key],
+            args=[
+                dumps(task_arguments),
+                cache_uploads_eta if cache_uploads_eta is not True else 86400,
+                timezone.now().timestamp(),
+                uploads_used_ttl,
+                uploads_used_mode,
+            ],
+            client=redis,
+        )
+    else:
+        redis.rpush(repo_queue_key, dumps(task_arguments))
+        redis.expire(
+            repo_queue_key,
+            cache_uploads_eta if cache_uploads_eta is not True else 86400,
+        )
+        redis.setex(
+            latest_upload_key,
+            3600,
+            timezone.now().timestamp(),
+        )
+        if counts_towards_limit:
+            increment_uploads_used(redis, repository.author)
     commitid = task_arguments.get("commit")
 
     TaskService().upload(
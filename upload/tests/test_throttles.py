@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock, Mock, patch
 
+import fakeredis
 from django.test import override_settings
 from rest_framework.test import APITestCase
 
@@ -7,7 +8,11 @@ from core.tests.factories import CommitFactory, OwnerFactory, RepositoryFactory
 from plan.constants import PlanName
 from reports.tests.factories import CommitReportFactory, UploadFactory
 from services.redis_configuration import get_redis_connection
-from upload.throttles import UploadsPerCommitThrottle, UploadsPerWindowThrottle
+from upload.throttles import (
+    UploadsPerCommitThrottle,
+    UploadsPerWindowThrottle,
+    increment_commit_upload_count,
+)
 
 
 class ThrottlesUnitTests(APITestCase):
@@ -173,3 +178,31 @@ class ThrottlesUnitTests(APITestCase):
         for i in range(300):
             UploadFactory.create(report__commit__repository=repository)
         self.uploads_per_window_throttled(commit)
+
+    @override_settings(UPLOAD_COMMIT_COUNTERS_ENABLED=True)
+    @patch("upload.throttles.redis", new_callable=fakeredis.FakeRedis)
+    def test_uploads_per_commit_counter(self, redis):
+        self.owner.max_upload_limit = 2
+        self.owner.save()
+        repository = RepositoryFactory(author=self.owner)
+        commit = CommitFactory(repository=repository)
+        report = CommitReportFactory(commit=commit)
+        for i in range(2):
+            UploadFactory(report=report)
+
+        # the uploads are counted in the database once
+        with self.assertNumQueries(1):
+            self.uploads_per_commit_not_throttled(commit)
+        with self.assertNumQueries(0):
+            self.uploads_per_commit_not_throttled(commit)
+
+        UploadFactory(report=report)
+        increment_commit_upload_count(commit)
+        with self.assertNumQueries(0):
+            self.uploads_per_commit_throttled(commit)
+
+        # without a counter the uploads are counted again
+        redis.flushall()
+        increment_commit_upload_count(commit)
+        with self.assertNumQueries(1):
+            self.uploads_per_commit_throttled(commit)
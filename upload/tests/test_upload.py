@@ -4,6 +4,7 @@ from json import dumps, loads
 from unittest.mock import ANY, Mock, PropertyMock, call, patch
 from urllib.parse import urlencode
 
+import fakeredis
 import pytest
 import requests
 from celery.canvas import Signature
@@ -27,6 +28,7 @@ from codecov_auth.models import Owner
 from codecov_auth.tests.factories import OwnerFactory
 from core.models import Commit, Repository
 from core.tests.factories import CommitFactory, PullFactory
+from reports.models import CommitReport
 from reports.tests.factories import CommitReportFactory, UploadFactory
 from upload.helpers import (
     determine_repo_for_upload,
@@ -43,6 +45,7 @@ from upload.helpers import (
 )
 from upload.tokenless.tokenless import TokenlessUploadHandler
 from utils.encryption import encryptor
+from utils.uploads_used import uploads_used_counter_key
 
 
 def mock_get_config_global_upload_tokens(*args):
@@ -905,6 +908,84 @@ class UploadHandlerHelpersTest(TestCase):
             report_type="coverage",
         )
 
+    @freeze_time("2023-01-01T00:00:00")
+    @override_settings(UPLOAD_FAST_DISPATCH_ENABLED=True)
+    @patch("upload.helpers.dispatch_upload_script")
+    @patch("services.task.TaskService.upload")
+    def test_dispatch_upload_task_fast_dispatch(self, upload, dispatch_upload_script):
+        repo = G(Repository, private=True)
+        task_arguments = {
+            "commit": "commit123",
+            "version": "v4",
+            "report_code": "local_report",
+        }
+        redis = Mock()
+
+        dispatch_upload_task(task_arguments, repo, redis)
+        # all the bookkeeping is done by the script, in one call
+        dispatch_upload_script.assert_called_once_with(
+            keys=[
+                f"uploads/{repo.repoid}/commit123",
+                f"latest_upload/{repo.repoid}/commit123",
+                f"monthly_upload_usage_{repo.author.ownerid}",
+            ],
+            args=[
+                dumps(task_arguments),
+                86400,
+                timezone.now().timestamp(),
+                21600,
+                "0",
+            ],
+            client=redis,
+        )
+        assert redis.method_calls == []
+        upload.assert_called_once_with(
+            repoid=repo.repoid,
+            commitid=task_arguments.get("commit"),
+            report_code="local_report",
+            countdown=4,
+            report_type="coverage",
+        )
+
+    @freeze_time("2023-01-01T00:00:00")
+    @override_settings(UPLOAD_FAST_DISPATCH_ENABLED=True)
+    @patch("upload.helpers.dispatch_upload_script")
+    @patch("services.task.TaskService.upload")
+    def test_dispatch_upload_task_fast_dispatch_not_counted(
+        self, upload, dispatch_upload_script
+    ):
+        repo = G(Repository, private=False)
+        task_arguments = {
+            "commit": "commit123",
+            "version": "v4",
+            "report_code": "local_report",
+        }
+        redis = Mock()
+
+        dispatch_upload_task(task_arguments, repo, redis)
+        # uploads to public repositories do not count towards the limit
+        assert dispatch_upload_script.call_args.kwargs["args"][4] == ""
+
+    @override_settings(UPLOAD_USAGE_COUNTERS_ENABLED=True)
+    @patch("services.task.TaskService.upload")
+    def test_dispatch_upload_task_counts_private_coverage_uploads(self, upload):
+        redis = fakeredis.FakeRedis()
+        owner = OwnerFactory()
+        private_repo = G(Repository, author=owner, private=True)
+        public_repo = G(Repository, author=owner, private=False)
+        task_arguments = {"commit": "commit123", "version": "v4"}
+
+        dispatch_upload_task(task_arguments, private_repo, redis)
+        dispatch_upload_task(task_arguments, public_repo, redis)
+        dispatch_upload_task(
+            task_arguments,
+            private_repo,
+            redis,
+            report_type=CommitReport.ReportType.TEST_RESULTS,
+        )
+        key = uploads_used_counter_key(owner, timezone.now().date())
+        assert redis.get(key) == b"1"
+
 
 class UploadHandlerRouteTest(APITestCase):
     @pytest.fixture(scope="function", autouse=True)
@@ -2692,6 +2773,36 @@ class UploadHandlerGithubActionsTokenlessTest(TestCase):
             TokenlessUploadHandler("github-actions", params).verify_upload() == "github"
         )
 
+    @override_settings(TOKENLESS_LOOKUP_CACHE_ENABLED=True)
+    @patch("services.provider_lookup_cache.redis", new_callable=fakeredis.FakeRedis)
+    @patch("upload.tokenless.github_actions.TokenlessGithubActionsHandler.get_build")
+    def test_github_actions_build_is_cached(self, mock_get, redis):
+        mock_get.return_value = {
+            "commit_sha": "c739768fcac68144a3a6d82305b9c4106934d31a",
+            "slug": "owner/repo",
+            "public": True,
+            "finish_time": f"{datetime.utcnow()}".split(".")[0],
+        }
+        params = {
+            "build": "12",
+            "owner": "owner",
+            "repo": "repo",
+            "commit": "c739768fcac68144a3a6d82305b9c4106934d31a",
+        }
+
+        for _ in range(2):
+            assert (
+                TokenlessUploadHandler("github_actions", dict(params)).verify_upload()
+                == "github"
+            )
+        mock_get.assert_called_once()
+
+        # builds of other repositories are looked up
+        params["repo"] = "other-repo"
+        with pytest.raises(NotFound):
+            TokenlessUploadHandler("github_actions", params).verify_upload()
+        assert mock_get.call_count == 2
+
     def test_github_actions_no_owner(self):
         params = {}
 
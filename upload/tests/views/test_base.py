@@ -1,9 +1,12 @@
+from unittest.mock import patch
+
 import pytest
 from rest_framework.exceptions import ValidationError
 
 from core.tests.factories import CommitFactory, RepositoryFactory
 from reports.models import CommitReport
 from upload.views.base import GetterMixin
+from upload.views.helpers import get_repository_from_string
 
 
 def test_get_repo(db):
@@ -81,3 +84,29 @@ def test_get_report_error(db):
     with pytest.raises(ValidationError) as exp:
         generic_class.get_report(commit)
     assert exp.match("Report not found")
+
+
+def test_getters_are_memoized(db, django_assert_num_queries):
+    repository = RepositoryFactory(
+        name="the_repo", author__username="codecov", author__service="github"
+    )
+    commit = CommitFactory(repository=repository)
+    report = CommitReport.objects.create(
+        commit=commit, report_type=CommitReport.ReportType.COVERAGE
+    )
+    generic_class = GetterMixin()
+    generic_class.kwargs = dict(
+        repo="codecov::::the_repo", service="github", commit_sha=commit.commitid
+    )
+    with patch(
+        "upload.views.base.get_repository_from_string",
+        wraps=get_repository_from_string,
+    ) as mocked:
+        assert generic_class.get_repo() == repository
+        assert generic_class.get_repo() is generic_class.get_repo()
+    mocked.assert_called_once()
+
+    with django_assert_num_queries(2):
+        for i in range(2):
+            assert generic_class.get_commit(repository) == commit
+            assert generic_class.get_report(commit) == report
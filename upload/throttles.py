@@ -3,6 +3,7 @@ import logging
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
+from redis.exceptions import RedisError
 from rest_framework.throttling import BaseThrottle
 from shared.reports.enums import UploadType
 
@@ -17,16 +18,66 @@ log = logging.getLogger(__name__)
 redis = get_redis_connection()
 
 
+def _commit_upload_count_key(commit) -> str:
+    return f"commit_upload_count/{commit.id}"
+
+
+def commit_upload_count(commit) -> int:
+    """
+    Number of uploads of the commit that count towards its upload limit.  When
+    `settings.UPLOAD_COMMIT_COUNTERS_ENABLED` is set the count is kept in Redis (for
+    `settings.UPLOAD_COMMIT_COUNTER_TTL` seconds, after which it is counted again)
+    and incremented by `increment_commit_upload_count`.
+    """
+    if settings.UPLOAD_COMMIT_COUNTERS_ENABLED:
+        key = _commit_upload_count_key(commit)
+        try:
+            count = redis.get(key)
+            if count is not None:
+                return int(count)
+        except RedisError:
+            log.warning("Error reading commit upload count", extra=dict(key=key))
+
+    count = ReportSession.objects.filter(
+        ~Q(state="error"),
+        ~Q(upload_type=UploadType.CARRIEDFORWARD.db_name),
+        report__commit=commit,
+    ).count()
+
+    if settings.UPLOAD_COMMIT_COUNTERS_ENABLED:
+        try:
+            # another request may have counted (and incremented) the uploads meanwhile
+            redis.set(key, count, ex=settings.UPLOAD_COMMIT_COUNTER_TTL, nx=True)
+        except RedisError:
+            log.warning("Error writing commit upload count", extra=dict(key=key))
+    return count
+
+
+def increment_commit_upload_count(commit) -> None:
+    """
+    Records a new upload of the commit in its counter (when the counter exists,
+    otherwise the next `commit_upload_count` counts the uploads in the database).
+    """
+    if not settings.UPLOAD_COMMIT_COUNTERS_ENABLED:
+        return
+    key = _commit_upload_count_key(commit)
+    try:
+        if redis.exists(key):
+            with redis.pipeline() as pipeline:
+                pipeline.incr(key)
+                # in case the counter expired in between
+                pipeline.expire(key, settings.UPLOAD_COMMIT_COUNTER_TTL)
+                pipeline.execute()
+    except RedisError:
+        log.warning("Error incrementing commit upload count", extra=dict(key=key))
+
+
 class UploadsPerCommitThrottle(BaseThrottle):
     def allow_request(self, request, view):
         try:
             repository = view.get_repo()
             commit = view.get_commit(repository)
-            new_session_count = ReportSession.objects.filter(
-                ~Q(state="error"),
-                ~Q(upload_type=UploadType.CARRIEDFORWARD.db_name),
-                report__commit=commit,
-            ).count()
+            new_session_count = commit_upload_count(commit)
             max_upload_limit = repository.author.max_upload_limit or 150
             if new_session_count > max_upload_limit:
                 log.warning(
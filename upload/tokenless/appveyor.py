@@ -56,7 +56,7 @@ class TokenlessAppveyorHandler(BaseTokenlessUploadHandler):
 
         self.job = self.job.replace("+", "%20").replace(" ", "%20")
 
-        build = self.get_build()
+        build = self.get_cached_build(self.job)
 
         # validate build
         if not any(
@@ -74,7 +74,7 @@ class TokenlessAzureHandler(BaseTokenlessUploadHandler):
             )
         self.server_uri = self.upload_params.get("server_uri")
 
-        build = self.get_build()
+        build = self.get_cached_build(self.server_uri, self.project, self.job)
 
         # Build should have finished within the last 4 mins OR should have an 'inProgress' flag
         if build["status"] == "completed":
@@ -1,5 +1,10 @@
+from hashlib import sha256
+
+from django.conf import settings
 from rest_framework.exceptions import NotFound
 
+from services.provider_lookup_cache import cached_lookup
+
 
 class BaseTokenlessUploadHandler(object):
     def __init__(self, upload_params):
@@ -15,5 +20,17 @@ class BaseTokenlessUploadHandler(object):
     def get_build(self):
         raise NotImplementedError()
 
+    def get_cached_build(self, *identifiers):
+        """
+        Returns `get_build()`, cached for a short while by the `identifiers` of the
+        build in the CI provider (see `services.provider_lookup_cache`).
+        """
+        build_id = ":".join([type(self).__name__, *map(str, identifiers)])
+        return cached_lookup(
+            f"tokenless/build/{sha256(build_id.encode()).hexdigest()}",
+            self.get_build,
+            settings.TOKENLESS_BUILD_CACHE_TTL,
+        )
+
     def verify(self):
         raise NotImplementedError()
@@ -56,7 +56,7 @@ class TokenlessCircleciHandler(BaseTokenlessUploadHandler):
             )
         self.repo = self.upload_params.get("repo")
 
-        build = self.get_build()
+        build = self.get_cached_build(self.owner, self.repo, self.build)
 
         if build.get("vcs_revision", "") != self.upload_params.get("commit"):
             log.warning(
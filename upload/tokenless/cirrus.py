@@ -93,7 +93,7 @@ class TokenlessCirrusHandler(BaseTokenlessUploadHandler):
             )
         commit = self.upload_params.get("commit")
 
-        raw_build = self.get_build()
+        raw_build = self.get_cached_build(self.upload_params.get("build"))
         build = raw_build["data"]["build"]
 
         # Check repository
@@ -73,7 +73,7 @@ class TokenlessGithubActionsHandler(BaseTokenlessUploadHandler):
             )
         repo = self.upload_params.get("repo")
 
-        build = self.get_build()
+        build = self.get_cached_build(owner, repo, self.upload_params.get("build"))
 
         if (
             build["public"] != True
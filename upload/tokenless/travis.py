@@ -91,7 +91,11 @@ class TokenlessTravisHandler(BaseTokenlessUploadHandler):
 
     def verify(self):
         # find repo in travis.com
-        job = self.get_build()
+        job = self.get_cached_build(
+            self.upload_params["owner"],
+            self.upload_params["repo"],
+            self.upload_params["job"],
+        )
 
         slug = f"{self.upload_params['owner']}/{self.upload_params['repo']}"
 
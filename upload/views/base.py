@@ -24,9 +24,26 @@ class ShelterMixin:
 
 
 class GetterMixin(ShelterMixin):
+    """
+    Lookups of the repository, commit and report of an upload request.  They are
+    memoized on the view (which is instantiated per request) since the throttles,
+    permissions and the view itself all look them up.
+    """
+
+    def _memoized(self, key, compute):
+        memo = self.__dict__.setdefault("_getter_memo", {})
+        if key not in memo:
+            memo[key] = compute()
+        return memo[key]
+
     def get_repo(self) -> Repository:
         service = self.kwargs.get("service")
         repo_slug = self.kwargs.get("repo")
+        return self._memoized(
+            ("repo", service, repo_slug), lambda: self._get_repo(service, repo_slug)
+        )
+
+    def _get_repo(self, service, repo_slug) -> Repository:
         try:
             service_enum = Service(service)
         except ValueError:
@@ -47,6 +64,12 @@ class GetterMixin(ShelterMixin):
 
     def get_commit(self, repo: Repository) -> Commit:
         commit_sha = self.kwargs.get("commit_sha")
+        return self._memoized(
+            ("commit", repo.repoid, commit_sha),
+            lambda: self._get_commit(repo, commit_sha),
+        )
+
+    def _get_commit(self, repo: Repository, commit_sha) -> Commit:
         try:
             commit = Commit.objects.get(
                 commitid=commit_sha, repository__repoid=repo.repoid
@@ -63,6 +86,12 @@ class GetterMixin(ShelterMixin):
         self, commit: Commit, report_type=CommitReport.ReportType.COVERAGE
     ) -> CommitReport:
         report_code = self.kwargs.get("report_code")
+        return self._memoized(
+            ("report", commit.id, report_code, report_type),
+            lambda: self._get_report(commit, report_code, report_type),
+        )
+
+    def _get_report(self, commit: Commit, report_code, report_type) -> CommitReport:
         if report_code == "default":
             report_code = None
         queryset = CommitReport.objects.filter(code=report_code, commit=commit)
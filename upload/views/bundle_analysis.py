@@ -1,6 +1,7 @@
 import logging
 import uuid
 
+from django.conf import settings
 from rest_framework import serializers, status
 from rest_framework.exceptions import NotAuthenticated
 from rest_framework.permissions import BasePermission
@@ -18,7 +19,10 @@ from codecov_auth.models import Owner, Service
 from core.models import Commit
 from reports.models import CommitReport
 from services.archive import ArchiveService
-from services.redis_configuration import get_redis_connection
+from services.redis_configuration import (
+    get_pooled_redis_connection,
+    get_redis_connection,
+)
 from upload.helpers import dispatch_upload_task
 from upload.views.helpers import get_repository_from_string
 
@@ -123,7 +127,9 @@ class BundleAnalysisView(APIView):
         dispatch_upload_task(
             task_arguments,
             repo,
-            get_redis_connection(),
+            get_pooled_redis_connection()
+            if settings.UPLOAD_FAST_DISPATCH_ENABLED
+            else get_redis_connection(),
             report_type=CommitReport.ReportType.BUNDLE_ANALYSIS,
         )
 
@@ -2,6 +2,7 @@ import typing
 
 from codecov_auth.models import Owner, Service
 from core.models import Repository
+from services.upload_auth_cache import repository_slug_key, upload_auth_cache
 
 
 def get_repository_from_string(
@@ -13,6 +14,16 @@ def get_repository_from_string(
         return None
     if "::::" not in repo_identifier:
         return None
+    return upload_auth_cache.get_or_fetch(
+        repository_slug_key(service, repo_identifier),
+        lambda: _get_repository_from_string(service, repo_identifier),
+        Repository.objects.all(),
+    )
+
+
+def _get_repository_from_string(
+    service: Service, repo_identifier: str
+) -> typing.Optional[Repository]:
     owner_identifier, repo_name_identifier = repo_identifier.rsplit("::::", 1)
     owner = _get_owner_from_string(service, owner_identifier)
     if not owner:
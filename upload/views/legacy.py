@@ -27,7 +27,10 @@ from codecov_auth.commands.owner import OwnerCommands
 from core.commands.repository import RepositoryCommands
 from services.analytics import AnalyticsService
 from services.archive import ArchiveService
-from services.redis_configuration import get_redis_connection
+from services.redis_configuration import (
+    get_pooled_redis_connection,
+    get_redis_connection,
+)
 from upload.helpers import (
     check_commit_upload_constraints,
     determine_repo_for_upload,
@@ -176,7 +179,11 @@ class UploadHandler(APIView, ShelterMixin):
         )
 
         # Validate the upload to make sure the org has enough repo credits and is allowed to upload for this commit
-        redis = get_redis_connection()
+        redis = (
+            get_pooled_redis_connection()
+            if settings.UPLOAD_FAST_DISPATCH_ENABLED
+            else get_redis_connection()
+        )
         validate_upload(upload_params, repository, redis)
         log.info(
             "Upload was determined to be valid", extra=dict(repoid=repository.repoid)
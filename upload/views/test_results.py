@@ -1,6 +1,7 @@
 import logging
 import uuid
 
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import serializers, status
 from rest_framework.exceptions import NotAuthenticated
@@ -19,7 +20,10 @@ from codecov_auth.models import Owner, Service
 from core.models import Commit
 from reports.models import CommitReport
 from services.archive import ArchiveService, MinioEndpoints
-from services.redis_configuration import get_redis_connection
+from services.redis_configuration import (
+    get_pooled_redis_connection,
+    get_redis_connection,
+)
 from upload.helpers import dispatch_upload_task, generate_upload_sentry_metrics_tags
 from upload.serializers import FlagListField
 from upload.views.base import ShelterMixin
@@ -136,7 +140,9 @@ class TestResultsView(
         dispatch_upload_task(
             task_arguments,
             repo,
-            get_redis_connection(),
+            get_pooled_redis_connection()
+            if settings.UPLOAD_FAST_DISPATCH_ENABLED
+            else get_redis_connection(),
             report_type=CommitReport.ReportType.TEST_RESULTS,
         )
 
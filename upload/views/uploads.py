@@ -1,5 +1,6 @@
 import logging
 
+from django.conf import settings
 from django.http import HttpRequest, HttpResponseNotAllowed
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
@@ -23,14 +24,21 @@ from core.models import Commit, Repository
 from reports.models import CommitReport, ReportSession
 from services.analytics import AnalyticsService
 from services.archive import ArchiveService, MinioEndpoints
-from services.redis_configuration import get_redis_connection
+from services.redis_configuration import (
+    get_pooled_redis_connection,
+    get_redis_connection,
+)
 from upload.helpers import (
     dispatch_upload_task,
     generate_upload_sentry_metrics_tags,
     validate_activated_repo,
 )
 from upload.serializers import UploadSerializer
-from upload.throttles import UploadsPerCommitThrottle, UploadsPerWindowThrottle
+from upload.throttles import (
+    UploadsPerCommitThrottle,
+    UploadsPerWindowThrottle,
+    increment_commit_upload_count,
+)
 from upload.views.base import GetterMixin
 
 log = logging.getLogger(__name__)
@@ -104,6 +112,7 @@ class UploadViews(ListCreateAPIView, GetterMixin):
             report_id=report.id,
             upload_extras={"format_version": "v1"},
         )
+        increment_commit_upload_count(commit)
 
         # only Shelter requests are allowed to set their own `storage_path`
         if instance.storage_path is None or not self.is_shelter_request():
@@ -143,7 +152,11 @@ class UploadViews(ListCreateAPIView, GetterMixin):
                 report_code=report.code,
             ),
         )
-        redis = get_redis_connection()
+        redis = (
+            get_pooled_redis_connection()
+            if settings.UPLOAD_FAST_DISPATCH_ENABLED
+            else get_redis_connection()
+        )
         task_arguments = {
             "commit": commit_sha,
             "upload_id": upload.id,
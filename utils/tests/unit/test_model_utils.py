@@ -6,7 +6,13 @@ from shared.utils.ReportEncoder import ReportEncoder
 
 from core.models import Commit
 from core.tests.factories import CommitFactory
-from utils.model_utils import ArchiveField, ArchiveFieldInterface
+from reports.models import ReportDetails
+from reports.tests.factories import ReportDetailsFactory
+from utils.model_utils import (
+    ArchiveField,
+    ArchiveFieldInterface,
+    prefetch_archive_field,
+)
 
 
 class TestArchiveField(object):
@@ -66,7 +72,7 @@ class TestArchiveField(object):
         some_json = {"some": "data"}
         mock_read_file = mocker.MagicMock(return_value=json.dumps(some_json))
         mock_archive_service = mocker.patch("utils.model_utils.ArchiveService")
-        mock_archive_service.return_value.read_file = mock_read_file
+        mock_archive_service.for_repository.return_value.read_file = mock_read_file
         commit = CommitFactory()
         test_class = self.ClassWithArchiveField(commit, None, "gcs_path")
 
@@ -74,7 +80,7 @@ class TestArchiveField(object):
         assert test_class._archive_field_storage_path == "gcs_path"
         assert test_class.archive_field == some_json
         mock_read_file.assert_called_with("gcs_path")
-        mock_archive_service.assert_called_with(repository=commit.repository)
+        mock_archive_service.for_repository.assert_called_with(commit.repository)
         assert mock_read_file.call_count == 1
         # Test that caching also works
         assert test_class.archive_field == some_json
@@ -83,7 +89,7 @@ class TestArchiveField(object):
     def test_archive_getter_file_not_in_storage(self, db, mocker):
         mock_read_file = mocker.MagicMock(side_effect=FileNotInStorageError())
         mock_archive_service = mocker.patch("utils.model_utils.ArchiveService")
-        mock_archive_service.return_value.read_file = mock_read_file
+        mock_archive_service.for_repository.return_value.read_file = mock_read_file
         commit = CommitFactory()
         test_class = self.ClassWithArchiveField(commit, None, "gcs_path")
 
@@ -91,7 +97,7 @@ class TestArchiveField(object):
         assert test_class._archive_field_storage_path == "gcs_path"
         assert test_class.archive_field == None
         mock_read_file.assert_called_with("gcs_path")
-        mock_archive_service.assert_called_with(repository=commit.repository)
+        mock_archive_service.for_repository.assert_called_with(commit.repository)
 
     def test_archive_setter_db_field(self, db, mocker):
         commit = CommitFactory()
@@ -101,7 +107,7 @@ class TestArchiveField(object):
         assert test_class.archive_field == "db_value"
         mock_archive_service = mocker.patch("utils.model_utils.ArchiveService")
         test_class.archive_field = "batata frita"
-        mock_archive_service.assert_not_called()
+        mock_archive_service.for_repository.assert_not_called()
         assert test_class._archive_field == "batata frita"
         assert test_class.archive_field == "batata frita"
 
@@ -112,8 +118,10 @@ class TestArchiveField(object):
         mock_read_file = mocker.MagicMock(return_value=json.dumps(some_json))
         mock_write_file = mocker.MagicMock(return_value="path/to/written/object")
         mock_archive_service = mocker.patch("utils.model_utils.ArchiveService")
-        mock_archive_service.return_value.read_file = mock_read_file
-        mock_archive_service.return_value.write_json_data_to_storage = mock_write_file
+        mock_archive_service.for_repository.return_value.read_file = mock_read_file
+        mock_archive_service.for_repository.return_value.write_json_data_to_storage = (
+            mock_write_file
+        )
 
         assert test_class._archive_field == "db_value"
         assert test_class._archive_field_storage_path == None
@@ -131,6 +139,54 @@ class TestArchiveField(object):
         assert test_class.archive_field == some_json
         # The cache is updated on write, so reading doesn't trigger another read
         assert mock_read_file.call_count == 0
-        mock_archive_service.return_value.delete_file.assert_called_with(
+        mock_archive_service.for_repository.return_value.delete_file.assert_called_with(
             "path/to/old/data"
         )
+
+    def test_archive_field_prefetch(self, db, mocker):
+        mock_read_files = mocker.MagicMock(
+            return_value={"path_1": json.dumps({"some": "data"}), "path_2": None}
+        )
+        mock_read_file = mocker.MagicMock()
+        mock_archive_service = mocker.patch("utils.model_utils.ArchiveService")
+        mock_archive_service.for_repository.return_value.read_files = mock_read_files
+        mock_archive_service.for_repository.return_value.read_file = mock_read_file
+        commit = CommitFactory()
+        in_storage = self.ClassWithArchiveField(commit, None, "path_1")
+        missing = self.ClassWithArchiveField(commit, None, "path_2")
+        in_db = self.ClassWithArchiveField(commit, "db_value", "path_3")
+
+        self.ClassWithArchiveField.archive_field.prefetch([in_storage, missing, in_db])
+
+        assert sorted(mock_read_files.call_args.args[0]) == ["path_1", "path_2"]
+        assert in_storage.archive_field == {"some": "data"}
+        assert in_db.archive_field == "db_value"
+        mock_read_file.assert_not_called()
+        # values that couldn't be prefetched are read as usual
+        mock_read_file.return_value = json.dumps("late")
+        assert missing.archive_field == "late"
+
+    def test_prefetch_archive_field_deferred_column(
+        self, db, mocker, django_assert_num_queries
+    ):
+        mock_read_files = mocker.patch("services.archive.ArchiveService.read_files")
+        files_array = [
+            {
+                "filename": "a.py",
+                "file_index": 0,
+                "file_totals": [0, 1, 1, 0, 0, "100", 0, 0, 0, 0, 0, 0, 0],
+                "session_totals": [],
+                "diff_totals": None,
+            }
+        ]
+        ReportDetailsFactory(_files_array=files_array)
+        ReportDetailsFactory(_files_array=files_array)
+        details = list(ReportDetails.objects.defer("_files_array"))
+
+        # the deferred column is loaded for all the objects at once
+        with django_assert_num_queries(1):
+            prefetch_archive_field(details, "files_array")
+            assert [
+                [file["filename"] for file in obj.files_array] for obj in details
+            ] == [["a.py"], ["a.py"]]
+        mock_read_files.assert_not_called()
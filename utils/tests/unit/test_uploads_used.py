@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import fakeredis
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from freezegun import freeze_time
+from redis.exceptions import ConnectionError
+
+from codecov_auth.tests.factories import OwnerFactory
+from core.tests.factories import CommitFactory, RepositoryFactory
+from reports.models import ReportSession
+from reports.tests.factories import CommitReportFactory, UploadFactory
+from utils.uploads_used import (
+    get_uploads_used,
+    increment_uploads_used,
+    uploads_used_counter_key,
+)
+
+
+@freeze_time("2024-03-15T12:00:00")
+@override_settings(UPLOAD_THROTTLING_ENABLED=True, UPLOAD_USAGE_COUNTERS_ENABLED=True)
+class UploadUsageCountersTest(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.owner = OwnerFactory()
+        self.plan_service = Mock(trial_status=None, has_trial_dates=False)
+
+        repository = RepositoryFactory(author=self.owner, private=True)
+        report = CommitReportFactory(commit=CommitFactory(repository=repository))
+        now = timezone.now()
+        for created_at in (
+            now,
+            now - timedelta(hours=1),
+            now - timedelta(days=5),
+            now - timedelta(days=40),
+        ):
+            upload = UploadFactory(report=report)
+            ReportSession.objects.filter(pk=upload.pk).update(created_at=created_at)
+
+    def test_counters_are_reconciled_on_first_use(self):
+        assert get_uploads_used(self.redis, self.plan_service, 100, self.owner) == 3
+        today = timezone.now().date()
+        assert self.redis.get(uploads_used_counter_key(self.owner, today)) == b"2"
+        assert (
+            self.redis.get(
+                uploads_used_counter_key(self.owner, today - timedelta(days=5))
+            )
+            == b"1"
+        )
+
+        # uploads are counted in Redis
+        increment_uploads_used(self.redis, self.owner)
+        with self.assertNumQueries(0):
+            assert get_uploads_used(self.redis, self.plan_service, 100, self.owner) == 4
+
+    def test_window_is_the_30_days_ending_today(self):
+        report = ReportSession.objects.first().report
+        for created_at in ("2024-02-15T00:00:00+00:00", "2024-02-14T23:59:59+00:00"):
+            upload = UploadFactory(report=report)
+            ReportSession.objects.filter(pk=upload.pk).update(
+                created_at=datetime.fromisoformat(created_at)
+            )
+
+        assert get_uploads_used(self.redis, self.plan_service, 100, self.owner) == 4
+        with self.assertNumQueries(0):
+            assert get_uploads_used(self.redis, self.plan_service, 100, self.owner) == 4
+
+    def test_limit(self):
+        assert get_uploads_used(self.redis, self.plan_service, 2, self.owner) == 2
+        assert get_uploads_used(self.redis, self.plan_service, 2, self.owner) == 2
+
+    def test_reconcile_keeps_uploads_counted_today(self):
+        # uploads counted today whose sessions are not created yet
+        today_key = uploads_used_counter_key(self.owner, timezone.now().date())
+        self.redis.set(today_key, 5)
+        assert get_uploads_used(self.redis, self.plan_service, 100, self.owner) == 6
+        assert self.redis.get(today_key) == b"5"
+
+    @patch("utils.uploads_used.reconcile_wait_time", 0)
+    def test_only_one_request_reconciles(self):
+        self.redis.set(f"upload_usage/{self.owner.ownerid}/reconcile_lock", 1)
+        increment_uploads_used(self.redis, self.owner)
+
+        # another request holds the lock, the (partial) counters are used meanwhile
+        with self.assertNumQueries(0):
+            assert get_uploads_used(self.redis, self.plan_service, 100, self.owner) == 1
+
+    def test_redis_error(self):
+        redis = Mock()
+        redis.exists.side_effect = ConnectionError()
+        assert get_uploads_used(redis, self.plan_service, 100, self.owner) == 3
@@ -1,9 +1,13 @@
 import logging
-from datetime import timedelta
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
 
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
 from django.utils import timezone
+from redis.exceptions import RedisError
 
 from plan.constants import TrialStatus
 from reports.models import ReportSession
@@ -14,10 +18,132 @@ log = logging.getLogger(__name__)
 cache_time = get_config("setup", "upload_usage_cache_time", default=21600)
 
 
+# Daily upload counters (`settings.UPLOAD_USAGE_COUNTERS_ENABLED`): uploads are counted
+# with an atomic INCR of a counter per owner and day, the uploads used are the sum of
+# the counters of the 30 days ending today (so the window starts at midnight rather
+# than exactly 30 days ago).  The counters are reconciled against the database (by the
+# first request that finds them stale, holding a lock so that concurrent requests do
+# not recompute them as well) every `cache_time` seconds.
+counter_time = 32 * 24 * 3600
+reconcile_lock_time = 60
+reconcile_wait_time = 1
+reconcile_wait_interval = 0.05
+
+
+def uploads_used_cache_key(owner) -> str:
+    return f"monthly_upload_usage_{owner.ownerid}"
+
+
+def uploads_used_counter_key(owner, day: date) -> str:
+    return f"upload_usage/{owner.ownerid}/{day.isoformat()}"
+
+
+def _reconciled_key(owner) -> str:
+    return f"upload_usage/{owner.ownerid}/reconciled"
+
+
+def _reconcile_lock_key(owner) -> str:
+    return f"upload_usage/{owner.ownerid}/reconcile_lock"
+
+
+def uploads_used_increment(owner) -> Tuple[str, int, bool]:
+    """
+    The Redis key that records an upload of the owner, its TTL, and whether the key is
+    a daily counter (always incremented) rather than the cached total (incremented
+    only when present).
+    """
+    if settings.UPLOAD_USAGE_COUNTERS_ENABLED:
+        key = uploads_used_counter_key(owner, timezone.now().date())
+        return key, counter_time, True
+    return uploads_used_cache_key(owner), cache_time, False
+
+
+def _window_days() -> List[date]:
+    """
+    Days of the counters of the window, the 30 days ending today
+    """
+    today = timezone.now().date()
+    return [today - timedelta(days=i) for i in reversed(range(30))]
+
+
+def _window_start() -> datetime:
+    start = timezone.now() - timedelta(days=29)
+    return start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _sum_counters(redis, owner, limit) -> int:
+    keys = [uploads_used_counter_key(owner, day) for day in _window_days()]
+    return min(
+        sum(int(value) for value in redis.mget(keys) if value is not None), limit
+    )
+
+
+def _reconcile_counters(redis, plan_service, owner, limit) -> int:
+    """
+    Overwrites the daily counters of the past days of the owner with the counts from
+    the database.  Today's counter is only raised to the count of the database: the
+    uploads being processed have been counted but are not in the database yet, and
+    uploads may be counted concurrently.
+    """
+    counts = {
+        row["day"]: row["count"]
+        for row in _uploads_used_queryset(plan_service, owner, _window_start())
+        .annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(count=Count("id"))
+        .values("day", "count")
+    }
+    *past_days, today = _window_days()
+    today_key = uploads_used_counter_key(owner, today)
+    today_count = int(redis.get(today_key) or 0)
+    with redis.pipeline() as pipeline:
+        for day in past_days:
+            pipeline.set(
+                uploads_used_counter_key(owner, day),
+                counts.get(day, 0),
+                ex=counter_time,
+            )
+        if counts.get(today, 0) > today_count:
+            pipeline.incrby(today_key, counts[today] - today_count)
+            pipeline.expire(today_key, counter_time)
+        pipeline.set(_reconciled_key(owner), 1, ex=cache_time)
+        pipeline.execute()
+    return _sum_counters(redis, owner, limit)
+
+
+def _get_uploads_used_from_counters(redis, plan_service, limit, owner) -> int:
+    try:
+        if redis.exists(_reconciled_key(owner)):
+            return _sum_counters(redis, owner, limit)
+
+        lock_key = _reconcile_lock_key(owner)
+        if redis.set(lock_key, 1, nx=True, ex=reconcile_lock_time):
+            try:
+                return _reconcile_counters(redis, plan_service, owner, limit)
+            finally:
+                redis.delete(lock_key)
+
+        # another request is reconciling the counters, wait (briefly) for it
+        deadline = time.monotonic() + reconcile_wait_time
+        while time.monotonic() < deadline:
+            time.sleep(reconcile_wait_interval)
+            if redis.exists(_reconciled_key(owner)):
+                break
+        return _sum_counters(redis, owner, limit)
+    except (OSError, RedisError) as e:
+        log.warning(
+            f"Error connecting to redis for rate limit check: {e}",
+            extra=dict(owner=owner.ownerid),
+        )
+        return query_uploads_used(plan_service, limit, owner)
+
+
 def get_uploads_used(redis, plan_service, limit, owner):
     if not settings.UPLOAD_THROTTLING_ENABLED:
         return 0
-    cache_key = f"monthly_upload_usage_{owner.ownerid}"
+    if settings.UPLOAD_USAGE_COUNTERS_ENABLED:
+        return _get_uploads_used_from_counters(redis, plan_service, limit, owner)
+    cache_key = uploads_used_cache_key(owner)
     try:
         uploads_used = redis.get(cache_key)
         if uploads_used is None:
@@ -37,7 +163,7 @@ def get_uploads_used(redis, plan_service, limit, owner):
 
 def set_uploads_used(redis, owner, uploads_used):
     try:
-        cache_key = f"monthly_upload_usage_{owner.ownerid}"
+        cache_key = uploads_used_cache_key(owner)
         redis.set(cache_key, uploads_used, ex=cache_time)
     except OSError as e:
         log.warning(
@@ -47,8 +173,22 @@ def set_uploads_used(redis, owner, uploads_used):
 
 
 def increment_uploads_used(redis, owner):
+    if settings.UPLOAD_USAGE_COUNTERS_ENABLED:
+        key = uploads_used_counter_key(owner, timezone.now().date())
+        try:
+            with redis.pipeline() as pipeline:
+                pipeline.incr(key)
+                pipeline.expire(key, counter_time)
+                pipeline.execute()
+        except (OSError, RedisError) as e:
+            log.warning(
+                f"Error connecting to redis for rate limit check: {e}",
+                extra=dict(owner=owner.ownerid),
+            )
+        return
+
     try:
-        cache_key = f"monthly_upload_usage_{owner.ownerid}"
+        cache_key = uploads_used_cache_key(owner)
         uploads_used = redis.get(cache_key)
         if uploads_used is not None:
             redis.set(cache_key, int(uploads_used) + 1, ex=cache_time)
@@ -63,10 +203,17 @@ def increment_uploads_used(redis, owner):
 def query_uploads_used(plan_service, limit, owner):
     if not settings.UPLOAD_THROTTLING_ENABLED:
         return 0
+    queryset = _uploads_used_queryset(
+        plan_service, owner, timezone.now() - timedelta(days=30)
+    )
+    return queryset[:limit].count()
+
+
+def _uploads_used_queryset(plan_service, owner, created_after: datetime):
     queryset = ReportSession.objects.filter(
         report__commit__repository__author_id=owner.ownerid,
         report__commit__repository__private=True,
-        created_at__gte=timezone.now() - timedelta(days=30),
+        created_at__gte=created_after,
         report__commit__timestamp__gte=timezone.now() - timedelta(days=60),
         upload_type="uploaded",
     )
@@ -78,5 +225,4 @@ def query_uploads_used(plan_service, limit, owner):
             Q(created_at__gte=plan_service.trial_end_date)
             | Q(created_at__lte=plan_service.trial_start_date)
         )
-
-    return queryset[:limit].count()
+    return queryset